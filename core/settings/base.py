@@ -77,6 +77,7 @@ SOCIALACCOUNT_PROVIDERS = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.gzip.GZipMiddleware',  # Preview HTML/JSON yanıtlarını sıkıştırır
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -193,5 +194,69 @@ LEMON_SQUEEZY_API_KEY = os.environ.get('LEMON_SQUEEZY_API_KEY')
 LEMON_SQUEEZY_STORE_ID = os.environ.get('LEMON_SQUEEZY_STORE_ID')
 LEMON_SQUEEZY_WEBHOOK_SECRET = os.environ.get('LEMON_SQUEEZY_WEBHOOK_SECRET')
 LEMON_SQUEEZY_CHECKOUT_URL = os.environ.get('LEMON_SQUEEZY_CHECKOUT_URL')
+# Bu kadar denemede işlenemeyen webhook olayı 'dead' olur (sıra tıkanmaz, replay ile tekrar işlenir)
+WEBHOOK_EVENT_MAX_ATTEMPTS = 5
 UNSPLASH_ACCESS_KEY = os.getenv('UNSPLASH_ACCESS_KEY', 'your_unsplash_access_key_here')
 
+
+# Deployment reconciliation (Vercel/GitHub senkronizasyonu)
+DEPLOYMENT_RECONCILE_MAX_WORKERS = int(os.getenv('DEPLOYMENT_RECONCILE_MAX_WORKERS', 6))
+DEPLOYMENT_RECONCILE_MIN_INTERVAL = 30  # saniye
+DEPLOYMENT_EXISTENCE_CACHE_TTL = 60  # saniye
+VERCEL_ENV_SYNC_CACHE_TTL = 60 * 60 * 24  # saniye
+OUTBOUND_HTTP_POOL_SIZE = 20
+OUTBOUND_HTTP_ETAG_TTL = 60 * 60 * 6  # saniye
+
+# Deploy öncesi statik build (Tailwind standalone CLI yolu, yoksa PATH'te aranır)
+TAILWIND_CLI_PATH = os.getenv('TAILWIND_CLI_PATH')
+TAILWIND_BUILD_TIMEOUT = 60  # saniye
+DEPLOY_RESPONSIVE_IMAGES = True
+DEPLOY_IMAGE_WIDTHS = (480, 768, 1200, 1600)
+
+# Görsellerin S3'e presigned POST ile doğrudan yüklenmesi (bucket CORS'ta POST izni gerekir)
+DIRECT_UPLOAD_EXPIRES_IN = 600  # saniye
+
+# UploadedImage varyantları (Pillow encode task içinde inline; paralellik worker concurrency ile)
+IMAGE_VARIANT_SIZES = {'thumb': 320, 'medium': 960, 'large': 1920}
+
+# Kullanıcı başına website sayacı (cache) ve periyodik uzlaştırma
+WEBSITE_COUNT_CACHE_TTL = 60 * 60 * 24  # saniye
+
+# Website HTML/prompt içerik deposu (spa.ContentBlob)
+CONTENT_BLOB_COMPRESSION_LEVEL = 6  # zlib 1-9
+CONTENT_BLOB_ORPHAN_GRACE_HOURS = 24
+
+# Preview/deploy render cache'i: (website id, updated_at, settings hash) anahtarlı
+WEBSITE_RENDER_CACHE_TTL = 60 * 60 * 24  # saniye
+
+# Website HTML revizyonları: her N revizyonda bir tam snapshot, arada satır delta'sı
+WEBSITE_REVISION_SNAPSHOT_INTERVAL = 10
+
+# HTML yapı indeksi (spa/utils/html_index.py): içerik digest'i ile cache'lenir
+HTML_INDEX_CACHE_TTL = 60 * 60 * 24 * 7  # saniye
+
+# Section-parallel website üretimi: iskelet + eşzamanlı section'lar (plan design_preferences'ta
+# generation_mode='sections'/'single' ile de seçilebilir); hatalı section tek başına yeniden denenir
+WEBSITE_SECTION_PARALLEL_GENERATION = os.getenv('WEBSITE_SECTION_PARALLEL_GENERATION', 'False') == 'True'
+WEBSITE_SECTION_GENERATION_MODEL = 'gemini-2.5-flash'
+WEBSITE_SECTION_GENERATION_WORKERS = int(os.getenv('WEBSITE_SECTION_GENERATION_WORKERS', 6))
+WEBSITE_SECTION_GENERATION_RETRIES = 2
+
+# Sonuç backend'i (Redis): sonuçlar sıkıştırılır ve 1 saat sonra silinir
+CELERY_RESULT_EXPIRES = 60 * 60  # saniye
+CELERY_RESULT_COMPRESSION = 'zlib'
+
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-website-counts': {
+        'task': 'spa.tasks.reconcile_website_counts_task',
+        'schedule': 60 * 60,  # saniye
+    },
+    'expire-subscriptions': {
+        'task': 'users.tasks.expire_subscriptions_task',
+        'schedule': 15 * 60,  # saniye
+    },
+    'purge-orphan-content-blobs': {
+        'task': 'spa.tasks.purge_orphan_content_blobs_task',
+        'schedule': 24 * 60 * 60,  # saniye
+    },
+}
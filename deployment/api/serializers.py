@@ -1,9 +1,10 @@
 # deployment/api/serializers.py
 from rest_framework import serializers
+from spa.api.mixins import SparseFieldsetMixin
 from ..models import GitHubRepository, VercelDeployment, DeploymentSettings
 
 
-class GitHubRepositorySerializer(serializers.ModelSerializer):
+class GitHubRepositorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = GitHubRepository
         fields = [
@@ -27,6 +28,21 @@ class VercelDeploymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class VercelDeploymentListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Liste görünümleri için build_logs içermeyen hafif serializer"""
+    github_repo = GitHubRepositorySerializer(read_only=True)
+    website_id = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = VercelDeployment
+        fields = [
+            'id', 'deployment_id', 'project_id', 'deployment_url',
+            'status', 'commit_sha', 'error_message',
+            'github_repo', 'created_at', 'updated_at', 'website_id'
+        ]
+        read_only_fields = fields
+
+
 class DeploymentSettingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = DeploymentSettings
@@ -6,11 +6,14 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from spa.models import Website
+from spa.api.pagination import CursorResultsSetPagination
 from ..models import GitHubRepository, VercelDeployment, DeploymentSettings
 from ..services.deployment_service import DeploymentService
+from ..services.reconciliation_service import enqueue_reconciliation, get_reconciliation_state
 from .serializers import (
     GitHubRepositorySerializer,
     VercelDeploymentSerializer, 
+    VercelDeploymentListSerializer,
     DeploymentSettingsSerializer,
     DeployWebsiteSerializer,
     DeploymentStatusSerializer
@@ -109,16 +112,27 @@ class DeploymentViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def list_deployments(self, request):
         """Kullanıcının deployment'larını listeler"""
-        deployments = VercelDeployment.objects.filter(website__user=request.user)
-        serializer = VercelDeploymentSerializer(deployments, many=True)
-        return Response(serializer.data)
+        only_fields = VercelDeploymentListSerializer.model_fields_for(request)
+        deployments = VercelDeployment.objects.filter(website__user=request.user).only(*only_fields, 'created_at')
+        if 'github_repo' in only_fields:
+            deployments = deployments.select_related('github_repo')
+        
+        paginator = CursorResultsSetPagination()
+        page = paginator.paginate_queryset(deployments, request, view=self)
+        serializer = VercelDeploymentListSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def list_repositories(self, request):
         """Kullanıcının GitHub repository'lerini listeler"""
-        repos = GitHubRepository.objects.filter(website__user=request.user)
-        serializer = GitHubRepositorySerializer(repos, many=True)
-        return Response(serializer.data)
+        repos = GitHubRepository.objects.filter(website__user=request.user).only(
+            *GitHubRepositorySerializer.model_fields_for(request), 'created_at'
+        )
+        
+        paginator = CursorResultsSetPagination()
+        page = paginator.paginate_queryset(repos, request, view=self)
+        serializer = GitHubRepositorySerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def deployment_info(self, request):
@@ -473,36 +487,30 @@ class DeploymentViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['post'])
     def refresh_deployment_list(self, request):
-        """Deployment listesini yeniler ve geçersiz kayıtları otomatik temizler"""
+        """Reconciliation'ı arka planda başlatır, deployment listesini DB'den hemen döndürür"""
         try:
-            deployment_service = DeploymentService()
-            
-            # 1. Önce geçersiz deployment'ları temizle
-            cleanup_result = deployment_service.validate_and_cleanup_deployments(user_id=request.user.id)
-            
-            # 2. Sonra güncel deployment listesini döndür
-            deployments = VercelDeployment.objects.filter(website__user=request.user)
-            
-            # 3. Her deployment için gerçek durumu kontrol et
-            updated_deployments = []
-            for deployment in deployments:
-                try:
-                    if deployment.deployment_id:
-                        status_result = deployment_service.check_deployment_status(deployment.id)
-                        if status_result.get('success'):
-                            deployment.refresh_from_db()  # DB'den güncel veriyi al
-                            
-                    updated_deployments.append(deployment)
-                except Exception as e:
-                    logger.warning(f"Could not update deployment {deployment.id}: {str(e)}")
-                    updated_deployments.append(deployment)
+            queued = enqueue_reconciliation(request.user.id)
+            reconciliation = get_reconciliation_state(request.user.id)
             
-            serializer = VercelDeploymentSerializer(updated_deployments, many=True)
+            deployments = VercelDeployment.objects.filter(
+                website__user=request.user
+            ).select_related('github_repo').defer('build_logs')
+            serializer = VercelDeploymentListSerializer(deployments, many=True)
             
+            cleanup_details = reconciliation.get('summary', {})
             return Response({
                 'success': True,
-                'message': f'Deployment list refreshed. Cleaned up {cleanup_result.get("cleaned_up", 0)} invalid records.',
-                'cleanup_details': cleanup_result,
+                'message': (
+                    'Deployment reconciliation started in background.' if queued
+                    else f'Deployment list refreshed. Cleaned up {cleanup_details.get("cleaned_up", 0)} invalid records.'
+                ),
+                'reconciliation': {
+                    'queued': queued,
+                    'status': reconciliation.get('status'),
+                    'started_at': reconciliation.get('started_at'),
+                    'finished_at': reconciliation.get('finished_at'),
+                },
+                'cleanup_details': cleanup_details,
                 'deployments': serializer.data
             })
             
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-19 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deployment', '0003_auto_20250528_2356'),
+        ('spa', '0018_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='verceldeployment',
+            index=models.Index(fields=['website', 'status'], name='deploy_website_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verceldeployment',
+            index=models.Index(fields=['website', '-created_at'], name='deploy_website_created_idx'),
+        ),
+    ]
@@ -45,6 +45,11 @@ class VercelDeployment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # filter(website=..., status='ready') ve website bazlı son deployment
+            models.Index(fields=['website', 'status'], name='deploy_website_status_idx'),
+            models.Index(fields=['website', '-created_at'], name='deploy_website_created_idx'),
+        ]
     
     def __str__(self):
         status_display = self.get_status_display() if self.status else 'Unknown'
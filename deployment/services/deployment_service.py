@@ -1,15 +1,21 @@
+import hashlib
 import logging
 from django.conf import settings
+from django.core.cache import cache
 from .github_service import GitHubService
 from .vercel_service import VercelService
+from .http_client import request_memo
+from .static_build import StaticSiteBuilder
+from .image_pipeline import ResponsiveImagePipeline
 from ..models import GitHubRepository, VercelDeployment, DeploymentSettings
 from spa.models import Website
 from typing import Dict
 import json
-import requests
 
 logger = logging.getLogger(__name__)
 
+STATIC_ASSET_DIR = "assets"
+
 
 class DeploymentService:
     def __init__(self):
@@ -24,12 +30,14 @@ class DeploymentService:
             # ✅ Mevcut deployment'ı kontrol et
             existing_deployment = VercelDeployment.objects.filter(website=website).first()
             
-            if existing_deployment:
-                logger.info(f"🔄 Redeploy detected for website {website_id}")
-                return self._redeploy_existing_website(website, existing_deployment)
-            else:
-                logger.info(f"🆕 New deployment for website {website_id}")
-                return self._deploy_new_website(website)
+            # ✅ Deploy boyunca tekrarlanan get_repository/get_project_info çağrıları memo'dan döner
+            with request_memo():
+                if existing_deployment:
+                    logger.info(f"🔄 Redeploy detected for website {website_id}")
+                    return self._redeploy_existing_website(website, existing_deployment)
+                else:
+                    logger.info(f"🆕 New deployment for website {website_id}")
+                    return self._deploy_new_website(website)
                 
         except Exception as e:
             logger.exception(f"Deployment failed for website {website_id}: {str(e)}")
@@ -60,7 +68,7 @@ class DeploymentService:
             file_shas = self._upload_website_content(github_repo, website)
             
             # ✅ 4. Environment variables'ları güncelle
-            self._update_project_environment_variables(existing_deployment.project_id, website)
+            self._sync_project_environment_variables(existing_deployment.project_id, website)
             
             # ✅ 5. Deployment tetikle (auto-deployment olacak)
             deployment_result = self._trigger_deployment(existing_deployment, file_shas)
@@ -131,7 +139,7 @@ class DeploymentService:
             )
             
             # Environment variables set et
-            self._setup_project_environment_variables(project_data['id'], website)
+            self._sync_project_environment_variables(project_data['id'], website, is_new_project=True)
             
             # Content'i upload et
             file_shas = self._upload_website_content(github_repo, website)
@@ -199,25 +207,9 @@ class DeploymentService:
             raise Exception(f"Failed to create or verify GitHub repository: {str(e)}")
     
     def _upload_website_content(self, github_repo: GitHubRepository, website: Website) -> Dict:
-        """Website content'ini GitHub'a yükler - İyileştirilmiş commit mesajı"""
+        """Build artefaktını GitHub'a tek commit olarak yükler - değişmeyen dosyalar atlanır"""
         try:
-            file_shas = {}
-            
-            # ✅ HTML content'i process et
-            html_content = self._process_html_content_for_vercel(website)
-            
-            # ✅ Daha açıklayıcı commit mesajı
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            commit_message = f"Update website content - {timestamp} (ID: {website.id})"
-            
-            result = self.github.upload_file(
-                repo_name=github_repo.repo_name,
-                file_path="index.html",
-                content=html_content,
-                commit_message=commit_message  # ✅ Timestamped commit
-            )
-            file_shas["index.html"] = result.get("content", {}).get("sha", "")
+            files = self._build_site_artifact(website)
             
             # Package.json'ı da güncelle (version bump)
             package_json = {
@@ -232,20 +224,42 @@ class DeploymentService:
                 "keywords": ["static", "website", "html"],
                 "author": website.user.email
             }
+            files["package.json"] = json.dumps(package_json, indent=2)
             
-            result = self.github.upload_file(
+            # ✅ Daha açıklayıcı commit mesajı
+            import datetime
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            commit_message = f"Update website content - {timestamp} (ID: {website.id})"
+            
+            result = self.github.commit_files(
                 repo_name=github_repo.repo_name,
-                file_path="package.json",
-                content=json.dumps(package_json, indent=2),
-                commit_message=f"Update package.json - {timestamp}"
+                files=files,
+                commit_message=commit_message,
+                branch=github_repo.default_branch or "main",
+                prune_prefixes=(f"{STATIC_ASSET_DIR}/",)
             )
-            file_shas["package.json"] = result.get("content", {}).get("sha", "")
             
-            logger.info(f"✅ Website content uploaded successfully to {github_repo.repo_name}")
-            return file_shas
+            logger.info(f"✅ Website content uploaded to {github_repo.repo_name}: {len(result['changed'])}/{len(files)} files changed")
+            return result['file_shas']
             
         except Exception as e:
             raise Exception(f"Failed to upload website content: {str(e)}")
+
+    def _build_site_artifact(self, website: Website) -> Dict:
+        """HTML'i işler ve statik build aşamasından geçirir (Tailwind, responsive görseller, minify, hash'li asset'ler)"""
+        html_content = self._process_html_content_for_vercel(website)
+        
+        image_pipeline = None
+        if getattr(settings, 'DEPLOY_RESPONSIVE_IMAGES', True):
+            image_pipeline = ResponsiveImagePipeline(asset_dir=f"{STATIC_ASSET_DIR}/img")
+        
+        try:
+            return StaticSiteBuilder(asset_dir=STATIC_ASSET_DIR, image_pipeline=image_pipeline).build(html_content)
+        except Exception as e:
+            # Build başarısız olursa işlenmiş HTML'i olduğu gibi deploy et
+            logger.error(f"❌ Static build failed, deploying unbuilt HTML: {str(e)}")
+            return {"index.html": html_content}
+
     def _create_or_update_vercel_project(self, website: Website, github_repo: GitHubRepository) -> VercelDeployment:
         """Vercel projesi oluştur/güncelle - Status düzeltilmiş"""
         try:
@@ -265,7 +279,7 @@ class DeploymentService:
                     logger.info(f"✅ Fixed null status to pending for deployment {existing_deployment.id}")
                 
                 # Environment variables'ları güncelle
-                self._update_project_environment_variables(existing_deployment.project_id, website)
+                self._sync_project_environment_variables(existing_deployment.project_id, website)
                 
                 # ✅ Authentication'ı devre dışı bırak
                 try:
@@ -297,7 +311,7 @@ class DeploymentService:
                 logger.info(f"✅ New deployment created with status: {deployment.status}")
                 
                 # Environment variables set et
-                self._setup_project_environment_variables(project_data['id'], website)
+                self._sync_project_environment_variables(project_data['id'], website, is_new_project=True)
                 
                 # ✅ Authentication'ı devre dışı bırak
                 try:
@@ -475,66 +489,11 @@ class DeploymentService:
             }
 
     def validate_and_cleanup_deployments(self, user_id: int = None) -> Dict:
-        """Vercel'de olmayan deployment kayıtlarını temizler"""
+        """Vercel'de olmayan deployment kayıtlarını temizler (eşzamanlı, rate-limit'e duyarlı)"""
+        from .reconciliation_service import DeploymentReconciler
+
         try:
-            # Kullanıcının deployment'larını al
-            if user_id:
-                deployments = VercelDeployment.objects.filter(website__user_id=user_id)
-            else:
-                deployments = VercelDeployment.objects.all()
-            
-            cleanup_results = {
-                'total_checked': deployments.count(),
-                'invalid_found': 0,
-                'cleaned_up': 0,
-                'errors': [],
-                'details': []
-            }
-            
-            for deployment in deployments:
-                try:
-                    # Vercel project'in hala var olduğunu kontrol et
-                    project_exists = self._check_vercel_project_exists(deployment.project_id)
-                    
-                    if not project_exists:
-                        cleanup_results['invalid_found'] += 1
-                        
-                        # GitHub repo'yu da kontrol et
-                        github_exists = False
-                        if deployment.github_repo:
-                            github_exists = self._check_github_repo_exists(deployment.github_repo.repo_name)
-                        
-                        # Kayıtları sil
-                        deployment_info = {
-                            'deployment_id': deployment.id,
-                            'website_id': deployment.website.id,
-                            'website_title': deployment.website.title,
-                            'project_id': deployment.project_id,
-                            'github_repo': deployment.github_repo.repo_name if deployment.github_repo else None,
-                            'vercel_exists': False,
-                            'github_exists': github_exists
-                        }
-                        
-                        # GitHub repo kaydını sil (eğer GitHub'da da yoksa)
-                        if deployment.github_repo and not github_exists:
-                            deployment.github_repo.delete()
-                            deployment_info['github_repo_deleted'] = True
-                        
-                        # Deployment kaydını sil
-                        deployment.delete()
-                        cleanup_results['cleaned_up'] += 1
-                        cleanup_results['details'].append(deployment_info)
-                        
-                        logger.info(f"✅ Cleaned up invalid deployment: {deployment.id}")
-                    
-                except Exception as e:
-                    error_msg = f"Error checking deployment {deployment.id}: {str(e)}"
-                    cleanup_results['errors'].append(error_msg)
-                    logger.error(f"❌ {error_msg}")
-            
-            logger.info(f"🧹 Cleanup completed: {cleanup_results['cleaned_up']}/{cleanup_results['total_checked']} invalid deployments removed")
-            return cleanup_results
-            
+            return DeploymentReconciler().reconcile(user_id=user_id, refresh_status=False)
         except Exception as e:
             logger.exception(f"Cleanup failed: {str(e)}")
             return {
@@ -542,25 +501,6 @@ class DeploymentService:
                 'error': str(e)
             }
 
-
-    def _check_vercel_project_exists(self, project_id: str) -> bool:
-        """Vercel project'in var olup olmadığını kontrol eder"""
-        try:
-            project_data = self.vercel.get_project_info(project_id)
-            return project_data is not None
-        except Exception as e:
-            logger.debug(f"Vercel project {project_id} does not exist: {str(e)}")
-            return False
-
-    def _check_github_repo_exists(self, repo_name: str) -> bool:
-        """GitHub repo'nun var olup olmadığını kontrol eder"""
-        try:
-            repo_data = self.github.get_repository(repo_name)
-            return repo_data is not None
-        except Exception as e:
-            logger.debug(f"GitHub repo {repo_name} does not exist: {str(e)}")
-            return False
-
     def force_delete_deployment_records(self, website_id: int, user_id: int) -> Dict:
         """Belirli bir website için tüm deployment kayıtlarını zorla siler"""
         try:
@@ -616,34 +556,15 @@ class DeploymentService:
 
     def get_orphaned_deployments(self, user_id: int = None) -> Dict:
         """Vercel'de bulunmayan deployment kayıtlarını listeler"""
+        from .reconciliation_service import DeploymentReconciler
+
         try:
-            if user_id:
-                deployments = VercelDeployment.objects.filter(website__user_id=user_id).select_related('website', 'github_repo')
-            else:
-                deployments = VercelDeployment.objects.all().select_related('website', 'github_repo')
-            
-            orphaned = []
+            reconciler = DeploymentReconciler()
+            orphaned = reconciler.find_orphaned(user_id=user_id)
             
-            for deployment in deployments:
-                vercel_exists = self._check_vercel_project_exists(deployment.project_id)
-                github_exists = False
-                
-                if deployment.github_repo:
-                    github_exists = self._check_github_repo_exists(deployment.github_repo.repo_name)
-                
-                if not vercel_exists:
-                    orphaned.append({
-                        'deployment_id': deployment.id,
-                        'website_id': deployment.website.id,
-                        'website_title': deployment.website.title,
-                        'project_id': deployment.project_id,
-                        'deployment_url': deployment.deployment_url,
-                        'github_repo': deployment.github_repo.repo_name if deployment.github_repo else None,
-                        'vercel_exists': vercel_exists,
-                        'github_exists': github_exists,
-                        'created_at': deployment.created_at,
-                        'status': deployment.status
-                    })
+            deployments = VercelDeployment.objects.all()
+            if user_id:
+                deployments = deployments.filter(website__user_id=user_id)
             
             return {
                 'success': True,
@@ -664,7 +585,7 @@ class DeploymentService:
             # Vercel Deploy Hook kullan (daha güvenilir)
             url = f"https://api.vercel.com/v1/integrations/deploy/{vercel_deployment.project_id}"
             
-            response = requests.post(url, headers=self.vercel.headers)
+            response = self.vercel.http.post(url, endpoint='manual_deployment_trigger')
             
             if response.status_code == 200:
                 deploy_data = response.json()
@@ -775,148 +696,81 @@ class DeploymentService:
                 'error': str(e)
             }
         
-    def _setup_project_environment_variables(self, project_id: str, website: Website):
-        """Yeni Vercel projesi için environment variables'ları set eder"""
-        try:
-            from django.conf import settings
-            
-            # EmailJS environment variables
-            env_vars = {}
-            
-            # EmailJS Public Key
-            if hasattr(settings, 'YOUR_EMAIL_JS_PUBLIC_KEY'):
-                env_vars['NEXT_PUBLIC_EMAILJS_PUBLIC_KEY'] = settings.YOUR_EMAIL_JS_PUBLIC_KEY
-                
-            # EmailJS Service ID
-            if hasattr(settings, 'YOUR_EMAIL_JS_SERVICE_ID'):
-                env_vars['NEXT_PUBLIC_EMAILJS_SERVICE_ID'] = settings.YOUR_EMAIL_JS_SERVICE_ID
-                
-            # EmailJS Template ID
-            if hasattr(settings, 'YOUR_EMAIL_JS_TEMPLATE_ID'):
-                env_vars['NEXT_PUBLIC_EMAILJS_TEMPLATE_ID'] = settings.YOUR_EMAIL_JS_TEMPLATE_ID
-            
-            # Contact Email
-            env_vars['NEXT_PUBLIC_CONTACT_EMAIL'] = website.contact_email or website.user.email
-            
-            if env_vars:
-                result = self.vercel.set_environment_variables(project_id, env_vars)
-                
-                success_count = sum(1 for r in result['results'] if r['success'])
-                total_count = len(result['results'])
-                
-                logger.info(f"✅ Environment Variables Set: {success_count}/{total_count}")
-                
-                # Başarısız olanları log'la
-                for r in result['results']:
-                    if not r['success']:
-                        logger.error(f"❌ Failed to set env var {r['key']}: {r['error']}")
-            else:
-                logger.warning("⚠️  No environment variables to set")
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to setup environment variables: {str(e)}")
+    def _get_desired_environment_variables(self, website: Website) -> Dict[str, str]:
+        """Website için Vercel projesinde olması gereken environment variables"""
+        from django.conf import settings
+        
+        desired = {
+            'NEXT_PUBLIC_EMAILJS_PUBLIC_KEY': getattr(settings, 'YOUR_EMAIL_JS_PUBLIC_KEY', ''),
+            'NEXT_PUBLIC_EMAILJS_SERVICE_ID': getattr(settings, 'YOUR_EMAIL_JS_SERVICE_ID', ''),
+            'NEXT_PUBLIC_EMAILJS_TEMPLATE_ID': getattr(settings, 'YOUR_EMAIL_JS_TEMPLATE_ID', ''),
+            'NEXT_PUBLIC_CONTACT_EMAIL': website.contact_email or website.user.email
+        }
+        
+        # Boş değerler set edilmez
+        return {key: value for key, value in desired.items() if value}
 
-    def _update_project_environment_variables(self, project_id: str, website: Website):
-        """Mevcut Vercel projesi için environment variables'ları günceller"""
+    def _sync_project_environment_variables(self, project_id: str, website: Website, is_new_project: bool = False) -> Dict:
+        """Environment variables'ı deklaratif olarak senkronize eder: sadece değişenler tek batch istekte upsert edilir"""
         try:
-            from django.conf import settings
+            desired = self._get_desired_environment_variables(website)
+            if not desired:
+                logger.warning("⚠️  No environment variables to set")
+                return {'success': True, 'changed': []}
+            
+            desired_hash = hashlib.sha256(json.dumps(desired, sort_keys=True).encode()).hexdigest()
+            cache_key = f"vercel_env_sync:{project_id}"
+            
+            # Son başarılı senkronizasyon ile aynı ise hiç API çağrısı yapma
+            if cache.get(cache_key) == desired_hash:
+                logger.info(f"✅ Env vars unchanged for project {project_id}, sync skipped")
+                return {'success': True, 'changed': [], 'cached': True}
+            
+            current = {}
+            if not is_new_project:
+                current_env_vars = self.vercel.get_environment_variables(project_id)
+                current = {
+                    env_var.get('key'): env_var.get('value')
+                    for env_var in current_env_vars.get('envs', [])
+                }
             
-            # Mevcut env vars'ları al
-            current_env_vars = self.vercel.get_environment_variables(project_id)
+            changed = {key: value for key, value in desired.items() if current.get(key) != value}
             
-            # Güncellenmesi gereken değerler
-            updates_needed = {
-                'NEXT_PUBLIC_EMAILJS_PUBLIC_KEY': getattr(settings, 'YOUR_EMAIL_JS_PUBLIC_KEY', ''),
-                'NEXT_PUBLIC_EMAILJS_SERVICE_ID': getattr(settings, 'YOUR_EMAIL_JS_SERVICE_ID', ''),
-                'NEXT_PUBLIC_EMAILJS_TEMPLATE_ID': getattr(settings, 'YOUR_EMAIL_JS_TEMPLATE_ID', ''),
-                'NEXT_PUBLIC_CONTACT_EMAIL': website.contact_email or website.user.email
-            }
+            if changed:
+                result = self.vercel.upsert_environment_variables(project_id, changed)
+                if not result['success']:
+                    for failed in result['failed']:
+                        logger.error(f"❌ Failed to set env var {failed['key']}: {failed['error']}")
+                    if result.get('error'):
+                        logger.error(f"❌ Env var upsert failed: {result['error']}")
+                    return {'success': False, 'changed': list(changed.keys())}
+                
+                logger.info(f"✅ Environment Variables Synced: {list(changed.keys())}")
             
-            # Mevcut env vars'lar arasında ara ve güncelle
-            for env_var in current_env_vars.get('envs', []):
-                key = env_var.get('key')
-                if key in updates_needed and updates_needed[key]:
-                    try:
-                        self.vercel.update_environment_variable(
-                            project_id, 
-                            env_var['id'], 
-                            updates_needed[key]
-                        )
-                        logger.info(f"✅ Updated env var: {key}")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to update env var {key}: {str(e)}")
-            
-            # Eksik olanları ekle
-            existing_keys = {env_var.get('key') for env_var in current_env_vars.get('envs', [])}
-            missing_vars = {k: v for k, v in updates_needed.items() if k not in existing_keys and v}
-            
-            if missing_vars:
-                result = self.vercel.set_environment_variables(project_id, missing_vars)
-                logger.info(f"✅ Added missing env vars: {list(missing_vars.keys())}")
+            cache.set(cache_key, desired_hash, timeout=getattr(settings, 'VERCEL_ENV_SYNC_CACHE_TTL', 60 * 60 * 24))
+            return {'success': True, 'changed': list(changed.keys())}
                 
         except Exception as e:
-            logger.error(f"❌ Failed to update environment variables: {str(e)}")
+            logger.error(f"❌ Failed to sync environment variables: {str(e)}")
+            return {'success': False, 'error': str(e)}
 
     def _process_html_content_for_vercel(self, website: Website) -> str:
-        """HTML content'i process eder - Build zamanında env vars inject edilecek"""
+        """HTML content'i process eder - preview ile aynı render (ve render cache'i)"""
         try:
-            from django.conf import settings
-            
-            html_content = website.html_content
-            email = website.contact_email or website.user.email
-            
-            # ✅ Django settings'ten değerleri al ve direkt inject et
-            # Vercel build zamanında bu değerler env vars'tan gelecek
-            
-            # EmailJS Public Key
-            public_key = getattr(settings, 'YOUR_EMAIL_JS_PUBLIC_KEY', 'YOUR_EMAIL_JS_PUBLIC_KEY')
-            html_content = html_content.replace('{{YOUR_EMAIL_JS_PUBLIC_KEY}}', public_key)
-            html_content = html_content.replace('{{ YOUR_EMAIL_JS_PUBLIC_KEY }}', public_key)
-            html_content = html_content.replace('YOUR_EMAIL_JS_PUBLIC_KEY', public_key)
-            
-            # EmailJS Service ID
-            service_id = getattr(settings, 'YOUR_EMAIL_JS_SERVICE_ID', 'YOUR_EMAIL_JS_SERVICE_ID')
-            html_content = html_content.replace('{{YOUR_EMAIL_JS_SERVICE_ID}}', service_id)
-            html_content = html_content.replace('{{ YOUR_EMAIL_JS_SERVICE_ID }}', service_id)
-            html_content = html_content.replace('YOUR_EMAIL_JS_SERVICE_ID', service_id)
-            
-            # EmailJS Template ID
-            template_id = getattr(settings, 'YOUR_EMAIL_JS_TEMPLATE_ID', 'YOUR_EMAIL_JS_TEMPLATE_ID')
-            html_content = html_content.replace('{{YOUR_EMAIL_JS_TEMPLATE_ID}}', template_id)
-            html_content = html_content.replace('{{ YOUR_EMAIL_JS_TEMPLATE_ID }}', template_id)
-            html_content = html_content.replace('YOUR_EMAIL_JS_TEMPLATE_ID', template_id)
-            
-            # Email'i replace et
-            html_content = html_content.replace("USER_EMAIL_PLACEHOLDER", email)
-            
-            # ✅ Debug: Replacement'ların yapıldığını kontrol et
-            if 'YOUR_EMAIL_JS_PUBLIC_KEY' in html_content:
-                logger.error("❌ EmailJS Public Key placeholder still exists!")
-            else:
-                logger.info("✅ EmailJS Public Key replaced successfully")
-                
-            if 'YOUR_EMAIL_JS_SERVICE_ID' in html_content:
-                logger.error("❌ EmailJS Service ID placeholder still exists!")
-            else:
-                logger.info("✅ EmailJS Service ID replaced successfully")
-                
-            if 'YOUR_EMAIL_JS_TEMPLATE_ID' in html_content:
-                logger.error("❌ EmailJS Template ID placeholder still exists!")
-            else:
-                logger.info("✅ EmailJS Template ID replaced successfully")
+            from spa.services.element_patch_service import get_element_patch_service
+            from spa.services.render_service import get_website_render_service
             
-            return html_content
+            # Inline metin düzenlemeleri html_content'e kalıcı olarak işlenir (başarısız olursa render yine uygular)
+            try:
+                get_element_patch_service().compact(website)
+            except Exception as e:
+                logger.warning(f"⚠️ Element content compaction failed for website {website.id}: {str(e)}")
             
+            # Custom stiller deploy edilen HTML'e bir kez eklenir
+            return get_website_render_service().render(website, with_styles=True)
         except Exception as e:
             logger.error(f"❌ HTML processing failed: {str(e)}")
-            # Fallback: En azından email'i replace et
-            try:
-                html_content = website.html_content
-                email = website.contact_email or website.user.email
-                html_content = html_content.replace("USER_EMAIL_PLACEHOLDER", email)
-                return html_content
-            except:
-                return website.html_content
+            return website.html_content
             
     def get_deployment_info(self, website_id: int) -> Dict:
         """Deployment durumu hakkında detaylı bilgi döner"""
@@ -933,7 +787,7 @@ class DeploymentService:
             }
             
             if github_repo:
-                # GitHub repo durumu
+                # GitHub repo durumu (ETag cache ile 304 rate limit'e sayılmaz)
                 repo_data = self.github.get_repository(github_repo.repo_name)
                 info.update({
                     'github_repo_name': github_repo.repo_name,
@@ -1,8 +1,9 @@
-import requests
 import base64
 import json
 from django.conf import settings
-from typing import Dict, Optional
+import hashlib
+from typing import Dict, Optional, Union
+from .http_client import ApiClient
 
 
 class GitHubService:
@@ -16,6 +17,7 @@ class GitHubService:
             "Accept": "application/vnd.github.v3+json",
             "Content-Type": "application/json"
         }
+        self.http = ApiClient('github', self.headers)
     
     def create_repository(self, repo_name: str, description: str = "") -> Dict:
         """GitHub'da yeni repository oluşturur (kişisel hesap altında)"""
@@ -32,8 +34,7 @@ class GitHubService:
             "has_wiki": False
         }
         
-        response = requests.post(url, headers=self.headers, json=data)
-        print(f"GitHub API create_repository Response: URL={url}, Status={response.status_code}, Body={response.text}")
+        response = self.http.post(url, endpoint='create_repository', json=data)
         
         if response.status_code == 201:
             return response.json()
@@ -66,8 +67,7 @@ class GitHubService:
         except:
             pass
         
-        response = requests.put(url, headers=self.headers, json=data)
-        print(f"GitHub API upload_file Response: URL={url}, Status={response.status_code}, Body={response.text}")
+        response = self.http.put(url, endpoint='upload_file', json=data)
         
         if response.status_code in [200, 201]:
             return response.json()
@@ -78,8 +78,7 @@ class GitHubService:
         """Repository'den dosya bilgilerini getirir (kişisel hesap altında)"""
         url = f"{self.base_url}/repos/{self.username}/{repo_name}/contents/{file_path}"
         
-        response = requests.get(url, headers=self.headers)
-        print(f"GitHub API get_file Response: URL={url}, Status={response.status_code}, Body={response.text}")
+        response = self.http.get(url, endpoint='get_file', conditional=True)
         
         if response.status_code == 200:
             return response.json()
@@ -89,8 +88,7 @@ class GitHubService:
         """Repository'yi siler (kişisel hesap altında)"""
         url = f"{self.base_url}/repos/{self.username}/{repo_name}"
         
-        response = requests.delete(url, headers=self.headers)
-        print(f"GitHub API delete_repository Response: URL={url}, Status={response.status_code}")
+        response = self.http.delete(url, endpoint='delete_repository')
         
         return response.status_code == 204
     
@@ -98,9 +96,103 @@ class GitHubService:
         """Repository bilgilerini getirir (kişisel hesap altında)"""
         url = f"{self.base_url}/repos/{self.username}/{repo_name}"
         
-        response = requests.get(url, headers=self.headers)
-        print(f"GitHub API get_repository Response: URL={url}, Status={response.status_code}, Body={response.text}")
+        response = self.http.get(url, endpoint='get_repository', conditional=True)
         
         if response.status_code == 200:
             return response.json()
-        return None
\ No newline at end of file
+        return None
+
+    def repository_exists(self, repo_name: str) -> Optional[bool]:
+        """Repository var mı? 200 -> True, 404 -> False, belirsiz (rate limit/5xx) -> None"""
+        url = f"{self.base_url}/repos/{self.username}/{repo_name}"
+        
+        response = self.http.get(url, endpoint='repository_exists', conditional=True)
+        
+        if response.status_code == 200:
+            return True
+        if response.status_code == 404:
+            return False
+        return None
+
+    def commit_files(self, repo_name: str, files: Dict[str, Union[str, bytes]], commit_message: str,
+                     branch: str = "main", prune_prefixes: tuple = ()) -> Dict:
+        """Birden fazla dosyayı Git Data API ile tek commit'te yükler, değişmeyen dosyaları atlar"""
+        repo_url = f"{self.base_url}/repos/{self.username}/{repo_name}"
+        
+        response = self.http.get(f"{repo_url}/git/ref/heads/{branch}", endpoint='get_ref')
+        if response.status_code != 200:
+            raise Exception(f"Failed to get branch {branch}: {response.text}")
+        head_sha = response.json()["object"]["sha"]
+        
+        response = self.http.get(f"{repo_url}/git/commits/{head_sha}", endpoint='get_commit')
+        if response.status_code != 200:
+            raise Exception(f"Failed to get commit {head_sha}: {response.text}")
+        base_tree_sha = response.json()["tree"]["sha"]
+        
+        response = self.http.get(f"{repo_url}/git/trees/{base_tree_sha}", endpoint='get_tree', params={"recursive": "1"})
+        if response.status_code != 200:
+            raise Exception(f"Failed to get tree {base_tree_sha}: {response.text}")
+        existing = {
+            entry["path"]: entry["sha"]
+            for entry in response.json().get("tree", [])
+            if entry.get("type") == "blob"
+        }
+        
+        tree = []
+        file_shas = {}
+        for path, content in files.items():
+            data = content.encode() if isinstance(content, str) else content
+            blob_sha = self.git_blob_sha(data)
+            file_shas[path] = blob_sha
+            if existing.get(path) == blob_sha:
+                continue
+            
+            response = self.http.post(f"{repo_url}/git/blobs", endpoint='create_blob', json={
+                "content": base64.b64encode(data).decode(),
+                "encoding": "base64"
+            })
+            if response.status_code != 201:
+                raise Exception(f"Failed to create blob for {path}: {response.text}")
+            tree.append({"path": path, "mode": "100644", "type": "blob", "sha": response.json()["sha"]})
+        
+        # Artık kullanılmayan hash'li asset'leri sil
+        for path in existing:
+            if path not in files and any(path.startswith(prefix) for prefix in prune_prefixes):
+                tree.append({"path": path, "mode": "100644", "type": "blob", "sha": None})
+        
+        if not tree:
+            return {'commit_sha': head_sha, 'changed': [], 'file_shas': file_shas}
+        
+        response = self.http.post(f"{repo_url}/git/trees", endpoint='create_tree', json={
+            "base_tree": base_tree_sha,
+            "tree": tree
+        })
+        if response.status_code != 201:
+            raise Exception(f"Failed to create tree: {response.text}")
+        new_tree_sha = response.json()["sha"]
+        
+        response = self.http.post(f"{repo_url}/git/commits", endpoint='create_commit', json={
+            "message": commit_message,
+            "tree": new_tree_sha,
+            "parents": [head_sha]
+        })
+        if response.status_code != 201:
+            raise Exception(f"Failed to create commit: {response.text}")
+        commit_sha = response.json()["sha"]
+        
+        response = self.http.patch(f"{repo_url}/git/refs/heads/{branch}", endpoint='update_ref', json={
+            "sha": commit_sha
+        })
+        if response.status_code != 200:
+            raise Exception(f"Failed to update branch {branch}: {response.text}")
+        
+        return {
+            'commit_sha': commit_sha,
+            'changed': [entry["path"] for entry in tree],
+            'file_shas': file_shas
+        }
+
+    @staticmethod
+    def git_blob_sha(data: bytes) -> str:
+        """Git'in blob SHA-1 değerini yerel olarak hesaplar"""
+        return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
@@ -0,0 +1,319 @@
+# deployment/services/http_client.py
+import logging
+import os
+import threading
+import time
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+from django.conf import settings
+from django.core.cache import cache
+
+from .rate_limit import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) saniye
+DEFAULT_TIMEOUT = (5, 30)
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process başına tek, connection pool'lu Session (fork sonrası yeniden oluşturulur)"""
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            pool_size = getattr(settings, 'OUTBOUND_HTTP_POOL_SIZE', 20)
+            retry = Retry(
+                total=3,
+                connect=3,
+                read=2,
+                status=3,
+                backoff_factor=0.5,
+                status_forcelist=(500, 502, 503, 504),
+                # POST idempotent değil (create_repository vb.), 5xx'te tekrar denenmez
+                allowed_methods=frozenset(['GET', 'HEAD', 'PUT', 'PATCH', 'DELETE']),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size, max_retries=retry)
+
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+            _session = session
+            _session_pid = pid
+
+    return _session
+
+
+class OutboundHTTPMetrics:
+    """Servis/endpoint bazında gecikme ve hata istatistikleri"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict] = {}
+
+    def record(self, service: str, endpoint: str, method: str, status_code: int,
+               duration_ms: float, cache_hit: bool = False, attempts: int = 1) -> None:
+        with self._lock:
+            stats = self._stats.setdefault((service, endpoint), {
+                'count': 0,
+                'errors': 0,
+                'cache_hits': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+            })
+            stats['count'] += 1
+            stats['total_ms'] += duration_ms
+            stats['max_ms'] = max(stats['max_ms'], duration_ms)
+            if status_code >= 400 or status_code == 0:
+                stats['errors'] += 1
+            if cache_hit:
+                stats['cache_hits'] += 1
+
+        logger.info(
+            f"🌐 {service}.{endpoint} {method} status={status_code} duration_ms={duration_ms:.1f}"
+            f"{' cache=hit' if cache_hit else ''}{f' attempts={attempts}' if attempts > 1 else ''}",
+            extra={
+                'http_service': service,
+                'http_endpoint': endpoint,
+                'http_method': method,
+                'http_status': status_code,
+                'duration_ms': round(duration_ms, 1),
+                'cache_hit': cache_hit,
+            }
+        )
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                f"{service}.{endpoint}": {
+                    **stats,
+                    'avg_ms': round(stats['total_ms'] / stats['count'], 1) if stats['count'] else 0.0,
+                }
+                for (service, endpoint), stats in self._stats.items()
+            }
+
+
+class ETagStore:
+    """GET cevapları için ETag/Last-Modified ve gövdeyi Django cache'de (prod: Redis) saklar"""
+
+    KEY_PREFIX = "http_etag"
+
+    def __init__(self, timeout: int = None):
+        self.timeout = timeout
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            return cache.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"⚠️ ETag cache read failed: {str(e)}")
+            return None
+
+    def set(self, key: str, entry: Dict) -> None:
+        timeout = self.timeout or getattr(settings, 'OUTBOUND_HTTP_ETAG_TTL', 60 * 60 * 6)
+        try:
+            cache.set(self._key(key), entry, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ ETag cache write failed: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        try:
+            cache.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"⚠️ ETag cache delete failed: {str(e)}")
+
+    def _key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}:{hashlib.sha1(key.encode()).hexdigest()}"
+
+
+_memo: ContextVar[Optional[Dict]] = ContextVar('outbound_http_memo', default=None)
+
+
+@contextmanager
+def request_memo():
+    """Tek bir işlem (ör. bir deploy) boyunca aynı GET cevaplarını process içinde tekrar kullanır"""
+    if _memo.get() is not None:
+        # İç içe kullanımda dıştaki memo geçerli
+        yield
+        return
+
+    token = _memo.set({})
+    try:
+        yield
+    finally:
+        _memo.reset(token)
+
+
+metrics = OutboundHTTPMetrics()
+etag_store = ETagStore()
+
+
+class ApiClient:
+    """GitHub/Vercel için paylaşılan HTTP katmanı: pool, timeout, retry, ETag ve metrik"""
+
+    RATE_LIMIT_STATUSES = (403, 429)
+
+    def __init__(self, service: str, headers: Dict, timeout=DEFAULT_TIMEOUT,
+                 max_rate_limit_retries: int = 2, max_rate_limit_wait: float = 30.0):
+        self.service = service
+        self.headers = headers
+        self.timeout = timeout
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.max_rate_limit_wait = max_rate_limit_wait
+
+    def get(self, url: str, endpoint: str, conditional: bool = False, **kwargs) -> requests.Response:
+        return self.request('GET', url, endpoint, conditional=conditional, **kwargs)
+
+    def post(self, url: str, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, endpoint, **kwargs)
+
+    def put(self, url: str, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, endpoint, **kwargs)
+
+    def patch(self, url: str, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('PATCH', url, endpoint, **kwargs)
+
+    def delete(self, url: str, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, endpoint, **kwargs)
+
+    def request(self, method: str, url: str, endpoint: str, conditional: bool = False,
+                headers: Dict = None, timeout=None, **kwargs) -> requests.Response:
+        """İstek atar; rate-limit (403/429) cevaplarında bekleyip tekrar dener"""
+        request_headers = {**self.headers, **(headers or {})}
+        cache_key = self._cache_key(url, kwargs.get('params')) if conditional and method == 'GET' else None
+        memo = _memo.get()
+
+        if cache_key and memo is not None and cache_key in memo:
+            metrics.record(self.service, endpoint, method, 200, 0.0, cache_hit=True)
+            return self._response_from_cache(memo[cache_key])
+
+        cached = etag_store.get(cache_key) if cache_key else None
+        if cached:
+            if cached.get('etag'):
+                request_headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                request_headers['If-Modified-Since'] = cached['last_modified']
+
+        started = time.monotonic()
+        attempts = 0
+        response = None
+        try:
+            while True:
+                attempts += 1
+                response = get_session().request(
+                    method, url, headers=request_headers, timeout=timeout or self.timeout, **kwargs
+                )
+                rate_limiter.record(response)
+
+                wait = self._rate_limit_wait(response, attempts)
+                if wait is None:
+                    break
+                logger.warning(f"⏳ {self.service}.{endpoint} rate limited, retrying in {wait:.1f}s")
+                time.sleep(wait)
+
+        except requests.RequestException:
+            metrics.record(self.service, endpoint, method, 0, (time.monotonic() - started) * 1000, attempts=attempts)
+            raise
+
+        cache_hit = False
+        if cache_key:
+            entry = None
+            if response.status_code == 304 and cached:
+                entry = cached
+                response = self._response_from_cache(cached, response)
+                cache_hit = True
+            elif response.status_code == 200:
+                entry = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'content': response.content,
+                    'content_type': response.headers.get('Content-Type', 'application/json'),
+                    'url': response.url,
+                }
+                if entry['etag'] or entry['last_modified']:
+                    etag_store.set(cache_key, entry)
+
+            # Sadece başarılı cevaplar memo'lanır (404 sonrası create gibi akışlar bozulmasın)
+            if entry is not None and memo is not None:
+                memo[cache_key] = entry
+
+        if method != 'GET':
+            # Yazma işlemlerinden sonra aynı kaynağın kayıtları geçersizdir
+            resource_key = self._cache_key(url, None)
+            etag_store.delete(resource_key)
+            if memo is not None:
+                memo.pop(resource_key, None)
+
+        metrics.record(
+            self.service, endpoint, method, response.status_code,
+            (time.monotonic() - started) * 1000, cache_hit=cache_hit, attempts=attempts
+        )
+        return response
+
+    def _rate_limit_wait(self, response: requests.Response, attempts: int) -> Optional[float]:
+        """Secondary/primary rate limit cevabında beklenecek süre, tekrar denenmeyecekse None"""
+        if response.status_code not in self.RATE_LIMIT_STATUSES or attempts > self.max_rate_limit_retries:
+            return None
+
+        headers = response.headers
+        retry_after = headers.get('Retry-After')
+        remaining = headers.get('X-RateLimit-Remaining')
+
+        if retry_after is not None:
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                wait = 2 ** attempts
+        elif remaining == '0' and headers.get('X-RateLimit-Reset'):
+            try:
+                wait = float(headers['X-RateLimit-Reset']) - time.time()
+            except ValueError:
+                wait = 2 ** attempts
+        elif response.status_code == 429 or 'rate limit' in response.text.lower():
+            wait = 2 ** attempts
+        else:
+            # Yetki hatası vb. 403 - tekrar denemenin anlamı yok
+            return None
+
+        wait = max(wait, 1.0)
+        if wait > self.max_rate_limit_wait:
+            return None
+        return wait
+
+    def _cache_key(self, url: str, params) -> str:
+        if params:
+            query = '&'.join(f"{k}={v}" for k, v in sorted(dict(params).items()))
+            return f"{self.service}:{url}?{query}"
+        return f"{self.service}:{url}"
+
+    @staticmethod
+    def _response_from_cache(cached: Dict, not_modified: requests.Response = None) -> requests.Response:
+        """Cache kaydından (304 veya memo) 200 cevabı üretir"""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = cached['content']
+        if not_modified is not None:
+            response.headers = CaseInsensitiveDict(not_modified.headers)
+            response.request = not_modified.request
+        response.headers['Content-Type'] = cached['content_type']
+        response.url = cached.get('url', not_modified.url if not_modified is not None else '')
+        response.encoding = 'utf-8'
+        response.from_cache = True
+        return response
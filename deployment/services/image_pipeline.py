@@ -0,0 +1,294 @@
+# deployment/services/image_pipeline.py
+import base64
+import hashlib
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .http_client import ApiClient
+
+try:
+    import pillow_avif  # noqa: F401 - Pillow'a AVIF plugin'ini kaydeder
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+IMG_TAG_RE = re.compile(r'<img\b[^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*>', re.IGNORECASE)
+ATTR_RE = re.compile(r'([\w:@.-]+)\s*=\s*("([^"]*)"|\'([^\']*)\')')
+PROTECTED_BLOCK_RE = re.compile(r'(<(script|style|template|noscript)\b[^>]*>.*?</\2>)', re.IGNORECASE | re.DOTALL)
+
+VARIANT_CACHE_PREFIX = "deploy_image_variants"
+STORAGE_PREFIX = "deploy-images"
+
+
+def _avif_supported() -> bool:
+    try:
+        return bool(features.check('avif'))
+    except Exception:
+        return False
+
+
+class ResponsiveImagePipeline:
+    """Deploy sırasında HTML'deki görselleri genişlik bazlı WebP/AVIF varyantlarına çevirir ve <img> tag'lerini yeniden yazar"""
+
+    def __init__(self, asset_dir: str = "assets/img", widths: Tuple[int, ...] = None, max_workers: int = 4):
+        self.asset_dir = asset_dir
+        self.widths = widths or tuple(getattr(settings, 'DEPLOY_IMAGE_WIDTHS', (480, 768, 1200, 1600)))
+        self.max_workers = max_workers
+        self.max_source_bytes = getattr(settings, 'DEPLOY_IMAGE_MAX_SOURCE_BYTES', 15 * 1024 * 1024)
+        self.formats = ('avif', 'webp') if _avif_supported() else ('webp',)
+        self.http = ApiClient('images', {"User-Agent": "spa-deploy-image-pipeline"}, timeout=(5, 20))
+
+    def process(self, html: str, files: Dict) -> str:
+        """HTML'deki <img> tag'lerini işler, üretilen varyantları files'a ekler"""
+        parts = PROTECTED_BLOCK_RE.split(html)
+        text_indexes = range(0, len(parts), 3)
+
+        sources = []
+        for index in text_indexes:
+            for tag in IMG_TAG_RE.findall(parts[index]):
+                src = self._attrs(tag).get('src', '')
+                if self._is_processable(tag, src) and src not in sources:
+                    sources.append(src)
+
+        if not sources:
+            return html
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(sources)), thread_name_prefix='deploy-img') as pool:
+            manifests = dict(zip(sources, pool.map(self._safe_variants, sources)))
+
+        state = {'first_image': True}
+        for index in text_indexes:
+            parts[index] = IMG_TAG_RE.sub(lambda m: self._rewrite_tag(m.group(0), manifests, files, state), parts[index])
+
+        output = []
+        for index in text_indexes:
+            output.append(parts[index])
+            if index + 1 < len(parts):
+                output.append(parts[index + 1])
+
+        processed = sum(1 for manifest in manifests.values() if manifest)
+        logger.info(f"✅ Responsive images: {processed}/{len(sources)} sources processed")
+        return ''.join(output)
+
+    def _is_processable(self, tag: str, src: str) -> bool:
+        if not src or 'srcset' in tag.lower():
+            return False
+        if src.startswith('data:') or '{' in src:
+            return False
+        path = urlparse(src).path.lower()
+        if path.endswith('.svg') or path.endswith('.gif'):
+            return False
+        return src.startswith('http://') or src.startswith('https://')
+
+    @staticmethod
+    def _attrs(tag: str) -> Dict[str, str]:
+        return {
+            match.group(1).lower(): match.group(3) if match.group(3) is not None else match.group(4)
+            for match in ATTR_RE.finditer(tag)
+        }
+
+    def _safe_variants(self, src: str) -> Optional[Dict]:
+        try:
+            return self._get_variants(src)
+        except Exception as e:
+            logger.warning(f"⚠️ Image variant generation failed for {src}: {str(e)}")
+            return None
+
+    def _get_variants(self, src: str) -> Optional[Dict]:
+        """Varyantları source hash'e göre cache'den okur, yoksa üretir; bytes ile birlikte döner"""
+        url_key = f"{VARIANT_CACHE_PREFIX}:{hashlib.sha1(src.encode()).hexdigest()}"
+        manifest = cache.get(url_key)
+        if manifest:
+            loaded = self._load_variant_bytes(manifest)
+            if loaded:
+                return loaded
+
+        source_bytes = self._download(src)
+        if source_bytes is None:
+            return None
+
+        source_hash = hashlib.sha256(source_bytes).hexdigest()
+        manifest_path = f"{STORAGE_PREFIX}/{source_hash}/manifest.json"
+
+        manifest = None
+        if default_storage.exists(manifest_path):
+            with default_storage.open(manifest_path, 'rb') as f:
+                manifest = json.loads(f.read())
+            loaded = self._load_variant_bytes(manifest)
+            if loaded:
+                cache.set(url_key, manifest, timeout=getattr(settings, 'DEPLOY_IMAGE_CACHE_TTL', 60 * 60 * 24 * 30))
+                return loaded
+
+        manifest, variant_bytes = self._encode_variants(source_bytes, source_hash)
+        for variant in manifest['variants']:
+            default_storage.save(variant['storage_path'], ContentFile(variant_bytes[variant['storage_path']]))
+        default_storage.save(manifest_path, ContentFile(json.dumps(manifest).encode()))
+
+        cache.set(url_key, manifest, timeout=getattr(settings, 'DEPLOY_IMAGE_CACHE_TTL', 60 * 60 * 24 * 30))
+        return {**manifest, 'bytes': variant_bytes}
+
+    def _load_variant_bytes(self, manifest: Dict) -> Optional[Dict]:
+        variant_bytes = {}
+        try:
+            for variant in manifest['variants']:
+                with default_storage.open(variant['storage_path'], 'rb') as f:
+                    variant_bytes[variant['storage_path']] = f.read()
+        except Exception:
+            return None
+        return {**manifest, 'bytes': variant_bytes}
+
+    def _download(self, src: str) -> Optional[bytes]:
+        response = self.http.get(self._source_url(src), endpoint='download_source', stream=True)
+        if response.status_code != 200:
+            logger.warning(f"⚠️ Image download failed ({response.status_code}): {src}")
+            return None
+
+        content_length = int(response.headers.get('Content-Length') or 0)
+        if content_length > self.max_source_bytes:
+            return None
+
+        chunks, size = [], 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > self.max_source_bytes:
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def _source_url(self, src: str) -> str:
+        """Unsplash gibi CDN'lerde sabit w/h parametrelerini en büyük varyant genişliğine ölçekler"""
+        parsed = urlparse(src)
+        if parsed.hostname != 'images.unsplash.com':
+            return src
+
+        params = dict(parse_qsl(parsed.query))
+        try:
+            width = int(params.get('w', 0))
+            height = int(params.get('h', 0))
+        except ValueError:
+            return src
+
+        target = max(self.widths)
+        if width and width < target:
+            params['w'] = str(target)
+            if height:
+                params['h'] = str(round(height * target / width))
+        params['q'] = '85'
+        params['fm'] = 'jpg'
+        return urlunparse(parsed._replace(query=urlencode(params)))
+
+    def _encode_variants(self, source_bytes: bytes, source_hash: str) -> Tuple[Dict, Dict[str, bytes]]:
+        with Image.open(BytesIO(source_bytes)) as img:
+            img = ImageOps.exif_transpose(img)
+            has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+            width, height = img.size
+
+            widths = [w for w in self.widths if w < width] + [min(width, max(self.widths))]
+            variants, variant_bytes = [], {}
+            for target_width in sorted(set(widths)):
+                target_height = max(1, round(height * target_width / width))
+                resized = img if target_width == width else img.resize((target_width, target_height), Image.LANCZOS)
+                for image_format in self.formats:
+                    buffer = BytesIO()
+                    if image_format == 'avif':
+                        resized.save(buffer, 'AVIF', quality=55)
+                    else:
+                        resized.save(buffer, 'WEBP', quality=78, method=4)
+                    storage_path = f"{STORAGE_PREFIX}/{source_hash}/{target_width}.{image_format}"
+                    variant_bytes[storage_path] = buffer.getvalue()
+                    variants.append({
+                        'width': target_width,
+                        'height': target_height,
+                        'format': image_format,
+                        'storage_path': storage_path,
+                        'bytes': len(buffer.getvalue()),
+                    })
+
+            placeholder = None
+            if not has_alpha:
+                tiny = img.resize((16, max(1, round(height * 16 / width))), Image.BILINEAR)
+                buffer = BytesIO()
+                tiny.save(buffer, 'WEBP', quality=30)
+                placeholder = f"data:image/webp;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+        manifest = {
+            'source_hash': source_hash,
+            'width': width,
+            'height': height,
+            'placeholder': placeholder,
+            'variants': variants,
+        }
+        return manifest, variant_bytes
+
+    def _rewrite_tag(self, tag: str, manifests: Dict, files: Dict, state: Dict) -> str:
+        attrs = self._attrs(tag)
+        manifest = manifests.get(attrs.get('src', ''))
+        if not manifest:
+            return tag
+
+        short_hash = manifest['source_hash'][:12]
+        srcsets: Dict[str, List[str]] = {}
+        fallback = None
+        for variant in manifest['variants']:
+            path = f"{self.asset_dir}/{short_hash}-{variant['width']}.{variant['format']}"
+            files[path] = manifest['bytes'][variant['storage_path']]
+            srcsets.setdefault(variant['format'], []).append(f"/{path} {variant['width']}w")
+            if variant['format'] == 'webp' and (fallback is None or variant['width'] <= 1200):
+                fallback = f"/{path}"
+
+        sizes = attrs.get('sizes', '100vw')
+        extra = {
+            'src': fallback,
+            'srcset': ', '.join(srcsets['webp']),
+            'sizes': sizes,
+            'decoding': 'async',
+        }
+        if 'width' not in attrs and 'height' not in attrs:
+            extra['width'] = str(manifest['width'])
+            extra['height'] = str(manifest['height'])
+
+        # İlk görsel genellikle hero/LCP: lazy yüklenmez, öncelik verilir
+        if state['first_image']:
+            state['first_image'] = False
+            extra.setdefault('fetchpriority', 'high')
+        elif 'loading' not in attrs:
+            extra['loading'] = 'lazy'
+
+        if manifest.get('placeholder'):
+            style = attrs.get('style', '').strip().rstrip(';')
+            placeholder_style = f"background-image:url({manifest['placeholder']});background-size:cover;background-position:center"
+            extra['style'] = f"{style};{placeholder_style}" if style else placeholder_style
+
+        new_tag = tag
+        for name, value in extra.items():
+            new_tag = self._set_attr(new_tag, name, value)
+
+        if 'avif' in srcsets:
+            return (
+                f'<picture style="display:contents">'
+                f'<source type="image/avif" srcset="{", ".join(srcsets["avif"])}" sizes="{sizes}">'
+                f'{new_tag}</picture>'
+            )
+        return new_tag
+
+    @staticmethod
+    def _set_attr(tag: str, name: str, value: str) -> str:
+        pattern = re.compile(r'(\s)' + re.escape(name) + r'\s*=\s*("[^"]*"|\'[^\']*\')', re.IGNORECASE)
+        replacement = f'{name}="{value}"'
+        if pattern.search(tag):
+            return pattern.sub(lambda m: m.group(1) + replacement, tag, count=1)
+        closing = '/>' if tag.endswith('/>') else '>'
+        return f"{tag[:-len(closing)].rstrip()} {replacement}{closing}"
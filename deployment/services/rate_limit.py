@@ -0,0 +1,96 @@
+# deployment/services/rate_limit.py
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Rate-limit penceresi izin verilen bekleme süresinden uzun"""
+
+    def __init__(self, host: str, wait_seconds: float):
+        self.host = host
+        self.wait_seconds = wait_seconds
+        super().__init__(f"Rate limit exhausted for {host}, retry in {int(wait_seconds)}s")
+
+
+class RateLimitTracker:
+    """GitHub/Vercel rate-limit header'larını host bazında takip eder (thread-safe)"""
+
+    def __init__(self, min_remaining: int = 5, max_wait: float = 30.0):
+        self.min_remaining = min_remaining
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict] = {}
+
+    def record(self, response) -> None:
+        """Response header'larından kalan kota ve reset zamanını kaydeder"""
+        host = urlparse(response.url).hostname or ''
+        headers = response.headers
+        now = time.time()
+
+        remaining = self._to_int(headers.get('X-RateLimit-Remaining'))
+        reset_at = self._to_int(headers.get('X-RateLimit-Reset'))
+        retry_after = self._to_int(headers.get('Retry-After'))
+
+        if remaining is None and retry_after is None:
+            return
+
+        with self._lock:
+            state = self._state.setdefault(host, {})
+            if remaining is not None:
+                state['remaining'] = remaining
+                state['reset_at'] = reset_at or now + 60
+            if retry_after is not None:
+                state['blocked_until'] = now + retry_after
+            elif response.status_code == 429 and reset_at:
+                state['blocked_until'] = reset_at
+
+        if remaining is not None and remaining <= self.min_remaining:
+            logger.warning(f"⚠️ Rate limit low for {host}: remaining={remaining}")
+
+    def wait_seconds(self, host: str) -> float:
+        """Bir sonraki istek öncesi beklenmesi gereken süre"""
+        now = time.time()
+        with self._lock:
+            state = self._state.get(host)
+            if not state:
+                return 0.0
+
+            blocked_until = state.get('blocked_until', 0)
+            if blocked_until > now:
+                return blocked_until - now
+
+            remaining = state.get('remaining')
+            reset_at = state.get('reset_at', 0)
+            if remaining is not None and remaining <= self.min_remaining and reset_at > now:
+                return reset_at - now
+        return 0.0
+
+    def acquire(self, host: str) -> None:
+        """Gerekirse reset zamanına kadar bekler, çok uzunsa RateLimitExceeded fırlatır"""
+        wait = self.wait_seconds(host)
+        if wait <= 0:
+            return
+        if wait > self.max_wait:
+            raise RateLimitExceeded(host, wait)
+
+        logger.info(f"⏳ Rate limit backoff for {host}: {wait:.1f}s")
+        time.sleep(wait)
+
+    @staticmethod
+    def _to_int(value) -> Optional[int]:
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+
+GITHUB_API_HOST = 'api.github.com'
+VERCEL_API_HOST = 'api.vercel.com'
+
+# Process genelinde paylaşılan tracker
+rate_limiter = RateLimitTracker()
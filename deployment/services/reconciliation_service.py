@@ -0,0 +1,266 @@
+# deployment/services/reconciliation_service.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from deployment.models import VercelDeployment
+from .github_service import GitHubService
+from .vercel_service import VercelService
+from .rate_limit import rate_limiter, RateLimitExceeded, GITHUB_API_HOST, VERCEL_API_HOST
+
+logger = logging.getLogger(__name__)
+
+EXISTENCE_CACHE_PREFIX = "deployment_exists"
+RECONCILE_STATE_PREFIX = "deployment_reconcile"
+RECONCILE_LOCK_PREFIX = "deployment_reconcile_lock"
+
+
+def _state_key(user_id: Optional[int]) -> str:
+    return f"{RECONCILE_STATE_PREFIX}:{user_id or 'all'}"
+
+
+def _lock_key(user_id: Optional[int]) -> str:
+    return f"{RECONCILE_LOCK_PREFIX}:{user_id or 'all'}"
+
+
+def get_reconciliation_state(user_id: Optional[int]) -> Dict:
+    """Son reconciliation çalışmasının durumunu cache'den okur"""
+    return cache.get(_state_key(user_id)) or {'status': 'idle'}
+
+
+def set_reconciliation_state(user_id: Optional[int], state: Dict) -> None:
+    cache.set(_state_key(user_id), state, timeout=getattr(settings, 'DEPLOYMENT_RECONCILE_STATE_TTL', 3600))
+
+
+def enqueue_reconciliation(user_id: Optional[int]) -> bool:
+    """Arka planda reconciliation başlatır; çalışan veya yeni bitmiş bir iş varsa tekrar kuyruklamaz"""
+    from deployment.tasks import reconcile_deployments_task
+
+    state = get_reconciliation_state(user_id)
+    min_interval = getattr(settings, 'DEPLOYMENT_RECONCILE_MIN_INTERVAL', 30)
+    finished_at = state.get('finished_at_ts')
+    if finished_at and timezone.now().timestamp() - finished_at < min_interval:
+        return False
+
+    # cache.add atomik: aynı kullanıcı için tek bir iş kuyrukta/çalışıyor olabilir
+    if not cache.add(_lock_key(user_id), True, timeout=getattr(settings, 'DEPLOYMENT_RECONCILE_LOCK_TTL', 300)):
+        return False
+
+    try:
+        reconcile_deployments_task.delay(user_id=user_id)
+    except Exception:
+        cache.delete(_lock_key(user_id))
+        raise
+
+    set_reconciliation_state(user_id, {**state, 'status': 'queued', 'queued_at': timezone.now().isoformat()})
+    return True
+
+
+def release_reconciliation_lock(user_id: Optional[int]) -> None:
+    cache.delete(_lock_key(user_id))
+
+
+class DeploymentReconciler:
+    """Deployment kayıtlarını Vercel/GitHub ile eşzamanlı ve rate-limit'e duyarlı şekilde senkronize eder"""
+
+    def __init__(self, max_workers: int = None):
+        self.github = GitHubService()
+        self.vercel = VercelService()
+        self.max_workers = max_workers or getattr(settings, 'DEPLOYMENT_RECONCILE_MAX_WORKERS', 6)
+        self.existence_ttl = getattr(settings, 'DEPLOYMENT_EXISTENCE_CACHE_TTL', 60)
+
+    def reconcile(self, user_id: int = None, cleanup: bool = True, refresh_status: bool = True) -> Dict:
+        """Tüm deployment'ları kontrol eder: geçersizleri temizler, status'ları günceller"""
+        deployments = self._get_deployments(user_id)
+        probes = self._probe_all(deployments, refresh_status=refresh_status)
+
+        results = {
+            'total_checked': len(deployments),
+            'invalid_found': 0,
+            'cleaned_up': 0,
+            'status_updated': 0,
+            'skipped': 0,
+            'errors': [],
+            'details': []
+        }
+
+        # DB yazımları ana thread'de yapılır, worker thread'ler sadece HTTP çağrısı yapar
+        for deployment, probe in zip(deployments, probes):
+            try:
+                if probe.get('error'):
+                    results['skipped'] += 1
+                    results['errors'].append(f"Error checking deployment {deployment.id}: {probe['error']}")
+                    continue
+
+                if probe['vercel_exists'] is False:
+                    results['invalid_found'] += 1
+                    if cleanup:
+                        results['details'].append(self._cleanup(deployment, probe['github_exists']))
+                        results['cleaned_up'] += 1
+                    continue
+
+                if refresh_status and self._apply_status(deployment, probe):
+                    results['status_updated'] += 1
+
+            except Exception as e:
+                error_msg = f"Error reconciling deployment {deployment.id}: {str(e)}"
+                results['errors'].append(error_msg)
+                logger.error(f"❌ {error_msg}")
+
+        logger.info(
+            f"🧹 Reconciliation completed: {results['cleaned_up']} cleaned, "
+            f"{results['status_updated']} updated, {results['skipped']} skipped / {results['total_checked']}"
+        )
+        return results
+
+    def find_orphaned(self, user_id: int = None) -> List[Dict]:
+        """Vercel'de bulunmayan deployment kayıtlarını listeler (silmeden)"""
+        deployments = self._get_deployments(user_id)
+        probes = self._probe_all(deployments, refresh_status=False)
+
+        orphaned = []
+        for deployment, probe in zip(deployments, probes):
+            if probe.get('vercel_exists') is not False:
+                continue
+            orphaned.append({
+                'deployment_id': deployment.id,
+                'website_id': deployment.website.id,
+                'website_title': deployment.website.title,
+                'project_id': deployment.project_id,
+                'deployment_url': deployment.deployment_url,
+                'github_repo': deployment.github_repo.repo_name if deployment.github_repo else None,
+                'vercel_exists': False,
+                'github_exists': probe.get('github_exists'),
+                'created_at': deployment.created_at,
+                'status': deployment.status
+            })
+        return orphaned
+
+    def _get_deployments(self, user_id: int = None) -> List[VercelDeployment]:
+        deployments = VercelDeployment.objects.select_related('website', 'github_repo')
+        if user_id:
+            deployments = deployments.filter(website__user_id=user_id)
+        return list(deployments)
+
+    def _probe_all(self, deployments: List[VercelDeployment], refresh_status: bool) -> List[Dict]:
+        if not deployments:
+            return []
+
+        workers = max(1, min(self.max_workers, len(deployments)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='deploy-reconcile') as pool:
+            return list(pool.map(lambda d: self._probe(d, refresh_status), deployments))
+
+    def _probe(self, deployment: VercelDeployment, refresh_status: bool) -> Dict:
+        """Tek deployment için gerekli API çağrılarını yapar (DB'ye dokunmaz)"""
+        probe = {'vercel_exists': None, 'github_exists': None}
+        try:
+            probe['vercel_exists'] = self.vercel_project_exists(deployment.project_id)
+            if probe['vercel_exists'] is None:
+                probe['error'] = 'Vercel project existence could not be determined'
+                return probe
+
+            if probe['vercel_exists'] is False:
+                if deployment.github_repo:
+                    probe['github_exists'] = self.github_repo_exists(deployment.github_repo.repo_name)
+                return probe
+
+            if refresh_status:
+                rate_limiter.acquire(VERCEL_API_HOST)
+                if deployment.deployment_id:
+                    probe['status_data'] = self.vercel.get_deployment_status(deployment.deployment_id)
+                else:
+                    deployments_data = self.vercel.get_project_deployments(deployment.project_id)
+                    latest = deployments_data.get('deployments') or []
+                    probe['latest_deployment'] = latest[0] if latest else None
+
+        except RateLimitExceeded as e:
+            probe['error'] = str(e)
+        except Exception as e:
+            probe['error'] = str(e)
+        return probe
+
+    def vercel_project_exists(self, project_id: str) -> Optional[bool]:
+        """Vercel proje varlığı, kısa TTL ile cache'lenir"""
+        cache_key = f"{EXISTENCE_CACHE_PREFIX}:vercel:{project_id}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        rate_limiter.acquire(VERCEL_API_HOST)
+        exists = self.vercel.project_exists(project_id)
+        if exists is not None:
+            cache.set(cache_key, exists, timeout=self.existence_ttl)
+        return exists
+
+    def github_repo_exists(self, repo_name: str) -> Optional[bool]:
+        """GitHub repo varlığı, kısa TTL ile cache'lenir"""
+        cache_key = f"{EXISTENCE_CACHE_PREFIX}:github:{repo_name}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        rate_limiter.acquire(GITHUB_API_HOST)
+        exists = self.github.repository_exists(repo_name)
+        if exists is not None:
+            cache.set(cache_key, exists, timeout=self.existence_ttl)
+        return exists
+
+    def _cleanup(self, deployment: VercelDeployment, github_exists: Optional[bool]) -> Dict:
+        deployment_info = {
+            'deployment_id': deployment.id,
+            'website_id': deployment.website.id,
+            'website_title': deployment.website.title,
+            'project_id': deployment.project_id,
+            'github_repo': deployment.github_repo.repo_name if deployment.github_repo else None,
+            'vercel_exists': False,
+            'github_exists': github_exists
+        }
+
+        # GitHub repo kaydını sadece GitHub'da kesin olarak yoksa sil
+        if deployment.github_repo and github_exists is False:
+            deployment.github_repo.delete()
+            deployment_info['github_repo_deleted'] = True
+
+        deployment.delete()
+        logger.info(f"✅ Cleaned up invalid deployment: {deployment_info['deployment_id']}")
+        return deployment_info
+
+    def _apply_status(self, deployment: VercelDeployment, probe: Dict) -> bool:
+        """Probe sonucunu deployment kaydına yazar, değişiklik varsa True döner"""
+        from .deployment_service import DeploymentService
+
+        mapper = DeploymentService()._map_vercel_status_to_model
+        update_fields = []
+
+        status_data = probe.get('status_data')
+        latest = probe.get('latest_deployment')
+
+        if status_data:
+            mapped_status = mapper(status_data.get('readyState', 'BUILDING'))
+            if deployment.status != mapped_status:
+                deployment.status = mapped_status
+                update_fields.append('status')
+            if status_data.get('buildLog') and deployment.build_logs != status_data['buildLog']:
+                deployment.build_logs = status_data['buildLog']
+                update_fields.append('build_logs')
+            if mapped_status == 'error' and status_data.get('errorMessage'):
+                deployment.error_message = status_data['errorMessage']
+                update_fields.append('error_message')
+        elif latest:
+            deployment.deployment_id = latest['uid']
+            deployment.deployment_url = f"https://{latest['url']}"
+            deployment.status = mapper(latest.get('readyState', 'BUILDING'))
+            update_fields.extend(['deployment_id', 'deployment_url', 'status'])
+        elif not deployment.deployment_id and deployment.status != 'pending':
+            deployment.status = 'pending'
+            update_fields.append('status')
+
+        if not update_fields:
+            return False
+
+        deployment.save(update_fields=update_fields + ['updated_at'])
+        return True
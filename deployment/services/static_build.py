@@ -0,0 +1,327 @@
+# deployment/services/static_build.py
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, Optional, Set, Union
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ArtifactContent = Union[str, bytes]
+
+TAILWIND_CDN_RE = re.compile(r'<script[^>]*src=["\']https://cdn\.tailwindcss\.com[^"\']*["\'][^>]*>\s*</script>\s*', re.IGNORECASE)
+TAILWIND_CONFIG_RE = re.compile(r'<script[^>]*>\s*tailwind\.config\s*=\s*(\{.*?\})\s*;?\s*</script>\s*', re.IGNORECASE | re.DOTALL)
+CLASS_ATTR_RE = re.compile(r'\bclass\s*=\s*(["\'])(.*?)\1', re.IGNORECASE | re.DOTALL)
+CLASS_LIST_RE = re.compile(r'classList\.(?:add|remove|toggle|replace)\(([^)]*)\)')
+JS_STRING_RE = re.compile(r'(["\'`])([\w:/\[\]\.#%-]+(?:\s+[\w:/\[\]\.#%-]+)*)\1')
+
+STYLE_BLOCK_RE = re.compile(r'<style(?P<attrs>[^>]*)>(?P<body>.*?)</style>', re.IGNORECASE | re.DOTALL)
+SCRIPT_BLOCK_RE = re.compile(r'<script(?P<attrs>[^>]*)>(?P<body>.*?)</script>', re.IGNORECASE | re.DOTALL)
+PROTECTED_BLOCK_RE = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>.*?</\2>)', re.IGNORECASE | re.DOTALL)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if|<!|>).*?-->', re.DOTALL)
+# Tırnak içindeki '>' karakterlerini (x-init="a > b" gibi) tag sonu saymaz
+HTML_TAG_RE = re.compile(r'(<[a-zA-Z/!][^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*>)')
+
+# Küçük inline blokları ayrı dosyaya çıkarmak ekstra istekten daha pahalı
+MIN_EXTRACT_BYTES = 1024
+
+IMMUTABLE_CACHE_HEADER = "public, max-age=31536000, immutable"
+
+
+def content_hash(content: ArtifactContent, length: int = 10) -> str:
+    data = content.encode() if isinstance(content, str) else content
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def extract_utility_classes(html: str) -> Set[str]:
+    """HTML class attribute'ları ve classList çağrılarındaki utility class'ları toplar"""
+    classes = set()
+    for match in CLASS_ATTR_RE.finditer(html):
+        value = match.group(2)
+        # Alpine/Vue binding'leri gibi dinamik değerleri atla
+        if '{' in value or '$' in value:
+            continue
+        classes.update(value.split())
+
+    for match in CLASS_LIST_RE.finditer(html):
+        for string_match in JS_STRING_RE.finditer(match.group(1)):
+            classes.update(string_match.group(2).split())
+
+    return classes
+
+
+def minify_css(css: str) -> str:
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+# '/' bu karakter/kelimelerden sonra geliyorsa regex literal başlangıcıdır, değilse bölme
+JS_REGEX_PREFIX_CHARS = frozenset('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_PREFIX_WORDS = frozenset((
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'yield', 'await', 'delete', 'throw', 'new', 'instanceof',
+))
+JS_IDENTIFIER_RE = re.compile(r'[A-Za-z0-9_$]+')
+
+
+def _scan_js_line(line: str, state: Dict) -> bool:
+    """
+    Satırı tarayıp bağlamı (kod / string / template literal / regex / blok yorum) günceller.
+    Satır sonunda kapanmamış tek satırlık string veya regex kalırsa (tarama hatası) False döner.
+    """
+    mode = state['mode']
+    braces = state['braces']
+    position = 0
+    length = len(line)
+    while position < length:
+        char = line[position]
+        if mode == 'code':
+            if char in '"\'':
+                mode = char
+            elif char == '`':
+                mode = '`'
+            elif char == '/':
+                following = line[position + 1:position + 2]
+                if following == '/':
+                    break
+                if following == '*':
+                    mode = '/*'
+                    position += 1
+                elif not state['last'] or state['last'] in JS_REGEX_PREFIX_CHARS or state['last'] in JS_REGEX_PREFIX_WORDS:
+                    mode = 'regex'
+                    state['regex_class'] = False
+                else:
+                    state['last'] = char
+            elif char == '{':
+                if braces:
+                    braces[-1] += 1
+                state['last'] = char
+            elif char == '}':
+                if braces and braces[-1] == 0:
+                    # ${ ... } kapandı, template literal'e dönülür
+                    braces.pop()
+                    mode = '`'
+                else:
+                    if braces:
+                        braces[-1] -= 1
+                    state['last'] = char
+            elif not char.isspace():
+                match = JS_IDENTIFIER_RE.match(line, position)
+                if match:
+                    state['last'] = match.group(0)
+                    position = match.end()
+                    continue
+                state['last'] = char
+        elif mode == '/*':
+            if line.startswith('*/', position):
+                mode = 'code'
+                position += 1
+        elif mode == 'regex':
+            if char == '\\':
+                position += 1
+            elif char == '[':
+                state['regex_class'] = True
+            elif char == ']':
+                state['regex_class'] = False
+            elif char == '/' and not state['regex_class']:
+                mode = 'code'
+                state['last'] = 'regex'
+        elif char == '\\':
+            position += 1
+        elif char == mode:
+            mode = 'code'
+            state['last'] = char
+        elif mode == '`' and line.startswith('${', position):
+            braces.append(0)
+            mode = 'code'
+            state['last'] = '{'
+            position += 1
+        position += 1
+
+    state['mode'] = mode
+    if mode == 'regex' or (mode in ('"', "'") and not line.endswith('\\')):
+        return False
+    return True
+
+
+def minify_js(js: str) -> str:
+    """
+    Güvenli (konservatif) JS küçültme: yorum satırları, boş satırlar ve girinti.
+    Sadece kod bağlamında başlayan satırlara dokunulur; string / template literal / blok yorum
+    içindeki satırlar aynen kalır. Tarama tutarsız biterse script küçültülmeden döner.
+    """
+    state = {'mode': 'code', 'braces': [], 'last': '', 'regex_class': False}
+    lines = []
+    for line in js.splitlines():
+        if state['mode'] != 'code':
+            if not _scan_js_line(line, state):
+                return js
+            lines.append(line)
+            continue
+
+        stripped = line.lstrip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        if not _scan_js_line(stripped, state):
+            return js
+        lines.append(stripped.rstrip() if state['mode'] == 'code' else stripped)
+
+    if state['mode'] != 'code' or state['braces']:
+        return js
+    return '\n'.join(lines)
+
+
+def minify_html(html: str) -> str:
+    """pre/textarea/script/style blokları korunarak yorum ve boşlukları sıkıştırır"""
+    parts = PROTECTED_BLOCK_RE.split(html)
+    output = []
+    # split() grup yakaladığı için: [metin, blok, tag, metin, blok, tag, ...]
+    for index in range(0, len(parts), 3):
+        text = HTML_COMMENT_RE.sub('', parts[index])
+        # Sadece tag'ler arasındaki metin sıkıştırılır; attribute değerleri (Alpine x-init vb.) korunur
+        for position, chunk in enumerate(HTML_TAG_RE.split(text)):
+            output.append(chunk if position % 2 else re.sub(r'\s+', ' ', chunk))
+        if index + 1 < len(parts):
+            output.append(parts[index + 1])
+    return ''.join(output).strip()
+
+
+class StaticSiteBuilder:
+    """Üretilen tek sayfalık HTML'i deploy için statik, küçültülmüş çok dosyalı artefakta çevirir"""
+
+    def __init__(self, tailwind_cli: Optional[str] = None, asset_dir: str = "assets", image_pipeline=None):
+        self.tailwind_cli = tailwind_cli or getattr(settings, 'TAILWIND_CLI_PATH', None) or shutil.which('tailwindcss')
+        self.asset_dir = asset_dir
+        self.image_pipeline = image_pipeline
+
+    def build(self, html: str) -> Dict[str, ArtifactContent]:
+        """index.html + hash'li asset dosyaları + vercel.json döner"""
+        files: Dict[str, ArtifactContent] = {}
+
+        html = self._compile_tailwind(html, files)
+        if self.image_pipeline is not None:
+            html = self.image_pipeline.process(html, files)
+        html = self._extract_styles(html, files)
+        html = self._extract_scripts(html, files)
+        html = minify_html(html)
+
+        files["index.html"] = html
+        files["vercel.json"] = json.dumps({
+            "headers": [
+                {
+                    "source": f"/{self.asset_dir}/(.*)",
+                    "headers": [{"key": "Cache-Control", "value": IMMUTABLE_CACHE_HEADER}]
+                }
+            ]
+        }, indent=2)
+
+        logger.info(f"✅ Static build completed: {len(files)} files, index.html {len(html)} bytes")
+        return files
+
+    def _asset_path(self, name: str, extension: str, content: ArtifactContent) -> str:
+        return f"{self.asset_dir}/{name}.{content_hash(content)}.{extension}"
+
+    def _compile_tailwind(self, html: str, files: Dict[str, ArtifactContent]) -> str:
+        """Tailwind CDN JIT yerine sadece kullanılan class'ları içeren statik CSS üretir"""
+        if not TAILWIND_CDN_RE.search(html):
+            return html
+
+        if not self.tailwind_cli:
+            logger.warning("⚠️ Tailwind CLI not configured, keeping CDN runtime")
+            return html
+
+        config_match = TAILWIND_CONFIG_RE.search(html)
+        user_config = config_match.group(1) if config_match else "{}"
+        safelist = sorted(extract_utility_classes(html))
+
+        try:
+            with tempfile.TemporaryDirectory(prefix="tw-build-") as build_dir:
+                with open(os.path.join(build_dir, "index.html"), "w", encoding="utf-8") as f:
+                    f.write(html)
+                with open(os.path.join(build_dir, "input.css"), "w", encoding="utf-8") as f:
+                    f.write("@tailwind base;\n@tailwind components;\n@tailwind utilities;\n")
+                with open(os.path.join(build_dir, "tailwind.config.js"), "w", encoding="utf-8") as f:
+                    f.write(
+                        f"const userConfig = {user_config};\n"
+                        f"module.exports = Object.assign({{}}, userConfig, {{\n"
+                        f"  content: ['./index.html'],\n"
+                        f"  safelist: {json.dumps(safelist)},\n"
+                        f"}});\n"
+                    )
+
+                subprocess.run(
+                    [self.tailwind_cli, "-c", "tailwind.config.js", "-i", "input.css", "-o", "output.css", "--minify"],
+                    cwd=build_dir,
+                    check=True,
+                    capture_output=True,
+                    timeout=getattr(settings, 'TAILWIND_BUILD_TIMEOUT', 60),
+                )
+
+                with open(os.path.join(build_dir, "output.css"), "r", encoding="utf-8") as f:
+                    compiled_css = f.read()
+
+        except (OSError, subprocess.SubprocessError) as e:
+            stderr = getattr(e, 'stderr', b'') or b''
+            logger.warning(f"⚠️ Tailwind build failed, keeping CDN runtime: {str(e)} {stderr[:500]!r}")
+            return html
+
+        path = self._asset_path("tailwind", "css", compiled_css)
+        files[path] = compiled_css
+        logger.info(f"✅ Tailwind compiled: {len(safelist)} classes, {len(compiled_css)} bytes")
+
+        link_tag = f'<link rel="stylesheet" href="/{path}">\n'
+        html = TAILWIND_CDN_RE.sub(lambda m: link_tag, html, count=1)
+        if config_match:
+            html = TAILWIND_CONFIG_RE.sub('', html, count=1)
+        return html
+
+    def _extract_styles(self, html: str, files: Dict[str, ArtifactContent]) -> str:
+        """Büyük inline <style> bloklarını küçültüp hash'li CSS dosyalarına taşır"""
+        def replace(match):
+            attrs = match.group('attrs')
+            css = minify_css(match.group('body'))
+            # media vb. anlamlı attribute'lu bloklar yerinde kalır
+            if re.sub(r'\s*data-[\w-]+(=(["\']).*?\2)?', '', attrs).strip() or len(css) < MIN_EXTRACT_BYTES:
+                return f'<style{attrs}>{css}</style>'
+
+            path = self._asset_path("styles", "css", css)
+            files[path] = css
+            return f'<link rel="stylesheet" href="/{path}"{attrs}>'
+
+        return STYLE_BLOCK_RE.sub(replace, html)
+
+    def _extract_scripts(self, html: str, files: Dict[str, ArtifactContent]) -> str:
+        """Büyük klasik inline script'leri küçültüp hash'li JS dosyalarına taşır (sıra korunur)"""
+        def replace(match):
+            attrs = match.group('attrs')
+            body = match.group('body')
+            lowered_attrs = attrs.lower()
+            if 'src=' in lowered_attrs or not body.strip():
+                return match.group(0)
+            if 'defer' in lowered_attrs or 'async' in lowered_attrs:
+                # Inline script'te defer/async etkisizdir; dışarı alınırsa çalışma sırası değişir
+                return match.group(0)
+
+            type_match = re.search(r'type\s*=\s*["\']([^"\']+)["\']', attrs, re.IGNORECASE)
+            if type_match and type_match.group(1).lower() not in ('text/javascript', 'application/javascript'):
+                # JSON-LD, module vb. dokunulmaz
+                return match.group(0)
+
+            js = minify_js(body)
+            if len(js) < MIN_EXTRACT_BYTES:
+                return f'<script{attrs}>{js}</script>'
+
+            path = self._asset_path("app", "js", js)
+            files[path] = js
+            return f'<script{attrs} src="/{path}"></script>'
+
+        return SCRIPT_BLOCK_RE.sub(replace, html)
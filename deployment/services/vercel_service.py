@@ -1,7 +1,7 @@
-import requests
 import json
 from django.conf import settings
 from typing import Dict, Optional
+from .http_client import ApiClient
 
 
 class VercelService:
@@ -14,6 +14,7 @@ class VercelService:
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
+        self.http = ApiClient('vercel', self.headers)
     
     def create_project(self, project_name: str, github_repo_url: str) -> Dict:
         """Vercel'de yeni proje oluşturur (kişisel hesap reposu ile)"""
@@ -32,9 +33,7 @@ class VercelService:
             "framework": None,
             "publicSource": True
         }
-        print(f"Vercel API Request: URL={url}, Data={data}, Headers={self.headers}")
-        response = requests.post(url, headers=self.headers, json=data)
-        print(f"Vercel API Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.post(url, endpoint='create_project', json=data)
         
         if response.status_code == 200:
             return response.json()
@@ -46,7 +45,7 @@ class VercelService:
         url = f"{self.base_url}/v9/projects/{project_id}"
         
         # Önce mevcut project bilgilerini al
-        get_response = requests.get(url, headers=self.headers)
+        get_response = self.http.get(url, endpoint='disable_project_authentication')
         if get_response.status_code != 200:
             return False
             
@@ -56,12 +55,10 @@ class VercelService:
         project_data['ssoProtection'] = None
         
         # Project'i güncelle
-        response = requests.patch(url, headers=self.headers, json={
+        response = self.http.patch(url, endpoint='disable_project_authentication', json={
             "ssoProtection": None
         })
         
-        print(f"Disable Auth Response: Status={response.status_code}, Body={response.text}")
-        
         if response.status_code in [200, 201]:
             return True
         return False
@@ -83,9 +80,7 @@ class VercelService:
             }
         }
         
-        print(f"Vercel API trigger_deployment Request: URL={url}, Data={data}, Headers={self.headers}")
-        response = requests.post(url, headers=self.headers, json=data)
-        print(f"Vercel API trigger_deployment Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.post(url, endpoint='trigger_deployment', json=data)
         
         if response.status_code in [200, 201]:
             return response.json()
@@ -108,9 +103,7 @@ class VercelService:
             }
         }
         
-        print(f"Vercel API Alternative Request: URL={url}, Data={data}")
-        response = requests.post(url, headers=self.headers, json=data)
-        print(f"Vercel API Alternative Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.post(url, endpoint='trigger_deployment_alternative', json=data)
         
         if response.status_code in [200, 201]:
             return response.json()
@@ -122,8 +115,7 @@ class VercelService:
         # v13 endpoint'i doğru
         url = f"{self.base_url}/v13/deployments/{deployment_id}"
         
-        response = requests.get(url, headers=self.headers)
-        print(f"Vercel API get_deployment_status Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.get(url, endpoint='get_deployment_status')
         
         if response.status_code == 200:
             return response.json()
@@ -140,8 +132,7 @@ class VercelService:
             "limit": 10
         }
         
-        response = requests.get(url, headers=self.headers, params=params)
-        print(f"Vercel API get_project_deployments Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.get(url, endpoint='get_project_deployments', params=params)
         
         if response.status_code == 200:
             return response.json()
@@ -152,8 +143,7 @@ class VercelService:
         """Vercel projesini siler"""
         url = f"{self.base_url}/v9/projects/{project_id}"
         
-        response = requests.delete(url, headers=self.headers)
-        print(f"Vercel API delete_project Response: Status={response.status_code}")
+        response = self.http.delete(url, endpoint='delete_project')
         
         return response.status_code == 200
     
@@ -161,14 +151,25 @@ class VercelService:
         """Proje bilgilerini getirir"""
         url = f"{self.base_url}/v9/projects/{project_id}"
         
-        response = requests.get(url, headers=self.headers)
-        print(f"Vercel API get_project_info Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.get(url, endpoint='get_project_info', conditional=True)
         
         if response.status_code == 200:
             return response.json()
         else:
             raise Exception(f"Failed to get project info: {response.text}")
     
+    def project_exists(self, project_id: str) -> Optional[bool]:
+        """Proje var mı? 200 -> True, 404 -> False, belirsiz (rate limit/5xx) -> None"""
+        url = f"{self.base_url}/v9/projects/{project_id}"
+        
+        response = self.http.get(url, endpoint='project_exists', conditional=True)
+        
+        if response.status_code == 200:
+            return True
+        if response.status_code == 404:
+            return False
+        return None
+    
     def generate_unique_project_name(self, base_name: str) -> str:
         """Benzersiz proje adı oluşturur (çakışma önleme)"""
         import random
@@ -181,44 +182,71 @@ class VercelService:
         return f"{base_name}-{suffix}"
     
     def set_environment_variables(self, project_id: str, env_vars: Dict[str, str]) -> Dict:
-        """Vercel projesine environment variables set eder"""
-        url = f"{self.base_url}/v9/projects/{project_id}/env"
+        """Vercel projesine environment variables set eder (tek batch istek)"""
+        result = self.upsert_environment_variables(project_id, env_vars)
+        
+        failed_keys = {item['key']: item['error'] for item in result['failed']}
         
         results = []
+        for key in env_vars:
+            if key in failed_keys or not result['success'] and not result['failed']:
+                results.append({'key': key, 'success': False, 'error': failed_keys.get(key, result.get('error', ''))})
+            else:
+                results.append({'key': key, 'success': True})
         
-        for key, value in env_vars.items():
-            data = {
+        return {'results': results}
+
+    def upsert_environment_variables(self, project_id: str, env_vars: Dict[str, str]) -> Dict:
+        """Birden fazla environment variable'ı tek istekte oluşturur/günceller (upsert)"""
+        if not env_vars:
+            return {'success': True, 'created': [], 'failed': []}
+        
+        url = f"{self.base_url}/v10/projects/{project_id}/env"
+        
+        data = [
+            {
                 "key": key,
                 "value": value,
                 "type": "plain",  # "encrypted", "system", veya "plain"
                 "target": ["production", "preview", "development"]  # Tüm environmentlarda kullan
             }
-            
-            print(f"Vercel Set Env Var Request: URL={url}, Key={key}")
-            response = requests.post(url, headers=self.headers, json=data)
-            print(f"Vercel Set Env Var Response: Status={response.status_code}, Body={response.text}")
-            
-            if response.status_code in [200, 201]:
-                results.append({
-                    'key': key,
-                    'success': True,
-                    'data': response.json()
-                })
-            else:
-                results.append({
-                    'key': key,
-                    'success': False,
-                    'error': response.text
-                })
+            for key, value in env_vars.items()
+        ]
         
-        return {'results': results}
+        response = self.http.post(url, endpoint='upsert_environment_variables', params={"upsert": "true"}, json=data)
+        
+        if response.status_code not in [200, 201]:
+            return {
+                'success': False,
+                'created': [],
+                'failed': [],
+                'error': response.text
+            }
+        
+        body = response.json()
+        created = body.get('created') or []
+        if isinstance(created, dict):
+            created = [created]
+        
+        failed = []
+        for item in body.get('failed') or []:
+            error = item.get('error', {})
+            failed.append({
+                'key': error.get('key') or error.get('envVarKey', ''),
+                'error': error.get('message', str(error))
+            })
+        
+        return {
+            'success': not failed,
+            'created': created,
+            'failed': failed
+        }
 
     def get_environment_variables(self, project_id: str) -> Dict:
         """Vercel projesinin environment variables'larını getirir"""
         url = f"{self.base_url}/v9/projects/{project_id}/env"
         
-        response = requests.get(url, headers=self.headers)
-        print(f"Vercel Get Env Vars Response: Status={response.status_code}")
+        response = self.http.get(url, endpoint='get_environment_variables', conditional=True)
         
         if response.status_code == 200:
             return response.json()
@@ -233,8 +261,7 @@ class VercelService:
             "value": value
         }
         
-        response = requests.patch(url, headers=self.headers, json=data)
-        print(f"Vercel Update Env Var Response: Status={response.status_code}")
+        response = self.http.patch(url, endpoint='update_environment_variable', json=data)
         
         if response.status_code == 200:
             return response.json()
@@ -245,8 +272,7 @@ class VercelService:
         """Environment variable'ı siler"""
         url = f"{self.base_url}/v9/projects/{project_id}/env/{env_id}"
         
-        response = requests.delete(url, headers=self.headers)
-        print(f"Vercel Delete Env Var Response: Status={response.status_code}")
+        response = self.http.delete(url, endpoint='delete_environment_variable')
         
         return response.status_code == 200
 
@@ -258,9 +284,7 @@ class VercelService:
             "name": domain_name
         }
         
-        print(f"Vercel Add Domain Request: URL={url}, Data={data}")
-        response = requests.post(url, headers=self.headers, json=data)
-        print(f"Vercel Add Domain Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.post(url, endpoint='add_domain_to_project', json=data)
         
         if response.status_code in [200, 201]:
             return {
@@ -283,9 +307,7 @@ class VercelService:
         """Domain'i Vercel projesinden kaldırır"""
         url = f"{self.base_url}/v9/projects/{project_id}/domains/{domain_name}"
         
-        print(f"Vercel Remove Domain Request: URL={url}")
-        response = requests.delete(url, headers=self.headers)
-        print(f"Vercel Remove Domain Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.delete(url, endpoint='remove_domain_from_project')
         
         if response.status_code == 200:
             return {
@@ -307,9 +329,7 @@ class VercelService:
         """Domain bilgilerini Vercel'den getirir"""
         url = f"{self.base_url}/v5/domains/{domain_name}"
         
-        print(f"Vercel Get Domain Info Request: URL={url}")
-        response = requests.get(url, headers=self.headers)
-        print(f"Vercel Get Domain Info Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.get(url, endpoint='get_domain_info')
         
         if response.status_code == 200:
             data = response.json()
@@ -341,9 +361,7 @@ class VercelService:
         """Proje domain'lerini listeler"""
         url = f"{self.base_url}/v9/projects/{project_id}/domains"
         
-        print(f"Vercel Get Project Domains Request: URL={url}")
-        response = requests.get(url, headers=self.headers)
-        print(f"Vercel Get Project Domains Response: Status={response.status_code}, Body={response.text}")
+        response = self.http.get(url, endpoint='get_project_domains')
         
         if response.status_code == 200:
             return {
@@ -0,0 +1,53 @@
+# deployment/tasks.py
+import logging
+from celery import shared_task
+from django.utils import timezone
+
+from deployment.services.reconciliation_service import (
+    DeploymentReconciler,
+    get_reconciliation_state,
+    set_reconciliation_state,
+    release_reconciliation_lock,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, ignore_result=True)
+def reconcile_deployments_task(self, user_id=None):
+    """Reconcile deployment records with Vercel/GitHub in the background"""
+    started_at = timezone.now()
+    state = get_reconciliation_state(user_id)
+    set_reconciliation_state(user_id, {
+        **state,
+        'status': 'running',
+        'task_id': self.request.id,
+        'started_at': started_at.isoformat(),
+    })
+
+    try:
+        summary = DeploymentReconciler().reconcile(user_id=user_id)
+        finished_at = timezone.now()
+        set_reconciliation_state(user_id, {
+            'status': 'completed',
+            'task_id': self.request.id,
+            'started_at': started_at.isoformat(),
+            'finished_at': finished_at.isoformat(),
+            'finished_at_ts': finished_at.timestamp(),
+            'duration_ms': int((finished_at - started_at).total_seconds() * 1000),
+            'summary': summary,
+        })
+        logger.info(f"✅ Deployment reconciliation finished for user {user_id}")
+
+    except Exception as e:
+        logger.exception(f"❌ Deployment reconciliation failed for user {user_id}: {str(e)}")
+        set_reconciliation_state(user_id, {
+            'status': 'failed',
+            'task_id': self.request.id,
+            'started_at': started_at.isoformat(),
+            'finished_at_ts': timezone.now().timestamp(),
+            'error': str(e),
+        })
+
+    finally:
+        release_reconciliation_lock(user_id)
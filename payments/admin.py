@@ -3,7 +3,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Subscription, Payment
+from .models import Subscription, Payment, WebhookEvent
 
 # Subscription'a bağlı ödemeleri doğrudan abonelik detay sayfasında
 # göstermek için bir inline sınıfı tanımlıyoruz.
@@ -201,4 +201,24 @@ class PaymentAdmin(admin.ModelAdmin):
         if obj.invoice_url:
             return format_html('<a href="{}" target="_blank">Faturayı Görüntüle</a>', obj.invoice_url)
         return "Link Yok"
-    view_invoice_link.short_description = "Fatura Linki"
\ No newline at end of file
+    view_invoice_link.short_description = "Fatura Linki"
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    """
+    Webhook olay kaydı: sadece okunur, hatalı ve dead-letter olaylar 'replay' aksiyonu ile yeniden kuyruğa alınır.
+    """
+    list_display = ('event_name', 'ordering_key', 'status', 'attempts', 'received_at', 'processed_at')
+    list_filter = ('status', 'event_name')
+    search_fields = ('event_key', 'ordering_key')
+    readonly_fields = [f.name for f in WebhookEvent._meta.fields]
+    actions = ['replay_events']
+
+    def has_add_permission(self, request):
+        return False
+
+    def replay_events(self, request, queryset):
+        from .webhooks import enqueue_events
+        queued = enqueue_events(list(queryset.order_by('received_at', 'id')))
+        self.message_user(request, f"{queryset.count()} olay yeniden kuyruğa alındı ({queued} sıra)")
+    replay_events.short_description = "Seçili olayları yeniden işle"
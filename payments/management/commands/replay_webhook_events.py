@@ -0,0 +1,76 @@
+# payments/management/commands/replay_webhook_events.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from payments.models import WebhookEvent
+from payments.webhooks import enqueue_events, ingest_webhook_event
+
+
+class Command(BaseCommand):
+    help = "Kaydedilmiş Lemon Squeezy webhook olaylarını yeniden işler veya dosyadan backfill yapar"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', type=int, action='append', dest='ids', help="Tekrar işlenecek olay ID'si (birden fazla verilebilir)")
+        parser.add_argument('--status', default='failed', help="Bu durumdaki olaylar (varsayılan: failed; dead-letter için dead, 'all' hepsi)")
+        parser.add_argument('--event-name', help="Sadece bu olay adı (ör. subscription_updated)")
+        parser.add_argument('--ordering-key', help="Sadece bu abonelik/sipariş anahtarı (ör. subscription:123)")
+        parser.add_argument('--since', help="Bu tarihten sonra gelen olaylar (ISO format)")
+        parser.add_argument('--from-file', help="Her satırında bir ham webhook JSON'u olan dosyadan backfill")
+        parser.add_argument('--dry-run', action='store_true', help="Sadece seçilen olay sayısını göster")
+
+    def handle(self, *args, **options):
+        if options['from_file']:
+            return self._backfill(options['from_file'], options['dry_run'])
+
+        events = WebhookEvent.objects.all()
+        if options['ids']:
+            events = events.filter(id__in=options['ids'])
+        elif options['status'] != 'all':
+            events = events.filter(status=options['status'])
+
+        if options['event_name']:
+            events = events.filter(event_name=options['event_name'])
+        if options['ordering_key']:
+            events = events.filter(ordering_key=options['ordering_key'])
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since value: {options['since']}")
+            events = events.filter(received_at__gte=since)
+
+        events = list(events.order_by('received_at', 'id'))
+        if options['dry_run']:
+            self.stdout.write(f"{len(events)} events would be replayed")
+            return
+
+        queued = enqueue_events(events)
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(events)} events reset to pending, {queued} queues scheduled"))
+
+    def _backfill(self, path, dry_run):
+        created_count = 0
+        duplicate_count = 0
+        with open(path, 'rb') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event_data = json.loads(line)
+                except json.JSONDecodeError:
+                    raise CommandError(f"Invalid JSON on line {line_number}")
+
+                if dry_run:
+                    created_count += 1
+                    continue
+
+                _, created = ingest_webhook_event(event_data, line)
+                if created:
+                    created_count += 1
+                else:
+                    duplicate_count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Backfill: {created_count} new events{' (dry run)' if dry_run else ''}, {duplicate_count} duplicates skipped"
+        ))
@@ -16,7 +16,7 @@ class Subscription(models.Model):
     
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='subscription')
     lemon_squeezy_customer_id = models.CharField(max_length=255, blank=True, null=True)
-    lemon_squeezy_subscription_id = models.CharField(max_length=255, blank=True, null=True)
+    lemon_squeezy_subscription_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     lemon_squeezy_order_id = models.CharField(max_length=255, blank=True, null=True)
     lemon_squeezy_product_id = models.CharField(max_length=255, blank=True, null=True)
     lemon_squeezy_variant_id = models.CharField(max_length=255, blank=True, null=True)
@@ -66,7 +66,7 @@ class Payment(models.Model):
     subscription = models.ForeignKey(Subscription, on_delete=models.SET_NULL, null=True, blank=True, related_name='payments')
     
     # Lemon Squeezy Bilgileri
-    lemon_squeezy_order_id = models.CharField(max_length=255)
+    lemon_squeezy_order_id = models.CharField(max_length=255, db_index=True)
     lemon_squeezy_order_item_id = models.CharField(max_length=255, blank=True, null=True)
     
     # Ödeme bilgileri
@@ -83,5 +83,48 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Ödeme geçmişi cursor pagination: WHERE user_id ORDER BY payment_date DESC, id DESC
+            models.Index(fields=['user', '-payment_date', '-id'], name='payments_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email}'s Payment of {self.amount} {self.currency}"
+
+class WebhookEvent(models.Model):
+    """
+    Lemon Squeezy'den gelen ham webhook olayları. Endpoint sadece kaydedip
+    hemen 200 döner; işleme Celery'de abonelik bazında sırayla yapılır.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+        ('dead', 'Dead letter'),  # deneme limiti aşıldı; sadece replay ile tekrar işlenir
+        ('ignored', 'Ignored'),
+    ]
+
+    # Aynı olayın tekrar gönderimlerini ayıklamak için (provider retry, replay)
+    event_key = models.CharField(max_length=255, unique=True)
+    event_name = models.CharField(max_length=100)
+    # Aynı abonelik/siparişe ait olaylar bu anahtar ile sırayla işlenir
+    ordering_key = models.CharField(max_length=255, db_index=True)
+    payload = models.JSONField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['received_at', 'id']
+        indexes = [
+            models.Index(fields=['ordering_key', 'status', 'received_at']),
+            models.Index(fields=['status', 'received_at']),
+        ]
+
     def __str__(self):
-        return f"{self.user.email}'s Payment of {self.amount} {self.currency}"
\ No newline at end of file
+        return f"{self.event_name} ({self.ordering_key}) - {self.status}"
@@ -0,0 +1,21 @@
+# payments/tasks.py
+import logging
+from celery import shared_task
+
+from .webhooks import process_pending_events
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30, ignore_result=True)
+def process_webhook_events_task(self, ordering_key):
+    """Process stored Lemon Squeezy webhook events for one subscription/order in arrival order"""
+    summary = process_pending_events(ordering_key)
+    logger.info(f"✅ Webhook events for {ordering_key}: {summary}")
+
+    if summary['failed']:
+        try:
+            self.retry(countdown=int(self.default_retry_delay * (2 ** self.request.retries)))
+        except self.MaxRetriesExceededError:
+            logger.error(f"❌ Webhook events for {ordering_key} still failing, use replay_webhook_events to retry")
+    return summary
@@ -19,6 +19,9 @@ from rest_framework import status
 import requests 
 from .models import Subscription, Payment
 from .serializers import SubscriptionSerializer, PaymentSerializer, SubscriptionDetailSerializer
+from .webhooks import WebhookEventError, ingest_webhook_event, parse_event_payload
+from spa.api.pagination import CursorResultsSetPagination
+from spa.api.http_cache import conditional_response, make_etag
 from users.models import User
 
 # Logger'ı yapılandır
@@ -30,15 +33,21 @@ class SubscriptionDetailView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        try:
-            # Mevcut ücretli aboneliği bul
-            subscription = Subscription.objects.get(user=request.user)
+        subscription = Subscription.objects.filter(user=request.user).first()
+        # Abonelik updated_at'i ve kullanıcının planı değişmediyse 304 (serializer çalışmaz)
+        etag = make_etag(
+            'subscription', request.user.id, subscription.pk if subscription else None,
+            subscription.updated_at.isoformat() if subscription else None,
+            request.user.subscription_type, request.user.subscription_expiry,
+            settings.LEMON_SQUEEZY_CHECKOUT_URL_BASIC, settings.LEMON_SQUEEZY_CHECKOUT_URL_PREMIUM
+        )
+        return conditional_response(request, etag, lambda: self._build_response(request, subscription))
+
+    def _build_response(self, request, subscription):
+        if subscription is not None:
             serializer = SubscriptionDetailSerializer(subscription)
             data = serializer.data
-            
-
-
-        except Subscription.DoesNotExist:
+        else:
             # Kullanıcının ücretli aboneliği yoksa (free plan), yükseltme yapabilmesi için checkout URL'lerini gönder.
             data = {
                 'status': None,
@@ -66,14 +75,21 @@ class SubscriptionDetailView(APIView):
         }
         return limits.get(subscription_type, limits['free'])
 
+class PaymentHistoryPagination(CursorResultsSetPagination):
+    """Ödeme geçmişi ödeme tarihine göre (payment_date, id) sayfalanır"""
+    ordering = ('-payment_date', '-id')
+
+
 class PaymentHistoryView(APIView):
-    """Kullanıcının ödeme geçmişini döndürür. BU VIEW OLDUĞU GİBİ KALIYOR."""
+    """Kullanıcının ödeme geçmişini cursor pagination ile döndürür."""
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        payments = Payment.objects.filter(user=request.user).order_by('-payment_date')
-        serializer = PaymentSerializer(payments, many=True)
-        return Response(serializer.data)
+        payments = Payment.objects.filter(user=request.user)
+        paginator = PaymentHistoryPagination()
+        page = paginator.paginate_queryset(payments, request, view=self)
+        serializer = PaymentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 class CancelSubscriptionView(APIView):
     """Kullanıcının mevcut aktif aboneliğini iptal eder."""
@@ -157,43 +173,24 @@ def lemon_squeezy_webhook(request):
         logger.error("Webhook signature verification failed.")
         return HttpResponse(status=401)
     
-    try:
-        event_data = json.loads(payload.decode('utf-8'))
-        event_name = event_data.get('meta', {}).get('event_name')
-        logger.info(f"Received webhook event: {event_name}")
-        
-        # Olay (Event) Yönlendiricisi Haritası
-        handler_map = {
-            'subscription_created': handle_subscription_created,
-            'subscription_updated': handle_subscription_updated,
-            'subscription_cancelled': handle_subscription_cancelled,
-            'subscription_expired': handle_subscription_expired,
-            'subscription_resumed': handle_subscription_resumed,
-            'subscription_paused': handle_subscription_paused,
-            'subscription_unpaused': handle_subscription_unpaused,
-            'subscription_payment_success': handle_subscription_payment_success,
-            'subscription_payment_failed': handle_subscription_payment_failed,
-            'subscription_plan_changed': handle_subscription_plan_changed,
-            'subscription_payment_refunded': handle_subscription_payment_refunded,
-            'order_created': handle_order_created,
-            'order_refunded': handle_order_refunded,
-        }
-
-        handler = handler_map.get(event_name)
-        if handler:
-            handler(event_data)
-        else:
-            logger.info(f"No handler for event: {event_name}")
-            
-        return HttpResponse(status=200)
-
-    except json.JSONDecodeError:
+    event_data = parse_event_payload(payload)
+    if event_data is None:
         logger.error("Invalid JSON in webhook payload.")
         return HttpResponse(status=400)
+
+    # Olay kaydedilip hemen onaylanır; işleme Celery'de abonelik bazında sırayla yapılır
+    try:
+        event, created = ingest_webhook_event(event_data, payload)
     except Exception as e:
-        logger.exception(f"Error processing webhook: {str(e)}")
+        logger.exception(f"Error storing webhook: {str(e)}")
         return HttpResponse(status=500)
 
+    if created:
+        logger.info(f"Received webhook event: {event.event_name} ({event.ordering_key})")
+    else:
+        logger.info(f"Duplicate webhook event ignored: {event.event_key}")
+    return HttpResponse(status=200)
+
 # --- Yardımcı Fonksiyonlar (Hata Düzeltmeleriyle Güncellendi) ---
 def determine_subscription_type(product_id_str):
     """Product ID'ye göre abonelik tipini belirler (String olarak karşılaştırır)"""
@@ -231,8 +228,7 @@ def handle_subscription_created(event_data: dict):
         user_email = data.get('user_email')
 
         if not user_email:
-            logger.error("'subscription_created' webhook'unda 'user_email' bulunamadı.")
-            return
+            raise WebhookEventError("'subscription_created' webhook'unda 'user_email' bulunamadı.")
 
         # İlgili kullanıcıyı e-posta ile bul
         user = User.objects.get(email=user_email)
@@ -279,10 +275,13 @@ def handle_subscription_created(event_data: dict):
 
     except User.DoesNotExist:
         logger.error(f"'subscription_created': {user_email} e-postasına sahip kullanıcı bulunamadı.")
+        raise
     except KeyError as e:
         logger.error(f"'subscription_created' webhook verisinde eksik anahtar: {e}")
+        raise
     except Exception as e:
         logger.exception(f"'handle_subscription_created' fonksiyonunda beklenmedik bir hata oluştu: {e}")
+        raise
 
 
 @transaction.atomic
@@ -295,8 +294,7 @@ def handle_subscription_updated(event_data: dict):
         lemon_subscription_id = event_data['data']['id']
         
         if not lemon_subscription_id:
-            logger.error("'subscription_updated' webhook'unda 'id' bulunamadı.")
-            return
+            raise WebhookEventError("'subscription_updated' webhook'unda 'id' bulunamadı.")
 
         # İlgili aboneliği ve kullanıcıyı veritabanından bul
         # `select_related` ile fazladan veritabanı sorgusunu engelle
@@ -350,16 +348,21 @@ def handle_subscription_updated(event_data: dict):
 
     except Subscription.DoesNotExist:
         logger.error(f"'subscription_updated': {lemon_subscription_id} ID'li abonelik bulunamadı.")
+        raise
     except KeyError as e:
         logger.error(f"'subscription_updated' webhook verisinde eksik anahtar: {e}")
+        raise
     except Exception as e:
         logger.exception(f"'handle_subscription_updated' fonksiyonunda beklenmedik bir hata oluştu: {e}")
+        raise
 
 @transaction.atomic
 def handle_subscription_cancelled(event_data):
     """Abonelik iptal edildiğinde çağrılır"""
     lemon_subscription_id = event_data.get('data', {}).get('id')
-    if not lemon_subscription_id: return logger.error("No ID in subscription_cancelled webhook")
+    if not lemon_subscription_id:
+        logger.error("No ID in subscription_cancelled webhook")
+        raise WebhookEventError("No ID in subscription_cancelled webhook")
 
     try:
         subscription = Subscription.objects.get(lemon_squeezy_subscription_id=lemon_subscription_id)
@@ -374,14 +377,18 @@ def handle_subscription_cancelled(event_data):
         logger.info(f"Subscription cancelled for {subscription.user.email}, access ends at: {subscription.ends_at}")
     except Subscription.DoesNotExist:
         logger.error(f"Subscription not found for ID: {lemon_subscription_id}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_subscription_cancelled: {str(e)}")
+        raise
 
 @transaction.atomic
 def handle_subscription_expired(event_data):
     """Abonelik süresi dolduğunda çağrılır"""
     lemon_subscription_id = event_data.get('data', {}).get('id')
-    if not lemon_subscription_id: return logger.error("No ID in subscription_expired webhook")
+    if not lemon_subscription_id:
+        logger.error("No ID in subscription_expired webhook")
+        raise WebhookEventError("No ID in subscription_expired webhook")
 
     try:
         subscription = Subscription.objects.get(lemon_squeezy_subscription_id=lemon_subscription_id)
@@ -396,14 +403,18 @@ def handle_subscription_expired(event_data):
         logger.info(f"Subscription expired for {user.email}, downgraded to free.")
     except Subscription.DoesNotExist:
         logger.error(f"Subscription not found for ID: {lemon_subscription_id}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_subscription_expired: {str(e)}")
+        raise
 
 @transaction.atomic
 def handle_subscription_resumed(event_data):
     """İptal edilmiş abonelik devam ettirildiğinde çağrılır"""
     lemon_subscription_id = event_data.get('data', {}).get('id')
-    if not lemon_subscription_id: return logger.error("No ID in subscription_resumed webhook")
+    if not lemon_subscription_id:
+        logger.error("No ID in subscription_resumed webhook")
+        raise WebhookEventError("No ID in subscription_resumed webhook")
 
     try:
         subscription = Subscription.objects.get(lemon_squeezy_subscription_id=lemon_subscription_id)
@@ -425,14 +436,18 @@ def handle_subscription_resumed(event_data):
         logger.info(f"Subscription resumed for {user.email}, type: {subscription_type}")
     except Subscription.DoesNotExist:
         logger.error(f"Subscription not found for ID: {lemon_subscription_id}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_subscription_resumed: {str(e)}")
+        raise
 
 @transaction.atomic
 def handle_subscription_paused(event_data):
     """Abonelik duraklatıldığında çağrılır"""
     lemon_subscription_id = event_data.get('data', {}).get('id')
-    if not lemon_subscription_id: return logger.error("No ID in subscription_paused webhook")
+    if not lemon_subscription_id:
+        logger.error("No ID in subscription_paused webhook")
+        raise WebhookEventError("No ID in subscription_paused webhook")
 
     try:
         subscription = Subscription.objects.get(lemon_squeezy_subscription_id=lemon_subscription_id)
@@ -441,14 +456,18 @@ def handle_subscription_paused(event_data):
         logger.info(f"Subscription paused for user: {subscription.user.email}")
     except Subscription.DoesNotExist:
         logger.error(f"Subscription not found for ID: {lemon_subscription_id}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_subscription_paused: {str(e)}")
+        raise
 
 @transaction.atomic
 def handle_subscription_unpaused(event_data):
     """Abonelik duraklatması kaldırıldığında çağrılır"""
     lemon_subscription_id = event_data.get('data', {}).get('id')
-    if not lemon_subscription_id: return logger.error("No ID in subscription_unpaused webhook")
+    if not lemon_subscription_id:
+        logger.error("No ID in subscription_unpaused webhook")
+        raise WebhookEventError("No ID in subscription_unpaused webhook")
 
     try:
         subscription = Subscription.objects.get(lemon_squeezy_subscription_id=lemon_subscription_id)
@@ -457,15 +476,19 @@ def handle_subscription_unpaused(event_data):
         logger.info(f"Subscription unpaused for user: {subscription.user.email}")
     except Subscription.DoesNotExist:
         logger.error(f"Subscription not found for ID: {lemon_subscription_id}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_subscription_unpaused: {str(e)}")
+        raise
 
 @transaction.atomic
 def handle_subscription_payment_success(event_data):
     """Yenileme ödemesi başarılı olduğunda"""
     data = event_data.get('data', {}).get('attributes', {})
     lemon_subscription_id = data.get('subscription_id')
-    if not lemon_subscription_id: return logger.error("No subscription_id in payment_success webhook")
+    if not lemon_subscription_id:
+        logger.error("No subscription_id in payment_success webhook")
+        raise WebhookEventError("No subscription_id in payment_success webhook")
     
     try:
         subscription = Subscription.objects.get(lemon_squeezy_subscription_id=lemon_subscription_id)
@@ -479,27 +502,34 @@ def handle_subscription_payment_success(event_data):
         user.subscription_expiry = subscription.renews_at
         user.save(update_fields=['subscription_expiry'])
         
-        Payment.objects.create(
-            user=user,
-            subscription=subscription,
+        # Aynı invoice tekrar işlenirse (replay) ikinci ödeme kaydı oluşmaz
+        Payment.objects.get_or_create(
             lemon_squeezy_order_id=data.get('order_id'),
-            amount=Decimal(data.get('total', 0)) / 100,
-            currency=data.get('currency', 'USD'),
-            status='completed',
-            payment_date=timezone.now()
+            subscription=subscription,
+            defaults={
+                'user': user,
+                'amount': Decimal(data.get('total', 0)) / 100,
+                'currency': data.get('currency', 'USD'),
+                'status': 'completed',
+                'payment_date': parse_datetime(data.get('created_at')) or timezone.now()
+            }
         )
         logger.info(f"Subscription payment success for {user.email}. Next renewal: {subscription.renews_at}")
     except Subscription.DoesNotExist:
         logger.error(f"Subscription not found for ID: {lemon_subscription_id}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_subscription_payment_success: {str(e)}")
+        raise
 
 @transaction.atomic
 def handle_subscription_payment_failed(event_data):
     """Yenileme ödemesi başarısız olduğunda"""
     data = event_data.get('data', {}).get('attributes', {})
     lemon_subscription_id = data.get('subscription_id')
-    if not lemon_subscription_id: return logger.error("No subscription_id in payment_failed webhook")
+    if not lemon_subscription_id:
+        logger.error("No subscription_id in payment_failed webhook")
+        raise WebhookEventError("No subscription_id in payment_failed webhook")
     
     try:
         subscription = Subscription.objects.get(lemon_squeezy_subscription_id=lemon_subscription_id)
@@ -508,8 +538,10 @@ def handle_subscription_payment_failed(event_data):
         logger.warning(f"Subscription payment failed for {subscription.user.email}. Status set to past_due.")
     except Subscription.DoesNotExist:
         logger.error(f"Subscription not found for ID: {lemon_subscription_id}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_subscription_payment_failed: {str(e)}")
+        raise
 
 def handle_subscription_plan_changed(event_data):
     """Kullanıcı plan değiştirdiğinde. Bu genellikle `subscription_updated` ile aynıdır."""
@@ -521,7 +553,9 @@ def handle_subscription_payment_refunded(event_data):
     """Bir yenileme ödemesi iade edildiğinde"""
     data = event_data.get('data', {}).get('attributes', {})
     order_id = data.get('order_id')
-    if not order_id: return logger.error("No order_id in payment_refunded webhook")
+    if not order_id:
+        logger.error("No order_id in payment_refunded webhook")
+        raise WebhookEventError("No order_id in payment_refunded webhook")
 
     try:
         payment = Payment.objects.get(lemon_squeezy_order_id=order_id)
@@ -541,15 +575,19 @@ def handle_subscription_payment_refunded(event_data):
 
     except Payment.DoesNotExist:
         logger.error(f"Payment with order ID {order_id} not found for refund.")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_subscription_payment_refunded: {str(e)}")
+        raise
 
 @transaction.atomic
 def handle_order_created(event_data):
     """Yeni bir sipariş oluşturulduğunda çağrılır (idempotent hale getirildi)"""
     data = event_data.get('data', {}).get('attributes', {})
     user_email = data.get('user_email')
-    if not user_email: return logger.error("No email in order_created webhook")
+    if not user_email:
+        logger.error("No email in order_created webhook")
+        raise WebhookEventError("No email in order_created webhook")
     
     try:
         user = User.objects.get(email=user_email)
@@ -577,14 +615,18 @@ def handle_order_created(event_data):
             
     except User.DoesNotExist:
         logger.error(f"User not found for email: {user_email}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_order_created: {str(e)}")
+        raise
 
 @transaction.atomic
 def handle_order_refunded(event_data):
     """Sipariş iade edildiğinde çağrılır"""
     lemon_order_id = event_data.get('data', {}).get('id')
-    if not lemon_order_id: return logger.error("No order ID in order_refunded webhook")
+    if not lemon_order_id:
+        logger.error("No order ID in order_refunded webhook")
+        raise WebhookEventError("No order ID in order_refunded webhook")
 
     try:
         payment = Payment.objects.get(lemon_squeezy_order_id=lemon_order_id)
@@ -593,5 +635,25 @@ def handle_order_refunded(event_data):
         logger.info(f"Order refunded for {payment.user.email}, order ID: {lemon_order_id}")
     except Payment.DoesNotExist:
         logger.error(f"Payment not found for order ID: {lemon_order_id}")
+        raise
     except Exception as e:
         logger.exception(f"Error in handle_order_refunded: {str(e)}")
+        raise
+
+
+# Olay adı -> işleyici (payments.tasks.process_webhook_events_task tarafından kullanılır)
+WEBHOOK_HANDLERS = {
+    'subscription_created': handle_subscription_created,
+    'subscription_updated': handle_subscription_updated,
+    'subscription_cancelled': handle_subscription_cancelled,
+    'subscription_expired': handle_subscription_expired,
+    'subscription_resumed': handle_subscription_resumed,
+    'subscription_paused': handle_subscription_paused,
+    'subscription_unpaused': handle_subscription_unpaused,
+    'subscription_payment_success': handle_subscription_payment_success,
+    'subscription_payment_failed': handle_subscription_payment_failed,
+    'subscription_plan_changed': handle_subscription_plan_changed,
+    'subscription_payment_refunded': handle_subscription_payment_refunded,
+    'order_created': handle_order_created,
+    'order_refunded': handle_order_refunded,
+}
@@ -0,0 +1,178 @@
+# payments/webhooks.py
+import hashlib
+import json
+import logging
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+# Sıralama anahtarı için olay adı önekleri
+SUBSCRIPTION_EVENT_PREFIX = 'subscription_'
+ORDER_EVENT_PREFIX = 'order_'
+
+
+class WebhookEventError(Exception):
+    """Olay uygulanamadı (eksik alan vb.); olay 'failed' olarak kaydedilir"""
+
+
+def build_event_key(event_data: Dict, payload: bytes) -> str:
+    """
+    Olayın tekil anahtarı: meta'da olay ID'si varsa o, yoksa
+    (olay adı, kaynak ID, updated_at), o da yoksa ham gövdenin hash'i
+    """
+    meta = event_data.get('meta', {}) or {}
+    event_id = meta.get('event_id') or meta.get('webhook_event_id')
+    if event_id:
+        return f"id:{event_id}"
+
+    data = event_data.get('data', {}) or {}
+    updated_at = (data.get('attributes', {}) or {}).get('updated_at')
+    if data.get('id') and updated_at:
+        return f"{meta.get('event_name')}:{data.get('type')}:{data.get('id')}:{updated_at}"
+
+    return f"sha256:{hashlib.sha256(payload).hexdigest()}"
+
+
+def get_ordering_key(event_data: Dict) -> str:
+    """Aynı aboneliğe (yoksa siparişe) ait olaylar için sıralama anahtarı"""
+    event_name = event_data.get('meta', {}).get('event_name') or ''
+    data = event_data.get('data', {}) or {}
+    attributes = data.get('attributes', {}) or {}
+
+    if event_name.startswith(SUBSCRIPTION_EVENT_PREFIX):
+        # subscription_payment_* olaylarında data bir invoice'tur, abonelik ID'si attribute'tadır
+        subscription_id = attributes.get('subscription_id') or data.get('id')
+        return f"subscription:{subscription_id}"
+
+    if event_name.startswith(ORDER_EVENT_PREFIX):
+        return f"order:{data.get('id')}"
+
+    return f"other:{data.get('id')}"
+
+
+def ingest_webhook_event(event_data: Dict, payload: bytes) -> Tuple[WebhookEvent, bool]:
+    """
+    Ham olayı kaydeder ve işleme task'ını commit sonrası kuyruğa atar.
+    Aynı event_key daha önce geldiyse (created=False) tekrar işlenmez.
+    """
+    from .tasks import process_webhook_events_task
+
+    event_key = build_event_key(event_data, payload)
+    try:
+        with transaction.atomic():
+            event, created = WebhookEvent.objects.get_or_create(
+                event_key=event_key,
+                defaults={
+                    'event_name': event_data.get('meta', {}).get('event_name') or '',
+                    'ordering_key': get_ordering_key(event_data),
+                    'payload': event_data,
+                }
+            )
+            if created:
+                ordering_key = event.ordering_key
+                transaction.on_commit(lambda: process_webhook_events_task.delay(ordering_key))
+    except IntegrityError:
+        # Eşzamanlı aynı olay: diğer istek kaydetti
+        return WebhookEvent.objects.get(event_key=event_key), False
+
+    return event, created
+
+
+def enqueue_events(events) -> int:
+    """Verilen olayları pending'e çekip sıralama anahtarı başına bir task kuyruğa atar (replay)"""
+    from .tasks import process_webhook_events_task
+
+    ordering_keys = set()
+    with transaction.atomic():
+        for event in events:
+            # Replay (dead-letter dahil) deneme sayacını sıfırlar
+            event.status = 'pending'
+            event.attempts = 0
+            event.save(update_fields=['status', 'attempts'])
+            ordering_keys.add(event.ordering_key)
+
+    for ordering_key in ordering_keys:
+        process_webhook_events_task.delay(ordering_key)
+    return len(ordering_keys)
+
+
+def get_handler(event_name: str):
+    from .views import WEBHOOK_HANDLERS
+    return WEBHOOK_HANDLERS.get(event_name)
+
+
+def process_pending_events(ordering_key: str) -> Dict:
+    """
+    Bir abonelik/siparişin bekleyen olaylarını geliş sırasıyla işler.
+    Satırlar select_for_update ile kilitlenir; aynı anahtar için ikinci bir
+    worker kilidi bekler ve işlenmiş olayları atlar. Hata olursa sıra bozulmasın
+    diye kalan olaylar sonraki denemeye bırakılır. İşleyiciler hataları logladıktan sonra
+    yeniden fırlatır; olay sadece işleyici hatasız dönerse 'processed' olur.
+    Ön koşulu eksik olaylar (DoesNotExist: ör. subscription_created'dan önce gelen ödeme)
+    sırayı tıkamaz, ertelenir. WEBHOOK_EVENT_MAX_ATTEMPTS denemeden sonra olay 'dead'
+    olur ve sıra devam eder; dead olaylar admin aksiyonu / replay_webhook_events ile tekrar işlenir.
+    """
+    max_attempts = getattr(settings, 'WEBHOOK_EVENT_MAX_ATTEMPTS', 5)
+    summary = {'processed': 0, 'ignored': 0, 'failed': 0, 'dead': 0}
+
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update()
+            .filter(ordering_key=ordering_key, status__in=['pending', 'failed'])
+            .order_by('received_at', 'id')
+        )
+
+        for event in events:
+            handler = get_handler(event.event_name)
+            event.attempts += 1
+
+            if handler is None:
+                logger.info(f"No handler for event: {event.event_name}")
+                event.status = 'ignored'
+                event.processed_at = timezone.now()
+                event.save(update_fields=['status', 'attempts', 'processed_at'])
+                summary['ignored'] += 1
+                continue
+
+            try:
+                with transaction.atomic():
+                    handler(event.payload)
+            except Exception as e:
+                logger.exception(f"❌ Webhook event {event.id} ({event.event_name}) failed: {str(e)}")
+                event.last_error = str(e)
+                if event.attempts >= max_attempts:
+                    logger.error(f"❌ Webhook event {event.id} dead-lettered after {event.attempts} attempts")
+                    event.status = 'dead'
+                    event.save(update_fields=['status', 'attempts', 'last_error'])
+                    summary['dead'] += 1
+                    continue
+
+                event.status = 'failed'
+                event.save(update_fields=['status', 'attempts', 'last_error'])
+                summary['failed'] += 1
+                if isinstance(e, ObjectDoesNotExist):
+                    # Eksik ön koşul: sonraki olaylar (onu oluşturacak olan dahil) işlenmeye devam eder
+                    continue
+                break
+
+            event.status = 'processed'
+            event.last_error = ''
+            event.processed_at = timezone.now()
+            event.save(update_fields=['status', 'attempts', 'last_error', 'processed_at'])
+            summary['processed'] += 1
+
+    return summary
+
+
+def parse_event_payload(payload: bytes) -> Optional[Dict]:
+    try:
+        return json.loads(payload.decode('utf-8'))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
@@ -6,8 +6,8 @@ from .models import Website
 class WebsiteAdmin(admin.ModelAdmin):
     list_display = ('title', 'user', 'created_at', 'updated_at')
     list_filter = ('created_at', 'updated_at')
-    search_fields = ('title', 'prompt', 'user__email')
-    readonly_fields = ('created_at', 'updated_at')
+    search_fields = ('title', 'original_user_prompt', 'user__email')
+    readonly_fields = ('prompt_blob', 'prompt_size', 'html_blob', 'html_size', 'custom_css_rules', 'custom_css', 'custom_css_hash', 'created_at', 'updated_at')
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
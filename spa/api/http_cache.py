@@ -0,0 +1,65 @@
+# spa/api/http_cache.py
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+logger = logging.getLogger(__name__)
+
+VERSION_PREFIX = "http_version"
+
+
+def make_etag(*parts) -> str:
+    """updated_at, versiyon sayacı vb. parçalardan strong ETag üretir"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return quote_etag(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def get_version(namespace: str, key) -> int:
+    """
+    Cache'deki versiyon sayacı. Sayaç yoksa zaman tabanlı bir değerle başlar;
+    böylece cache silinse bile eski ETag'lerle çakışmaz.
+    """
+    cache_key = f"{VERSION_PREFIX}:{namespace}:{key}"
+    try:
+        version = cache.get(cache_key)
+        if version is None:
+            cache.add(cache_key, int(time.time() * 1000), timeout=None)
+            version = cache.get(cache_key)
+        return version
+    except Exception as e:
+        logger.warning(f"⚠️ Version counter read failed: {str(e)}")
+        return None
+
+
+def bump_version(namespace: str, key) -> None:
+    cache_key = f"{VERSION_PREFIX}:{namespace}:{key}"
+    try:
+        cache.incr(cache_key)
+    except ValueError:
+        # Sayaç yok: bir sonraki okuma yeni zaman tabanlı değerle başlatır
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ Version counter bump failed, deleting: {str(e)}")
+        cache.delete(cache_key)
+
+
+def conditional_response(request, etag, build_response, max_age=0):
+    """
+    If-None-Match ETag ile eşleşirse gövde oluşturmadan 304 döner, aksi halde
+    build_response() çağrılır. Yanıtlar kullanıcıya özel (private) ve her seferinde doğrulanır.
+    etag None ise (versiyon okunamadı) koşulsuz yanıt verilir.
+    """
+    response = get_conditional_response(request, etag=etag) if etag else None
+    if response is None:
+        response = build_response()
+        if response.status_code != 200:
+            return response
+    if etag:
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=max_age, must_revalidate=True)
+    patch_vary_headers(response, ('Authorization', 'Cookie'))
+    return response
@@ -0,0 +1,75 @@
+# spa/api/mixins.py
+from typing import Iterable, Optional, Set
+
+FIELDS_QUERY_PARAM = 'fields'
+
+
+def get_requested_fields(request) -> Optional[Set[str]]:
+    """?fields=id,title,updated_at parametresini set olarak döner, yoksa None"""
+    if request is None:
+        return None
+    raw = request.query_params.get(FIELDS_QUERY_PARAM, '') if hasattr(request, 'query_params') else ''
+    fields = {field.strip() for field in raw.split(',') if field.strip()}
+    return fields or None
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin'i: request'te ?fields= varsa sadece istenen alanları serialize eder.
+    Bilinmeyen alan isimleri yok sayılır; 'id' her zaman döner.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(self.context.get('request'))
+        if requested is None:
+            return
+        requested.add('id')
+        for field_name in set(self.fields) - requested:
+            self.fields.pop(field_name)
+
+    @classmethod
+    def model_fields_for(cls, request) -> Iterable[str]:
+        """QuerySet.only() için gereken model alanları (serializer alanları ∩ ?fields=)"""
+        declared = list(cls.Meta.fields)
+        requested = get_requested_fields(request)
+        if requested is not None:
+            declared = [field for field in declared if field in requested or field == 'id']
+
+        # FK'lar hem 'website' hem 'website_id' ile referans verilebilir
+        model_field_names = {}
+        for field in cls.Meta.model._meta.concrete_fields:
+            model_field_names[field.name] = field.name
+            model_field_names[field.attname] = field.name
+        # ContentBlob'a taşınmış metin alanları blob referansından yüklenir
+        for alias, (blob_field, size_field) in getattr(cls.Meta.model, 'CONTENT_FIELDS', {}).items():
+            model_field_names[alias] = blob_field
+
+        sources = []
+        for field_name in declared:
+            source = getattr(cls._declared_fields.get(field_name), 'source', None) or field_name
+            source = model_field_names.get(source.split('.')[0])
+            if source and source not in sources:
+                sources.append(source)
+        return sources
+
+
+class SparseFieldsetQuerysetMixin:
+    """
+    ViewSet mixin'i: list action'ında ve ?fields= verilmiş retrieve'de queryset'i
+    serializer'ın ihtiyaç duyduğu kolonlarla sınırlar (.only()).
+    Yazma action'larında kolonlar kısıtlanmaz.
+    """
+
+    # Serializer'da olmasa da permission kontrolleri için her zaman yüklenen alanlar
+    always_loaded_fields = ()
+
+    def restrict_queryset_columns(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'model_fields_for'):
+            return queryset
+        if self.action == 'retrieve' and get_requested_fields(self.request) is None:
+            return queryset
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        return queryset.only(*serializer_class.model_fields_for(self.request), *self.always_loaded_fields)
@@ -1,12 +1,15 @@
 # 1. pagination.py (zaten var olan dosyanızı güncelleyin)
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from rest_framework.response import Response
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 3
     page_size_query_param = 'page_size'
-    max_page_size = 1000
-    
+    max_page_size = 100
+
     def get_paginated_response(self, data):
         return Response({
             'links': {
@@ -18,4 +21,51 @@ class StandardResultsSetPagination(PageNumberPagination):
             'current_page': self.page.number,
             'page_size': self.page_size,
             'results': data
-        })
\ No newline at end of file
+        })
+
+
+class CursorResultsSetPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination: (created_at, id) sırasıyla WHERE ile ilerler,
+    derin sayfalarda OFFSET/COUNT(*) maliyeti yoktur.
+    Toplam sayı sadece ?include_count=true ile döner ve ayrıca cache'lenir.
+    """
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    count_query_param = 'include_count'
+    count_cache_timeout = 60  # saniye
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = self.get_cached_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_cached_count(self, queryset):
+        """Aynı filtre için COUNT(*) sonucunu kısa süre cache'ler"""
+        try:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cache_key = f"pagination_count:{hashlib.sha1(f'{sql}{params}'.encode()).hexdigest()}"
+        except Exception:
+            return queryset.count()
+
+        count = cache.get(cache_key)
+        if count is None:
+            count = queryset.count()
+            cache.set(cache_key, count, timeout=self.count_cache_timeout)
+        return count
+
+    def get_paginated_response(self, data):
+        response_data = {
+            'links': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link()
+            },
+            'page_size': self.page_size,
+            'results': data
+        }
+        if self.count is not None:
+            response_data['count'] = self.count
+        return Response(response_data)
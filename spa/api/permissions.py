@@ -1,6 +1,8 @@
 # spa/api/permissions.py
 from rest_framework.permissions import BasePermission
+from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
+from spa.services.quota_service import get_website_quota_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,45 +21,59 @@ class CanCreateWebsite(BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        # Kullanıcının mevcut subscription type'ını al
-        subscription_type = getattr(request.user, 'subscription_type', 'free')
-        
-        # Plan limitlerini belirle
-        plan_limits = {
-            'free': 2,
-            'basic': 5,
-            'premium': 20
-        }
-        
-        max_websites = plan_limits.get(subscription_type, 2)  # Default free
-        
-        # Kullanıcının şu anki website sayısını kontrol et
-        current_website_count = request.user.websites.count()
+        # Website sayısı quota servisinden (cache sayaç) okunur, COUNT(*) yapılmaz
+        limit_details = get_website_quota_service().get_quota(request.user)
+        request.limit_details = limit_details
         
         # Limit kontrolü
-        if current_website_count >= max_websites:
-            # Limit aşıldığında request'e bilgi ekle
+        if limit_details['remaining'] <= 0:
             request.limit_exceeded = True
-            request.limit_details = {
-                'subscription_type': subscription_type,
-                'current_count': current_website_count,
-                'max_websites': max_websites,
-                'remaining': 0
-            }
+            # DRF bu mesajı 403 cevabının gövdesi olarak kullanır (bkz. WebsiteViewSet.permission_denied)
+            self.message = website_limit_error(limit_details)
             
-            logger.warning(f"User {request.user.id} has exceeded website limit: {current_website_count}/{max_websites} ({subscription_type})")
+            logger.warning(f"User {request.user.id} has exceeded website limit: {limit_details['current_count']}/{limit_details['max_websites']} ({limit_details['subscription_type']})")
             return False
-        else:
-            # Limit bilgilerini request'e ekle
-            request.limit_details = {
-                'subscription_type': subscription_type,
-                'current_count': current_website_count,
-                'max_websites': max_websites,
-                'remaining': max_websites - current_website_count
-            }
-            
-            logger.debug(f"User {request.user.id} website creation allowed: {current_website_count}/{max_websites} ({subscription_type})")
-            return True
+        
+        logger.debug(f"User {request.user.id} website creation allowed: {limit_details['current_count']}/{limit_details['max_websites']} ({limit_details['subscription_type']})")
+        return True
+
+
+class WebsiteLimitPermissionDenied(PermissionDenied):
+    """
+    Limit aşımı 403'ü: detail dict'i olduğu gibi döner (sayılar string'e çevrilmez)
+    """
+    
+    def __init__(self, detail):
+        super().__init__()
+        self.detail = detail
+
+
+def website_limit_error(limit_details):
+    """
+    Limit aşıldığında dönen 403 gövdesi
+    """
+    subscription_type = limit_details.get('subscription_type', 'free')
+    max_websites = limit_details.get('max_websites', 2)
+    
+    # Plan önerisi mesajları
+    upgrade_messages = {
+        'free': "Upgrade to Basic (5 websites) or Premium (20 websites) to create more!",
+        'basic': "Upgrade to Premium (20 websites) to create more!"
+    }
+    
+    error_message = f"You've reached your {subscription_type} plan limit of {max_websites} websites."
+    upgrade_message = upgrade_messages.get(subscription_type, "")
+    if upgrade_message:
+        error_message += f" {upgrade_message}"
+    
+    return {
+        "error": error_message,
+        "limit_exceeded": True,
+        "subscription_type": subscription_type,
+        "current_count": limit_details.get('current_count', 0),
+        "max_websites": max_websites,
+        "upgrade_required": subscription_type != 'premium'
+    }
 
 class CanAccessWebsite(BasePermission):
     """
@@ -66,8 +82,8 @@ class CanAccessWebsite(BasePermission):
     """
     
     def has_object_permission(self, request, view, obj):
-        # Website'in sahibi mi kontrol et
-        return obj.user == request.user
+        # Website'in sahibi mi kontrol et (user_id ile, ekstra sorgu yapmadan)
+        return obj.user_id == request.user.id
 
 class CanUpgradeSubscription(BasePermission):
     """
@@ -93,7 +109,8 @@ def get_user_plan_info(user):
     """
     Kullanıcının plan bilgilerini döndürür
     """
-    subscription_type = getattr(user, 'subscription_type', 'free')
+    quota = get_website_quota_service().get_quota(user)
+    subscription_type = quota['subscription_type']
     
     plan_info = {
         'subscription_type': subscription_type,
@@ -101,12 +118,10 @@ def get_user_plan_info(user):
         'is_basic': subscription_type == 'basic', 
         'is_premium': subscription_type == 'premium',
         'limits': {
-            'free': {'websites': 2},
-            'basic': {'websites': 5},
-            'premium': {'websites': 20}
-        }[subscription_type],
+            'websites': quota['max_websites']
+        },
         'current_usage': {
-            'websites': user.websites.count()
+            'websites': quota['current_count']
         }
     }
     
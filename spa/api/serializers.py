@@ -1,9 +1,13 @@
 #core/spa/api/serializers.py
 from rest_framework import serializers
-from spa.models import Website, UploadedImage, WebsiteDesignPlan
+from spa.models import Website, UploadedImage, WebsiteDesignPlan, WebsiteRevision
+from spa.api.mixins import SparseFieldsetMixin
 
 # In serializers.py
-class WebsiteSerializer(serializers.ModelSerializer):
+class WebsiteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Model property'leri (ContentBlob), ModelSerializer bunları otomatik yazılabilir yapmaz
+    prompt = serializers.CharField(style={'base_template': 'textarea.html'})
+    html_content = serializers.CharField(style={'base_template': 'textarea.html'})
     
     class Meta:
         model = Website
@@ -11,14 +15,28 @@ class WebsiteSerializer(serializers.ModelSerializer):
             'id', 'title', 'prompt', 'html_content','contact_email',
             'primary_color', 'secondary_color', 'accent_color', 'background_color',
             'theme', 'heading_font', 'body_font', 'corner_radius',
-            'created_at', 'updated_at', 'custom_styles', 'element_contents',
+            'created_at', 'updated_at', 'custom_styles', 'element_contents', 'custom_css_hash',
             'original_user_prompt', 'business_context','custom_domain','custom_domain_verified'  # YENİ ALANLAR EKLE
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'custom_css_hash']
+
+
+class WebsiteListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Dashboard listesi için hafif serializer (html_content, prompt, JSON alanları yok)"""
     
+    class Meta:
+        model = Website
+        fields = [
+            'id', 'title', 'contact_email',
+            'primary_color', 'secondary_color', 'accent_color', 'background_color',
+            'theme', 'heading_font', 'body_font', 'corner_radius',
+            'created_at', 'updated_at', 'custom_domain', 'custom_domain_verified'
+        ]
+        read_only_fields = fields
 
 
 class WebsiteCreateSerializer(serializers.ModelSerializer):
+    prompt = serializers.CharField(style={'base_template': 'textarea.html'})
     contact_email = serializers.EmailField(required=False, allow_blank=True)
     primary_color = serializers.CharField(required=False, allow_blank=True)
     secondary_color = serializers.CharField(required=False, allow_blank=True)
@@ -108,17 +126,61 @@ class WebsiteCreateSerializer(serializers.ModelSerializer):
 
 class UploadedImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
     
     class Meta:
         model = UploadedImage
-        fields = ['id', 'title', 'image', 'image_url', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_at', 'image_url']
+        fields = [
+            'id', 'title', 'image', 'image_url', 'thumbnail_url', 'uploaded_at',
+            'width', 'height', 'dominant_color', 'blurhash', 'variants'
+        ]
+        read_only_fields = [
+            'id', 'uploaded_at', 'image_url', 'thumbnail_url',
+            'width', 'height', 'dominant_color', 'blurhash', 'variants'
+        ]
+    
+    def _absolute(self, url):
+        request = self.context.get('request')
+        if url and request:
+            return request.build_absolute_uri(url)
+        return url
     
     def get_image_url(self, obj):
         request = self.context.get('request')
         if obj.image and hasattr(obj.image, 'url') and request:
             return request.build_absolute_uri(obj.image.url)
         return None
+    
+    def get_variants(self, obj):
+        """{'thumb': {'width', 'height', 'webp': url, 'jpeg'|'png': url}, ...}"""
+        from spa.services.image_variant_service import ImageVariantService
+        variants = ImageVariantService.variant_urls(obj)
+        for variant in variants.values():
+            for key, value in variant.items():
+                if isinstance(value, str):
+                    variant[key] = self._absolute(value)
+        return variants
+    
+    def get_thumbnail_url(self, obj):
+        """Galeri için küçük WebP, varyant yoksa orijinal"""
+        thumb = (obj.variants or {}).get('thumb')
+        if thumb and thumb.get('webp'):
+            from django.core.files.storage import default_storage
+            return self._absolute(default_storage.url(thumb['webp']['path']))
+        return self.get_image_url(obj)
+
+class WebsiteRevisionSerializer(serializers.ModelSerializer):
+    """Revizyon listesi (içerik/delta yok)"""
+    is_snapshot = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = WebsiteRevision
+        fields = [
+            'id', 'number', 'source', 'summary', 'size', 'is_snapshot',
+            'content_digest', 'created_by', 'created_at'
+        ]
+        read_only_fields = fields
 
 class WebsiteDesignPlanSerializer(serializers.ModelSerializer):
     class Meta:
@@ -150,6 +212,46 @@ class ElementStyleSerializer(serializers.Serializer):
     element_id = serializers.CharField(max_length=100, required=False)
 
 
+class ElementPatchSerializer(serializers.Serializer):
+    """
+    Toplu element patch'i:
+    styles: {element_id: {property: value | null} | null}, contents: {element_id: text | null}
+    null değerler ilgili özelliği / elementi siler.
+    """
+    MAX_ELEMENTS = 500
+
+    styles = serializers.DictField(child=serializers.JSONField(allow_null=True), required=False, default=dict)
+    contents = serializers.DictField(child=serializers.CharField(allow_null=True, allow_blank=True), required=False, default=dict)
+
+    def validate_styles(self, value):
+        for element_id, properties in value.items():
+            if len(element_id) > 100:
+                raise serializers.ValidationError(f"Element id too long: {element_id[:20]}...")
+            if properties is None:
+                continue
+            if not isinstance(properties, dict):
+                raise serializers.ValidationError(f"Styles of '{element_id}' must be an object or null")
+            for property_name, property_value in properties.items():
+                if len(property_name) > 50:
+                    raise serializers.ValidationError(f"Property name too long: {property_name[:20]}...")
+                if property_value is not None and (not isinstance(property_value, str) or len(property_value) > 200):
+                    raise serializers.ValidationError(f"Invalid value for '{element_id}.{property_name}'")
+        return value
+
+    def validate_contents(self, value):
+        for element_id in value:
+            if len(element_id) > 100:
+                raise serializers.ValidationError(f"Element id too long: {element_id[:20]}...")
+        return value
+
+    def validate(self, data):
+        element_count = len(data.get('styles', {})) + len(data.get('contents', {}))
+        if element_count == 0:
+            raise serializers.ValidationError("Nothing to update: provide 'styles' and/or 'contents'")
+        if element_count > self.MAX_ELEMENTS:
+            raise serializers.ValidationError(f"Too many elements in one patch (max {self.MAX_ELEMENTS})")
+        return data
+
 
 class AIStructuralEditSerializer(serializers.Serializer):
     """Serializer for AI structural edit requests"""
@@ -0,0 +1,30 @@
+# spa/api/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from spa.api.http_cache import bump_version
+from spa.models import UploadedImage, Website
+from spa.services.quota_service import get_website_quota_service
+
+
+@receiver(post_save, sender=Website)
+def increment_website_count(sender, instance, created, **kwargs):
+    """Yeni website commit edildiğinde kullanıcının website sayacını artırır"""
+    if created:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: get_website_quota_service().increment(user_id))
+
+
+@receiver(post_delete, sender=Website)
+def decrement_website_count(sender, instance, **kwargs):
+    """Website silindiğinde kullanıcının website sayacını azaltır"""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: get_website_quota_service().decrement(user_id))
+
+
+@receiver(post_save, sender=UploadedImage)
+@receiver(post_delete, sender=UploadedImage)
+def bump_website_images_version(sender, instance, **kwargs):
+    """Görsel eklenince/güncellenince/silinince images endpoint'inin ETag'ini geçersiz kılar"""
+    website_id = instance.website_id
+    transaction.on_commit(lambda: bump_version('website_images', website_id))
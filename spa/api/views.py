@@ -6,18 +6,26 @@ from google import genai
 from openai import OpenAI
 from google.genai import types
 from django.conf import settings
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from spa.api.approve_plan_prompt import generate_enhanced_prompt
-from spa.api.permissions import CanAccessWebsite, CanCreateWebsite, get_user_plan_info
-from spa.models import Website, UploadedImage, WebsiteDesignPlan
+from spa.api.permissions import (
+    CanAccessWebsite, CanCreateWebsite, get_user_plan_info,
+    WebsiteLimitPermissionDenied, website_limit_error
+)
+from spa.services.quota_service import get_website_quota_service, WebsiteLimitExceeded
+from spa.models import Website, UploadedImage, WebsiteDesignPlan, WebsiteRevision
 from .serializers import (
     WebsiteSerializer, 
+    WebsiteListSerializer,
     WebsiteCreateSerializer, 
     UploadedImageSerializer,
     WebsiteDesignPlanSerializer,
+    WebsiteRevisionSerializer,
+    ElementPatchSerializer,
     AnalyzePromptSerializer,
     UpdatePlanSerializer
 )
@@ -29,12 +37,15 @@ from playwright.async_api import async_playwright
 import tempfile
 import os
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
 import asyncio
 from asgiref.sync import sync_to_async
 from concurrent.futures import ThreadPoolExecutor
 import threading
 from spa.tasks import *
-from .pagination import StandardResultsSetPagination  # Import pagination
+from .pagination import CursorResultsSetPagination  # Import pagination
+from .mixins import SparseFieldsetQuerysetMixin
 
 import asyncio
 import json
@@ -43,6 +54,12 @@ import json
 from spa.services.direct_business_extractor import get_direct_business_extractor
 from spa.services.focused_query_generator import get_focused_query_generator
 from spa.services.streamlined_photo_service import get_streamlined_photo_service
+from spa.services.direct_upload_service import get_direct_upload_service
+from spa.services.revision_service import get_website_revision_service, RevisionIntegrityError
+from spa.services.render_service import get_website_render_service
+from spa.services.element_patch_service import get_element_patch_service
+from spa.utils.html_index import format_structure_summary, get_html_index, get_website_html_index
+from .http_cache import conditional_response, get_version, make_etag
 from asgiref.sync import sync_to_async
 from typing import Dict, List
 
@@ -79,19 +96,17 @@ class LineBasedAIEditor:
         self.line_map = {}
         
 
-    def prepare_line_context(self, html_content, user_request):
+    def prepare_line_context(self, html_content, user_request, html_index=None):
         """Prepare smart line-numbered HTML context for AI"""
         
         # Split HTML into lines
         self.html_lines = html_content.split('\n')
         
         # Create line mapping with numbers
-        numbered_html = ""
-        for i, line in enumerate(self.html_lines, 1):
-            numbered_html += f"{i:4d}: {line}\n"
+        numbered_html = ''.join(f"{i:4d}: {line}\n" for i, line in enumerate(self.html_lines, 1))
         
-        # Quick structure analysis
-        structure_info = self._analyze_html_structure()
+        # Quick structure analysis (revizyon başına bir kez oluşturulan yapı indeksinden)
+        structure_info = self._analyze_html_structure(html_index or get_html_index(html_content))
         
         ai_prompt = f"""
     You are an expert HTML/CSS editor with structural awareness. You understand component relationships and never break functional structures.
@@ -158,78 +173,11 @@ class LineBasedAIEditor:
         
         return ai_prompt
 
-    def _analyze_html_structure(self):
+    def _analyze_html_structure(self, html_index=None):
         """Analyze HTML structure for AI context"""
-        structure = {
-            'sections': [],
-            'forms': [],
-            'scripts': [],
-            'total_lines': len(self.html_lines)
-        }
-        
-        current_section = None
-        in_script = False
-        in_form = False
-        
-        for i, line in enumerate(self.html_lines, 1):
-            line_clean = line.strip()
-            
-            # Detect sections
-            if re.search(r'<(section|div)[^>]*id=["\']([^"\']*)["\']', line_clean):
-                match = re.search(r'id=["\']([^"\']*)["\']', line_clean)
-                if match:
-                    section_id = match.group(1)
-                    structure['sections'].append({
-                        'id': section_id,
-                        'start_line': i,
-                        'type': 'section'
-                    })
-            
-            # Detect forms
-            if '<form' in line_clean:
-                match = re.search(r'id=["\']([^"\']*)["\']', line_clean)
-                form_id = match.group(1) if match else f'form_line_{i}'
-                structure['forms'].append({
-                    'id': form_id,
-                    'start_line': i,
-                    'type': 'form'
-                })
-                in_form = True
-            elif '</form>' in line_clean and in_form:
-                if structure['forms']:
-                    structure['forms'][-1]['end_line'] = i
-                in_form = False
-            
-            # Detect scripts
-            if '<script' in line_clean:
-                structure['scripts'].append({
-                    'start_line': i,
-                    'type': 'script'
-                })
-                in_script = True
-            elif '</script>' in line_clean and in_script:
-                if structure['scripts']:
-                    structure['scripts'][-1]['end_line'] = i
-                in_script = False
-        
-        # Format structure info for AI
-        info = f"Total Lines: {structure['total_lines']}\n"
-        info += f"Sections Found: {len(structure['sections'])}\n"
-        
-        for section in structure['sections']:
-            info += f"  - {section['id']}: starts at line {section['start_line']}\n"
-        
-        info += f"Forms Found: {len(structure['forms'])}\n"
-        for form in structure['forms']:
-            end_info = f" to {form.get('end_line', '?')}" if 'end_line' in form else ""
-            info += f"  - {form['id']}: lines {form['start_line']}{end_info}\n"
-        
-        info += f"Script Blocks: {len(structure['scripts'])}\n"
-        for script in structure['scripts']:
-            end_info = f" to {script.get('end_line', '?')}" if 'end_line' in script else ""
-            info += f"  - Script: lines {script['start_line']}{end_info}\n"
-        
-        return info
+        if html_index is None:
+            html_index = get_html_index('\n'.join(self.html_lines))
+        return format_structure_summary(html_index)
     
     def apply_line_changes(self, line_changes):
         """Apply line-based changes to HTML content"""
@@ -282,10 +230,11 @@ class LineBasedAIEditor:
 
 
 
-class WebsiteViewSet(viewsets.ModelViewSet):
+class WebsiteViewSet(SparseFieldsetQuerysetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
-    pagination_class = StandardResultsSetPagination  # Pagination ekleyin  
+    pagination_class = CursorResultsSetPagination  # Keyset pagination (created_at, id)
     permission_classes = [IsAuthenticated, CanAccessWebsite]  
+    always_loaded_fields = ('user', 'created_at')
 
     def get_permissions(self):
         """
@@ -300,56 +249,42 @@ class WebsiteViewSet(viewsets.ModelViewSet):
         
         return [permission() for permission in permission_classes]
 
+    def permission_denied(self, request, message=None, code=None):
+        """
+        CanCreateWebsite limit aşımında detaylı mesajı (dict) 403 gövdesi olarak döndür
+        """
+        if isinstance(message, dict) and message.get('limit_exceeded'):
+            raise WebsiteLimitPermissionDenied(message)
+        super().permission_denied(request, message=message, code=code)
+
     def create(self, request, *args, **kwargs):
         """
-        Website oluşturma - permission kontrolü ile
+        Website oluşturma - permission kontrolü initial()'da yapılır,
+        kayıt kullanıcı satırı kilitliyken (limit yarışına karşı) oluşturulur
         """
-        # Permission kontrolü otomatik yapılır, ama manuel kontrol de yapabilirsin
-        perms = [permission() for permission in self.get_permissions()]
-        
-        for perm in perms:
-            if not perm.has_permission(request, self):
-                # Eğer limit aşıldıysa özel mesaj döndür
-                if hasattr(request, 'limit_exceeded') and request.limit_exceeded:
-                    limit_details = getattr(request, 'limit_details', {})
-                    subscription_type = limit_details.get('subscription_type', 'free')
-                    current_count = limit_details.get('current_count', 0)
-                    max_websites = limit_details.get('max_websites', 2)
-                    
-                    # Plan önerisi mesajları
-                    upgrade_messages = {
-                        'free': "Upgrade to Basic (5 websites) or Premium (20 websites) to create more!",
-                        'basic': "Upgrade to Premium (20 websites) to create more!"
-                    }
-                    
-                    error_message = f"You've reached your {subscription_type} plan limit of {max_websites} websites."
-                    upgrade_message = upgrade_messages.get(subscription_type, "")
-                    
-                    if upgrade_message:
-                        error_message += f" {upgrade_message}"
-                    
-                    return Response({
-                        "error": error_message,
-                        "limit_exceeded": True,
-                        "subscription_type": subscription_type,
-                        "current_count": current_count,
-                        "max_websites": max_websites,
-                        "upgrade_required": subscription_type != 'premium'
-                    }, status=status.HTTP_403_FORBIDDEN)
-                
-                # Diğer permission hataları
-                return Response({
-                    "error": "You don't have permission to perform this action."
-                }, status=status.HTTP_403_FORBIDDEN)
-        
-        # Permission geçtiyse normal create işlemi
-        return super().create(request, *args, **kwargs)
+        try:
+            with get_website_quota_service().reserve(request.user):
+                return super().create(request, *args, **kwargs)
+        except WebsiteLimitExceeded as e:
+            raise WebsiteLimitPermissionDenied(website_limit_error(e.quota))
 
     def get_queryset(self):
-        return Website.objects.filter(user=self.request.user)
+        queryset = Website.objects.filter(user=self.request.user)
+        return self.restrict_queryset_columns(queryset)
     
     def get_serializer_class(self):
+        if self.action == 'list':
+            return WebsiteListSerializer
         return WebsiteSerializer
+
+    def perform_update(self, serializer):
+        """PUT/PATCH ile HTML değişirse revizyon kaydı aç"""
+        previous_html = serializer.instance.html_content if 'html_content' in serializer.validated_data else None
+        website = serializer.save()
+        if previous_html is not None:
+            get_website_revision_service().record(
+                website, website.html_content, 'manual', 'Manual HTML update', self.request.user, previous_html=previous_html
+            )
     
     def list(self, request, *args, **kwargs):
         """
@@ -423,15 +358,23 @@ class WebsiteViewSet(viewsets.ModelViewSet):
         """
         Kullanıcının plan bilgilerini döndürür
         """
-        plan_info = get_user_plan_info(request.user)
+        user = request.user
+        quota = get_website_quota_service().get_quota(user)
+        etag = make_etag(
+            'plan_info', user.id, quota['subscription_type'], quota['current_count'], quota['max_websites'],
+            user.subscription_expiry, settings.LEMON_SQUEEZY_CHECKOUT_URL_BASIC, settings.LEMON_SQUEEZY_CHECKOUT_URL_PREMIUM
+        )
+        
+        def build_response():
+            return Response({
+                'plan_info': get_user_plan_info(user),
+                'checkout_urls': {
+                    'basic': settings.LEMON_SQUEEZY_CHECKOUT_URL_BASIC,
+                    'premium': settings.LEMON_SQUEEZY_CHECKOUT_URL_PREMIUM
+                }
+            })
         
-        return Response({
-            'plan_info': plan_info,
-            'checkout_urls': {
-                'basic': settings.LEMON_SQUEEZY_CHECKOUT_URL_BASIC,
-                'premium': settings.LEMON_SQUEEZY_CHECKOUT_URL_PREMIUM
-            }
-        })
+        return conditional_response(request, etag, build_response)
 
 
     @action(detail=False, methods=['post'], url_path='update-plan/(?P<plan_id>[^/.]+)')
@@ -498,9 +441,11 @@ class WebsiteViewSet(viewsets.ModelViewSet):
             result = task.get(timeout=150)  # Wait max 2.5 minutes
             
             if result.get('success'):
-                return Response({
+                response_data = {
                     'success': True,
-                    'modified_html': result['modified_html'],
+                    'revision': result.get('revision'),
+                    'html_digest': result.get('html_digest'),
+                    'hunks': result.get('hunks', []),
                     'analysis': result['analysis'],
                     'changes_applied': result['changes_applied'],
                     'summary': result['summary'],
@@ -508,7 +453,12 @@ class WebsiteViewSet(viewsets.ModelViewSet):
                     'original_html_length': result['original_html_length'],
                     'modified_html_length': result['modified_html_length'],
                     'database_save_verified': True
-                }, status=status.HTTP_200_OK)
+                }
+                # Tam HTML sadece istenirse (include_html=true), sonuç backend'inden değil DB'den
+                if str(request.data.get('include_html', '')).lower() in ('1', 'true', 'yes'):
+                    website.refresh_from_db(fields=['html_blob', 'html_size'])
+                    response_data['modified_html'] = website.html_content
+                return Response(response_data, status=status.HTTP_200_OK)
             else:
                 return Response({
                     'error': result.get('error', 'AI edit task failed'),
@@ -586,7 +536,7 @@ class WebsiteViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def upload_image(self, request, pk=None):
-        """Upload and process image - BACKGROUND VERSION (FIXED)"""
+        """Upload and process image - BACKGROUND VERSION (storage key ile)"""
         website = self.get_object()
         
         try:
@@ -594,32 +544,27 @@ class WebsiteViewSet(viewsets.ModelViewSet):
             if not image_file:
                 return Response({"error": "No image file provided"}, status=status.HTTP_400_BAD_REQUEST)
             
-            title = request.data.get('title', image_file.name)
-            
-            # 1. Dosyanın içeriğini oku ve Base64'e çevir.
-            image_content = image_file.read()
-            image_base64 = base64.b64encode(image_content).decode('utf-8')
+            upload_service = get_direct_upload_service()
+            error = upload_service.validate(image_file.content_type, image_file.size)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
             
-            # 2. Celery task'ine JSON uyumlu bir dictionary yolla.
-            image_data_serializable = {
-                'content_base64': image_base64,
-                'name': image_file.name,
-                'content_type': image_file.content_type,
-            }
+            title = request.data.get('title', image_file.name)
             
-            metadata = {'title': title}
+            # Dosya storage'a stream edilir; Celery'ye sadece key gider (broker'da base64 taşınmaz)
+            storage_name = default_storage.save(
+                upload_service.build_storage_name(image_file.name, image_file.content_type),
+                image_file
+            )
             
-            logger.info(f"🖼️ Image upload task starting: {image_file.name}")
+            logger.info(f"🖼️ Image upload task starting: {storage_name}")
             
-            # Arka plan görevini başlat (artık JSON uyumlu veri gönderiliyor)
-            task = upload_image_task.apply_async(
-                args=[image_data_serializable, metadata, request.user.id, website.id]
+            task = process_uploaded_image_task.apply_async(
+                args=[storage_name, {'title': title}, request.user.id, website.id]
             )
             
             logger.info(f"🚀 upload_image task started: {task.id} for website {website.id}")
             
-            # Not: task.get() burada beklemek yerine, görevin başladığına dair hemen yanıt dönebilirsin.
-            # Bu, frontend'in uzun süre beklemesini engeller.
             return Response({
                 'message': 'Image processing has started.',
                 'task_id': task.id
@@ -628,6 +573,70 @@ class WebsiteViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.exception(f"❌ Error in upload_image view: {str(e)}")
             return Response({'error': f"Failed to start image upload task: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=True, methods=['post'])
+    def upload_image_presign(self, request, pk=None):
+        """S3'e doğrudan yükleme için presigned POST üretir"""
+        website = self.get_object()
+        upload_service = get_direct_upload_service()
+        
+        if not upload_service.is_available():
+            return Response({
+                'error': 'Direct upload is not available, use upload_image instead'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        filename = request.data.get('filename', '').strip()
+        content_type = request.data.get('content_type', '').strip()
+        try:
+            size = int(request.data.get('size', 0))
+        except (TypeError, ValueError):
+            size = 0
+        
+        if not filename or not content_type or not size:
+            return Response({
+                'error': 'filename, content_type and size are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            result = upload_service.create_presigned_upload(
+                user_id=request.user.id,
+                website_id=website.id,
+                filename=filename,
+                content_type=content_type,
+                size=size,
+                title=request.data.get('title')
+            )
+        except Exception as e:
+            logger.exception(f"❌ Presigned upload creation failed: {str(e)}")
+            return Response({'error': f"Failed to create upload: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        if not result['success']:
+            return Response({'error': result['error']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(result, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def upload_image_complete(self, request, pk=None):
+        """Client S3 yüklemesini bitirdikten sonra işleme task'ını başlatır"""
+        website = self.get_object()
+        upload_id = request.data.get('upload_id', '').strip()
+        if not upload_id:
+            return Response({'error': 'upload_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        pending = get_direct_upload_service().pop_pending_upload(upload_id, request.user.id, website.id)
+        if not pending:
+            return Response({'error': 'Upload not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+        
+        task = process_uploaded_image_task.apply_async(
+            args=[pending['storage_name'], {'title': request.data.get('title') or pending['title']}, request.user.id, website.id]
+        )
+        
+        logger.info(f"🚀 Direct upload processing started: {task.id} for website {website.id}")
+        
+        return Response({
+            'message': 'Image processing has started.',
+            'task_id': task.id
+        }, status=status.HTTP_202_ACCEPTED)
     # Update the approve_plan method to use background photo generation
 
     @action(detail=False, methods=['post'])
@@ -775,11 +784,26 @@ class WebsiteViewSet(viewsets.ModelViewSet):
             return Response({'status': 'processing', 'progress': 'Generating website...'})
         elif result.state == 'SUCCESS':
             data = result.result
+            if not data.get('success'):
+                return Response({
+                    'status': 'failed',
+                    'error': data.get('error', 'Website creation failed'),
+                    'limit_exceeded': data.get('limit_exceeded', False),
+                    'limit_details': data.get('limit_details')
+                }, status=status.HTTP_403_FORBIDDEN if data.get('limit_exceeded') else status.HTTP_500_INTERNAL_SERVER_ERROR)
+            
+            # Büyük alanlar sonuçta taşınmaz: business_context Website'ten, görseller generation cache'inden
+            from spa.tasks import _get_from_cache
+            website = Website.objects.filter(id=data['website_id'], user=request.user).only('id', 'business_context').first()
+            if website is None:
+                return Response({'error': 'Website not found'}, status=status.HTTP_404_NOT_FOUND)
+            cached_generation = _get_from_cache(data['generation_cache_key']) if data.get('generation_cache_key') else None
+            
             return Response({
                 'status': 'completed',
-                'website_id': data['website_id'],
-                'business_context': data['business_context'],
-                'context_images': data['context_images'],
+                'website_id': website.id,
+                'business_context': website.business_context,
+                'context_images': (cached_generation or {}).get('context_images', {}),
                 'color_palette': data['color_palette'],
                 'image_generation_method': data['image_generation_method'],
                 'processing_time': data['processing_time']
@@ -844,26 +868,25 @@ class WebsiteViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def preview(self, request, pk=None):
         website = self.get_object()
-        email = website.contact_email or website.user.email
-        
-        html_content = website.html_content
-        
-        # EmailJS keys'leri replace et
-        html_content = html_content.replace('{{YOUR_EMAIL_JS_PUBLIC_KEY}}', settings.YOUR_EMAIL_JS_PUBLIC_KEY)
-        html_content = html_content.replace('{{ YOUR_EMAIL_JS_PUBLIC_KEY }}', settings.YOUR_EMAIL_JS_PUBLIC_KEY)
-        html_content = html_content.replace('YOUR_EMAIL_JS_PUBLIC_KEY', settings.YOUR_EMAIL_JS_PUBLIC_KEY)
-        
-        html_content = html_content.replace('{{YOUR_EMAIL_JS_SERVICE_ID}}', settings.YOUR_EMAIL_JS_SERVICE_ID)
-        html_content = html_content.replace('{{ YOUR_EMAIL_JS_SERVICE_ID }}', settings.YOUR_EMAIL_JS_SERVICE_ID)
-        html_content = html_content.replace('YOUR_EMAIL_JS_SERVICE_ID', settings.YOUR_EMAIL_JS_SERVICE_ID)
-        
-        html_content = html_content.replace('{{YOUR_EMAIL_JS_TEMPLATE_ID}}', settings.YOUR_EMAIL_JS_TEMPLATE_ID)
-        html_content = html_content.replace('{{ YOUR_EMAIL_JS_TEMPLATE_ID }}', settings.YOUR_EMAIL_JS_TEMPLATE_ID)
-        html_content = html_content.replace('YOUR_EMAIL_JS_TEMPLATE_ID', settings.YOUR_EMAIL_JS_TEMPLATE_ID)
-        
-        html_content = html_content.replace("USER_EMAIL_PLACEHOLDER", email)
-        
-        return Response({'html_content': html_content})
+        return self._preview_response(request, website, with_styles=False)
+
+    def _preview_response(self, request, website, with_styles):
+        """
+        Render edilmiş HTML: değişmediyse 304 (ETag = render cache anahtarı),
+        ?output=html ile JSON yerine doğrudan text/html
+        """
+        render_service = get_website_render_service()
+        as_html = request.query_params.get('output') == 'html'
+        render_key = render_service.render_cache_key(website, with_styles)
+        etag = make_etag(render_key, 'html' if as_html else 'json') if render_key else None
+        
+        def build_response():
+            html_content = render_service.render(website, with_styles=with_styles)
+            if as_html:
+                return HttpResponse(html_content, content_type='text/html; charset=utf-8')
+            return Response({'html_content': html_content})
+        
+        return conditional_response(request, etag, build_response)
     
 
         
@@ -871,16 +894,27 @@ class WebsiteViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def images(self, request, pk=None):
         website = self.get_object()
-        images = UploadedImage.objects.filter(website=website, user=request.user)
-        serializer = UploadedImageSerializer(images, many=True, context={'request': request})
-        return Response(serializer.data)
+        # Versiyon UploadedImage kaydı/silinmesinde artar (spa/api/signals.py)
+        version = get_version('website_images', website.pk)
+        etag = make_etag('images', website.pk, version, request.get_host()) if version is not None else None
+        
+        def build_response():
+            images = UploadedImage.objects.filter(website=website, user=request.user)
+            serializer = UploadedImageSerializer(images, many=True, context={'request': request})
+            return Response(serializer.data)
+        
+        return conditional_response(request, etag, build_response)
     
     @action(detail=True, methods=['put', 'patch'])
     def update_html(self, request, pk=None):
         try:
             website = self.get_object()
+            previous_html = website.html_content
             website.html_content = request.data.get('html_content', website.html_content)
             website.save()
+            get_website_revision_service().record(
+                website, website.html_content, 'manual', 'Manual HTML update', request.user, previous_html=previous_html
+            )
             return Response(WebsiteSerializer(website).data)
         except Exception as e:
             logger.exception(f"Error updating website HTML: {str(e)}")
@@ -888,84 +922,165 @@ class WebsiteViewSet(viewsets.ModelViewSet):
                 'error': f"Failed to update website HTML: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+    @action(detail=True, methods=['get'])
+    def revisions(self, request, pk=None):
+        """HTML revizyon geçmişi (en yeni önce)"""
+        website = self.get_object()
+        revisions = WebsiteRevision.objects.filter(website=website).defer('delta')
+        
+        page = self.paginate_queryset(revisions)
+        if page is not None:
+            serializer = WebsiteRevisionSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(WebsiteRevisionSerializer(revisions, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def revision_diff(self, request, pk=None):
+        """İki revizyon arasındaki unified diff (?from=&to=, varsayılan: son değişiklik)"""
+        website = self.get_object()
+        service = get_website_revision_service()
+        
+        try:
+            latest = service.latest(website.pk)
+            to_number = int(request.query_params.get('to', latest.number if latest else 0))
+            from_number = int(request.query_params.get('from', to_number - 1))
+        except (TypeError, ValueError):
+            return Response({'error': 'from and to must be revision numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            return Response(service.diff(website, from_number, to_number))
+        except WebsiteRevision.DoesNotExist:
+            return Response({'error': 'Revision not found'}, status=status.HTTP_404_NOT_FOUND)
+        except RevisionIntegrityError as e:
+            logger.error(f"❌ {str(e)}")
+            return Response({'error': 'Revision data is corrupted'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     @action(detail=True, methods=['post'])
-    def update_element_style(self, request, pk=None):
-        """Tek element stil güncelleme - CSS çakışması olmadan"""
+    def restore_revision(self, request, pk=None):
+        """Eski bir revizyonu geri yükle (AI çağrısı olmadan undo)"""
         website = self.get_object()
         
         try:
-            element_selector = request.data.get('element_selector')
+            number = int(request.data.get('revision'))
+        except (TypeError, ValueError):
+            return Response({'error': 'revision is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            revision = get_website_revision_service().restore(website, number, request.user)
+        except WebsiteRevision.DoesNotExist:
+            return Response({'error': 'Revision not found'}, status=status.HTTP_404_NOT_FOUND)
+        except RevisionIntegrityError as e:
+            logger.error(f"❌ {str(e)}")
+            return Response({'error': 'Revision data is corrupted'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        logger.info(f"✅ Website {website.id} restored to revision {number} (new revision {revision.number})")
+        return Response({
+            'success': True,
+            'restored_from': number,
+            'revision': WebsiteRevisionSerializer(revision).data,
+            'website': WebsiteSerializer(website).data
+        })
+
+    @action(detail=True, methods=['post'])
+    def patch_elements(self, request, pk=None):
+        """
+        Birden fazla elementin stil/içerik değişikliğini tek istekte, atomik olarak uygular.
+        Website satırı okunmadan güncellenir; eşzamanlı düzenlemeler birbirini ezmez.
+        """
+        serializer = ElementPatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        styles = serializer.validated_data['styles']
+        contents = serializer.validated_data['contents']
+        if not get_element_patch_service().apply(pk, request.user.id, styles=styles, contents=contents):
+            return Response({'error': 'Website not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'success': True,
+            'styles_updated': len(styles),
+            'contents_updated': len(contents)
+        })
+
+    @action(detail=True, methods=['post'])
+    def update_element_style(self, request, pk=None):
+        """Tek element stil güncelleme - CSS çakışması olmadan"""
+        try:
             property_name = request.data.get('property')
             value = request.data.get('value')
             element_id = request.data.get('element_id', f'custom-{timezone.now().timestamp()}')
-            
-            # Custom styles JSON'ını güncelle
-            custom_styles = website.custom_styles or {}
-            
-            if element_id not in custom_styles:
-                custom_styles[element_id] = {}
-            
-            custom_styles[element_id][property_name] = value
-            
-            # Website'e kaydet
-            website.custom_styles = custom_styles
-            website.save(update_fields=['custom_styles'])
-            
+
+            if not property_name:
+                return Response({'error': 'property is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Sadece bu özellik birleştirilir; diğer elementlerin stilleri okunup yeniden yazılmaz
+            styles = {element_id: {property_name: value}}
+            if not get_element_patch_service().apply(pk, request.user.id, styles=styles):
+                return Response({'error': 'Website not found'}, status=status.HTTP_404_NOT_FOUND)
+
             logger.info(f"Style updated: {element_id} -> {property_name}: {value}")
-            
+
             return Response({
                 'success': True,
                 'element_id': element_id,
                 'property': property_name,
                 'value': value
             })
-            
+
         except Exception as e:
             logger.error(f"Style update error: {str(e)}")
             return Response({
                 'error': f"Style update failed: {str(e)}"
             }, status=status.HTTP_400_BAD_REQUEST)
-        
+
     @action(detail=True, methods=['post'])
     def update_element_content(self, request, pk=None):
         """Text content güncelleme endpoint'i"""
-        website = self.get_object()
-        
         try:
             element_id = request.data.get('element_id')
             content = request.data.get('content', '')
-            
-            # Element content mapping'ini tut
-            element_contents = getattr(website, 'element_contents', {})
-            if isinstance(element_contents, str):
-                element_contents = json.loads(element_contents)
-            
-            element_contents[element_id] = content
-            
-            # Website'e kaydet (yeni alan gerekebilir)
-            website.element_contents = element_contents
-            website.save(update_fields=['element_contents'])
-            
-            logger.info(f"Content updated: {element_id} -> {content[:50]}...")
-            
+
+            if not element_id:
+                return Response({'error': 'element_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if not get_element_patch_service().apply(pk, request.user.id, contents={element_id: content}):
+                return Response({'error': 'Website not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            logger.info(f"Content updated: {element_id} -> {(content or '')[:50]}...")
+
             return Response({
                 'success': True,
                 'element_id': element_id,
                 'content': content
             })
-            
+
         except Exception as e:
             logger.error(f"Content update error: {str(e)}")
             return Response({
                 'error': f"Content update failed: {str(e)}"
             }, status=status.HTTP_400_BAD_REQUEST)
-  
+
     @action(detail=True, methods=['get'])
     def preview_with_styles(self, request, pk=None):
         """Custom styles ile preview - sadece görüntüleme için"""
         website = self.get_object()
-        html_content = website.apply_all_customizations_safe()  # Safe version
-        return Response({'html_content': html_content})
+        return self._preview_response(request, website, with_styles=True)
+
+    @action(detail=True, methods=['get'])
+    def custom_css(self, request, pk=None):
+        """
+        Derlenmiş custom styles stylesheet'i (text/css). ETag = custom_css_hash;
+        ?v=<custom_css_hash> ile istenirse içerik değişmeyeceği için uzun süre cache'lenebilir.
+        """
+        website = self.get_object()
+        etag = make_etag('custom_css', website.pk, website.custom_css_hash)
+        immutable = bool(website.custom_css_hash) and request.query_params.get('v') == website.custom_css_hash
+        max_age = getattr(settings, 'CUSTOM_CSS_IMMUTABLE_MAX_AGE', 60 * 60 * 24 * 365) if immutable else 0
+
+        def build_response():
+            return HttpResponse(website.custom_css, content_type='text/css; charset=utf-8')
+
+        return conditional_response(request, etag, build_response, max_age=max_age)
     
 
     # Add this to check API key
@@ -991,58 +1106,61 @@ class WebsiteViewSet(viewsets.ModelViewSet):
     def debug_html_content(self, request, pk=None):
         """Debug endpoint to check current HTML content"""
         website = self.get_object()
+        html_index = get_website_html_index(website)
+        html_content = website.html_content
         
-        html_lines = website.html_content.split('\n')
-        
-        # Find title tag
-        title_line = next((line for line in html_lines if '<title>' in line.lower()), 'No title found')
-        
-        # Extract title content if found
-        title_content = 'No title'
-        if '<title>' in title_line.lower():
-            try:
-                import re
-                title_match = re.search(r'<title[^>]*>(.*?)</title>', title_line, re.IGNORECASE)
-                if title_match:
-                    title_content = title_match.group(1).strip()
-            except:
-                title_content = 'Title extraction failed'
-        
-        # Get meta description if exists
-        meta_description = next((line for line in html_lines if 'meta' in line.lower() and 'description' in line.lower()), 'No meta description')
+        # Sadece baş/son satırlar bölünür; sayım ve etiket bilgisi yapı indeksinden
+        first_lines = html_content.split('\n', 10)[:10]
+        last_lines = html_content.rsplit('\n', 10)[-10:]
+        tag_counts = html_index['tag_counts']
+        meta = html_index['meta']
+        title_content = html_index['title'] if html_index['title'] is not None else 'No title'
+        title_line = 'No title found'
+        if html_index['title_start'] is not None:
+            title_start = html_index['title_start']
+            line_end = html_content.find('\n', title_start)
+            title_line = html_content[html_content.rfind('\n', 0, title_start) + 1:line_end if line_end != -1 else None]
+        meta_description = meta.get('description', 'No meta description')
         
         # Count common HTML elements
         element_counts = {
-            'divs': website.html_content.count('<div'),
-            'sections': website.html_content.count('<section'),
-            'headers': website.html_content.count('<header'),
-            'footers': website.html_content.count('<footer'),
-            'images': website.html_content.count('<img'),
-            'links': website.html_content.count('<a '),
-            'buttons': website.html_content.count('<button'),
-            'forms': website.html_content.count('<form'),
+            'divs': tag_counts.get('div', 0),
+            'sections': tag_counts.get('section', 0),
+            'headers': tag_counts.get('header', 0),
+            'footers': tag_counts.get('footer', 0),
+            'images': tag_counts.get('img', 0),
+            'links': tag_counts.get('a', 0),
+            'buttons': tag_counts.get('button', 0),
+            'forms': tag_counts.get('form', 0),
         }
         
         return Response({
             'website_id': website.id,
             'title': website.title if hasattr(website, 'title') else 'No title field',
-            'html_length': len(website.html_content),
-            'total_lines': len(html_lines),
-            'first_10_lines': html_lines[:10],
-            'last_10_lines': html_lines[-10:],
+            'html_length': html_index['length'],
+            'total_lines': html_index['total_lines'],
+            'first_10_lines': first_lines,
+            'last_10_lines': last_lines,
             'title_tag': title_line[:100] + '...' if len(title_line) > 100 else title_line,
             'title_content': title_content,
             'meta_description': meta_description[:100] + '...' if len(meta_description) > 100 else meta_description,
             'element_counts': element_counts,
+            'structure': {
+                'sections': [section['id'] for section in html_index['sections']],
+                'forms': len(html_index['forms']),
+                'scripts': len(html_index['scripts']),
+                'styles': len(html_index['styles']),
+                'editable_elements': len(html_index['elements']),
+            },
             'html_preview': {
-                'starts_with': website.html_content[:200],
-                'ends_with': website.html_content[-200:],
+                'starts_with': html_content[:200],
+                'ends_with': html_content[-200:],
             },
             'last_modified': getattr(website, 'updated_at', 'Unknown'),
             'character_encoding_check': {
-                'has_utf8_meta': 'charset=utf-8' in website.html_content.lower() or 'charset="utf-8"' in website.html_content.lower(),
-                'has_viewport': 'viewport' in website.html_content.lower(),
-                'has_doctype': website.html_content.strip().startswith('<!DOCTYPE'),
+                'has_utf8_meta': meta.get('charset', '').lower() == 'utf-8' or 'charset=utf-8' in meta.get('content-type', '').lower(),
+                'has_viewport': 'viewport' in meta,
+                'has_doctype': html_index['has_doctype'],
             }
         })
     
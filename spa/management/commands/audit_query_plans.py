@@ -0,0 +1,89 @@
+# spa/management/commands/audit_query_plans.py
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+def build_query_catalogue():
+    """
+    Sıcak yollardaki gerçek ORM sorguları (view/servis/webhook'larda kullanılan
+    filtrelerin aynısı). Değerler sadece plan için, eşleşen satır olması gerekmez.
+    """
+    from deployment.models import VercelDeployment
+    from payments.models import Payment, Subscription
+    from spa.models import Website, WebsiteDesignPlan
+    from users.models import User
+
+    return [
+        ('users.email_verification', User.objects.filter(email_verification_token='token', email_verified=False)),
+        ('users.password_reset', User.objects.filter(password_reset_token='token')),
+        ('payments.subscription_by_lemon_id', Subscription.objects.filter(lemon_squeezy_subscription_id='1')),
+        ('payments.payment_by_order_id', Payment.objects.filter(lemon_squeezy_order_id='1')),
+        ('payments.history', Payment.objects.filter(user_id=1).order_by('-payment_date', '-id')[:12]),
+        ('spa.website_by_custom_domain', Website.objects.filter(custom_domain='example.com')),
+        ('spa.website_list', Website.objects.filter(user_id=1).order_by('-created_at', '-id')[:12]),
+        ('spa.website_count', Website.objects.filter(user_id=1).values('id')),
+        ('spa.design_plan', WebsiteDesignPlan.objects.filter(id=1, user_id=1)),
+        ('spa.design_plan_list', WebsiteDesignPlan.objects.filter(user_id=1).order_by('-created_at')[:12]),
+        ('deployment.ready_for_website', VercelDeployment.objects.filter(website_id=1, status='ready')[:1]),
+        ('deployment.latest_for_website', VercelDeployment.objects.filter(website_id=1).order_by('-created_at')[:1]),
+    ]
+
+
+def find_sequential_scans(plan: str, vendor: str):
+    """Plan çıktısındaki tam tablo taramalarını döndürür"""
+    if vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    if vendor == 'sqlite':
+        # "SCAN tablo" tam tarama; "SCAN tablo USING (COVERING) INDEX" indeks üzerinden
+        return [
+            match.group(1) for match in re.finditer(r'\bSCAN (\w+)(.*)', plan)
+            if 'USING' not in match.group(2)
+        ]
+    return []
+
+
+class Command(BaseCommand):
+    help = "Sıcak sorgu kataloğunu EXPLAIN ile çalıştırır ve sequential scan yapanları raporlar"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', dest='queries', help="Sadece bu isimli sorgu (birden fazla verilebilir)")
+        parser.add_argument('--verbose-plans', action='store_true', help="Her sorgunun tam planını yazdır")
+        parser.add_argument(
+            '--no-force-index', action='store_true',
+            help="Postgres'te enable_seqscan kapatılmadan planla (küçük tablolarda planner seq scan seçebilir)"
+        )
+        parser.add_argument('--fail-on-seq-scan', action='store_true', help="Sequential scan bulunursa hata koduyla çık (CI için)")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        catalogue = build_query_catalogue()
+        if options['queries']:
+            catalogue = [(name, qs) for name, qs in catalogue if name in options['queries']]
+            if not catalogue:
+                raise CommandError(f"Unknown query names: {', '.join(options['queries'])}")
+
+        offenders = []
+        with transaction.atomic():
+            if vendor == 'postgresql' and not options['no_force_index']:
+                # Boş/küçük tablolarda da kullanılabilir bir indeks olup olmadığını görmek için
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in catalogue:
+                plan = queryset.explain()
+                scans = find_sequential_scans(plan, vendor)
+                if scans:
+                    offenders.append(name)
+                    self.stdout.write(self.style.WARNING(f"⚠️ {name}: sequential scan on {', '.join(scans)}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"✅ {name}"))
+                if options['verbose_plans'] or scans:
+                    self.stdout.write(f"    {str(queryset.query)}")
+                    for line in plan.splitlines():
+                        self.stdout.write(f"    {line}")
+
+        self.stdout.write(f"{len(catalogue) - len(offenders)}/{len(catalogue)} queries use an index ({vendor})")
+        if offenders and options['fail_on_seq_scan']:
+            raise CommandError(f"Sequential scans found: {', '.join(offenders)}")
@@ -0,0 +1,108 @@
+# spa/management/commands/benchmark_html_validation.py
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from spa.utils.html_index import build_html_index
+from spa.utils.html_validator import validate_html_change
+
+SECTION_TEMPLATE = """<section id="section-{i}" class="py-20 bg-white">
+  <div class="container mx-auto px-6">
+    <h2 data-element-id="title-{i}" class="text-3xl font-bold">Section {i}</h2>
+    <p data-element-id="text-{i}" class="mt-4 text-gray-600">Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore.</p>
+    <img src="https://images.example.com/{i}.jpg" alt="Image {i}" class="rounded-lg">
+    <a href="#contact" class="btn btn-primary">Contact</a>
+  </div>
+  <style>#section-{i} .btn {{ color: #{i:06x}; }}</style>
+  <script>document.querySelectorAll('#section-{i} a').forEach(a => {{ if (a.href.length > 0 && a.href.length < 500) a.dataset.ready = '1'; }});</script>
+</section>
+"""
+
+
+def build_page(size_kb: int) -> str:
+    """Yaklaşık size_kb büyüklüğünde, üretilen sitelere benzer test sayfası"""
+    head = '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n<title>Benchmark</title>\n</head>\n<body>\n'
+    tail = '</body>\n</html>\n'
+    sections = []
+    size = len(head) + len(tail)
+    i = 0
+    while size < size_kb * 1024:
+        section = SECTION_TEMPLATE.format(i=i)
+        sections.append(section)
+        size += len(section)
+        i += 1
+    return head + ''.join(sections) + tail
+
+
+def legacy_validation(original_html, modified_html):
+    """Eski kontrollerin (str.count + DOTALL regex) karşılaştırma için kopyası"""
+    for tag in ['<!DOCTYPE', '<html', '<head', '<body', '</html>', '</head>', '</body>']:
+        original_html.count(tag), modified_html.count(tag)
+    for pattern in (r'<script[^>]*>.*?</script>', r'<style[^>]*>.*?</style>'):
+        re.findall(pattern, original_html, re.DOTALL | re.IGNORECASE)
+        re.findall(pattern, modified_html, re.DOTALL | re.IGNORECASE)
+
+
+def best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = "Tek geçişli HTML validator'ını büyük sayfalarda ölçer (eski regex kontrolleriyle karşılaştırmalı)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,250,500', help="Sayfa boyutları (KB, virgülle ayrılmış)")
+        parser.add_argument('--repeat', type=int, default=5, help="Her ölçüm için tekrar (en iyi süre raporlanır)")
+        parser.add_argument('--skip-legacy', action='store_true', help="Eski regex kontrollerini ölçme")
+        parser.add_argument('--fail-above-ms', type=float, help="En büyük sayfada validator bu süreyi aşarsa hata (CI için)")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers")
+        if not sizes:
+            raise CommandError("--sizes is empty")
+
+        repeat = max(1, options['repeat'])
+        last_ms = None
+        for size_kb in sizes:
+            original = build_page(size_kb)
+            # AI düzenlemesine benzer değişiklik: ortadaki bir section'ın başlığı ve scripti değişir
+            middle = original.find('<section id="section-', len(original) // 2)
+            modified = original[:middle] + original[middle:].replace('Section', 'Edited section', 1).replace("'1'", "'2'", 1)
+            # Kötü durum (kesilmiş AI çıktısı gibi): hiçbir <script> kapanmıyor;
+            # eski DOTALL regex her açılıştan dosya sonuna kadar tarar (O(n·k))
+            broken = modified.replace('</script>', '')
+            original_index = build_html_index(original)
+
+            def run_validator(html=modified, cached_original=None):
+                validate_html_change(original, html, cached_original or build_html_index(original), build_html_index(html))
+
+            validator_ms = best_of(run_validator, repeat)
+            # Gerçek kullanımda orijinal HTML'in indeksi digest ile cache'tedir; sadece yeni HTML taranır
+            cached_ms = best_of(lambda: run_validator(cached_original=original_index), repeat)
+            broken_ms = best_of(lambda: run_validator(broken), repeat)
+            line = (
+                f"{size_kb:>5} KB  validator {validator_ms:8.2f} ms ({validator_ms * 1000 / size_kb:6.1f} µs/KB)"
+                f"  cached-original {cached_ms:8.2f} ms  unclosed-scripts {broken_ms:8.2f} ms"
+            )
+            if not options['skip_legacy']:
+                legacy_ms = best_of(lambda: legacy_validation(original, modified), repeat)
+                legacy_broken_ms = best_of(lambda: legacy_validation(original, broken), 1)
+                line += f"  | legacy {legacy_ms:8.2f} ms  unclosed-scripts {legacy_broken_ms:8.2f} ms"
+            self.stdout.write(line)
+            last_ms = max(validator_ms, broken_ms)
+
+        report = validate_html_change(original, modified)
+        self.stdout.write(f"Sample report: valid={report['valid']} warnings={report['warnings']}")
+
+        if options['fail_above_ms'] is not None and last_ms > options['fail_above_ms']:
+            raise CommandError(f"Validator took {last_ms:.2f} ms on {sizes[-1]} KB (limit {options['fail_above_ms']} ms)")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 12:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spa', '0017_uploadedimage_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='website',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='spa_website_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='websitedesignplan',
+            index=models.Index(fields=['user', '-created_at'], name='spa_designplan_user_idx'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2 on 2026-10-19 12:29
+
+import hashlib
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CONTENT_FIELDS = {
+    'prompt': ('prompt_blob', 'prompt_size'),
+    'html_content': ('html_blob', 'html_size'),
+}
+
+
+def move_content_to_blobs(apps, schema_editor):
+    """Mevcut prompt/html_content metinlerini sıkıştırılmış ContentBlob'lara taşır"""
+    Website = apps.get_model('spa', 'Website')
+    ContentBlob = apps.get_model('spa', 'ContentBlob')
+
+    stored = set()
+    for website in Website.objects.only('id', *CONTENT_FIELDS).iterator(chunk_size=200):
+        for name, (blob_field, size_field) in CONTENT_FIELDS.items():
+            text = getattr(website, name) or ''
+            if not text:
+                continue
+            raw = text.encode('utf-8')
+            key = hashlib.sha256(raw).hexdigest()
+            if key not in stored and not ContentBlob.objects.filter(pk=key).exists():
+                data = zlib.compress(raw, 6)
+                ContentBlob.objects.create(sha256=key, codec='zlib', data=data, size=len(raw), compressed_size=len(data))
+            stored.add(key)
+            setattr(website, f'{blob_field}_id', key)
+            setattr(website, size_field, len(raw))
+        website.save(update_fields=[field for fields in CONTENT_FIELDS.values() for field in fields])
+
+
+def restore_content_from_blobs(apps, schema_editor):
+    Website = apps.get_model('spa', 'Website')
+    ContentBlob = apps.get_model('spa', 'ContentBlob')
+
+    for website in Website.objects.iterator(chunk_size=200):
+        for name, (blob_field, size_field) in CONTENT_FIELDS.items():
+            blob_id = getattr(website, f'{blob_field}_id')
+            if blob_id:
+                blob = ContentBlob.objects.get(pk=blob_id)
+                setattr(website, name, zlib.decompress(bytes(blob.data)).decode('utf-8'))
+        website.save(update_fields=list(CONTENT_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spa', '0018_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('codec', models.CharField(choices=[('zlib', 'zlib')], default='zlib', max_length=10)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('compressed_size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='website',
+            name='html_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='website',
+            name='prompt_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='website',
+            name='html_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='spa.contentblob'),
+        ),
+        migrations.AddField(
+            model_name='website',
+            name='prompt_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='spa.contentblob'),
+        ),
+        # Geri alınabilmesi için kolonlar silinmeden önce default'lu hale getirilir
+        migrations.AlterField(
+            model_name='website',
+            name='html_content',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='website',
+            name='prompt',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(move_content_to_blobs, restore_content_from_blobs),
+        migrations.RemoveField(
+            model_name='website',
+            name='html_content',
+        ),
+        migrations.RemoveField(
+            model_name='website',
+            name='prompt',
+        ),
+    ]
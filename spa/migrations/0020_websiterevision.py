@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 12:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spa', '0019_website_content_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebsiteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('snapshot_number', models.PositiveIntegerField()),
+                ('delta', models.JSONField(blank=True, default=list)),
+                ('content_digest', models.CharField(max_length=64)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('source', models.CharField(choices=[('initial', 'Initial'), ('generate', 'Generate'), ('ai_edit', 'AI Edit'), ('manual', 'Manual'), ('restore', 'Restore')], default='manual', max_length=20)),
+                ('summary', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('snapshot_blob', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='spa.contentblob')),
+                ('website', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='spa.website')),
+            ],
+            options={
+                'ordering': ['-number'],
+                'constraints': [models.UniqueConstraint(fields=('website', 'number'), name='spa_revision_website_number_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-19 12:42
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def compile_existing_custom_css(apps, schema_editor):
+    """Mevcut custom_styles için derlenmiş CSS'i üretir (render_service.compile_custom_css ile aynı çıktı)"""
+    Website = apps.get_model('spa', 'Website')
+    for website in Website.objects.exclude(custom_styles={}).only('id', 'custom_styles').iterator(chunk_size=200):
+        rules = {}
+        for element_id, styles in (website.custom_styles or {}).items():
+            declarations = [f"{prop}: {value} !important" for prop, value in (styles or {}).items()]
+            if declarations:
+                rules[element_id] = f"[data-element-id='{element_id}'] {{ {'; '.join(declarations)}; }}"
+        stylesheet = '\n'.join(rules.values())
+        Website.objects.filter(pk=website.pk).update(
+            custom_css_rules=rules,
+            custom_css=stylesheet,
+            custom_css_hash=hashlib.sha256(stylesheet.encode('utf-8')).hexdigest() if stylesheet else '',
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spa', '0020_websiterevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='website',
+            name='custom_css',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='website',
+            name='custom_css_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='website',
+            name='custom_css_rules',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(compile_existing_custom_css, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,112 @@
 #core/spa/models.py
-from django.db import models
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Exists, OuterRef
 from users.models import User
 
+class ContentBlob(models.Model):
+    """
+    Sıkıştırılmış, içerik adresli (sha256) metin deposu.
+    Website HTML'i ve prompt'u burada tutulur; aynı içerik bir kez saklanır.
+    """
+    CODEC_ZLIB = 'zlib'
+    CODEC_CHOICES = [(CODEC_ZLIB, 'zlib')]
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    codec = models.CharField(max_length=10, choices=CODEC_CHOICES, default=CODEC_ZLIB)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()  # Sıkıştırılmamış byte sayısı
+    compressed_size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def digest(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def store(cls, text):
+        """Metni (yoksa) sıkıştırıp kaydeder ve sha256 anahtarını döner"""
+        raw = text.encode('utf-8')
+        key = hashlib.sha256(raw).hexdigest()
+        if cls.objects.filter(pk=key).exists():
+            return key
+
+        data = zlib.compress(raw, getattr(settings, 'CONTENT_BLOB_COMPRESSION_LEVEL', 6))
+        try:
+            with transaction.atomic():
+                cls.objects.create(sha256=key, codec=cls.CODEC_ZLIB, data=data, size=len(raw), compressed_size=len(data))
+        except IntegrityError:
+            # Eşzamanlı aynı içerik: diğer istek kaydetti
+            pass
+        return key
+
+    @property
+    def text(self):
+        data = bytes(self.data)  # Postgres memoryview döner
+        if self.codec == self.CODEC_ZLIB:
+            data = zlib.decompress(data)
+        return data.decode('utf-8')
+
+    @classmethod
+    def purge_orphans(cls, older_than):
+        """Hiçbir kayıt tarafından referans verilmeyen eski blob'ları siler"""
+        orphans = cls.objects.filter(created_at__lt=older_than)
+        for relation in cls._meta.get_fields(include_hidden=True):
+            if relation.one_to_many:
+                referencing = relation.related_model._base_manager.filter(**{relation.field.name: OuterRef('pk')})
+                orphans = orphans.filter(~Exists(referencing))
+        deleted, _ = orphans.delete()
+        return deleted
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes)"
+
+
+def _content_property(name):
+    """
+    ContentBlob'a taşınan metin alanı için lazy accessor.
+    Okuma ilk erişimde blob'u yükleyip açar; yazma save()'e kadar bellekte bekler.
+    """
+    cache_name = f'_{name}_text'
+
+    def getter(self):
+        value = self.__dict__.get(cache_name)
+        if value is None:
+            blob_field = self.CONTENT_FIELDS[name][0]
+            value = getattr(self, blob_field).text if getattr(self, f'{blob_field}_id') else ''
+            self.__dict__[cache_name] = value
+        return value
+
+    def setter(self, value):
+        self.__dict__[cache_name] = value or ''
+        self.__dict__.setdefault('_dirty_content', set()).add(name)
+
+    return property(getter, setter)
+
+
 class Website(models.Model):
+    # Metin alanı -> (blob FK, byte boyutu)
+    CONTENT_FIELDS = {
+        'prompt': ('prompt_blob', 'prompt_size'),
+        'html_content': ('html_blob', 'html_size'),
+    }
+    CUSTOM_CSS_FIELDS = ('custom_css_rules', 'custom_css', 'custom_css_hash')
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='websites')
     title = models.CharField(max_length=255)
-    prompt = models.TextField()
-    html_content = models.TextField()
+    prompt_blob = models.ForeignKey(ContentBlob, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
+    prompt_size = models.PositiveIntegerField(default=0)
+    html_blob = models.ForeignKey(ContentBlob, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
+    html_size = models.PositiveIntegerField(default=0)
     custom_styles = models.JSONField(default=dict, blank=True)
     element_contents = models.JSONField(default=dict, blank=True)
+    # custom_styles'ın derlenmiş hali (sync_custom_css ile güncel tutulur)
+    custom_css_rules = models.JSONField(default=dict, blank=True)  # {element_id: CSS kuralı}
+    custom_css = models.TextField(blank=True, default='')
+    custom_css_hash = models.CharField(max_length=64, blank=True, default='')
 
     # YENİ ALANLAR - EKLE
     original_user_prompt = models.TextField(blank=True)  # Orijinal kullanıcı promptu
@@ -30,70 +128,108 @@ class Website(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     contact_email = models.EmailField(blank=True, null=True)
 
-    def apply_custom_styles_to_html(self):
-        """Custom styles'ı HTML'e CSS olarak ekle"""
-        if not self.custom_styles:
-            return self.html_content
-        
-        # CSS oluştur
-        css_rules = []
-        for element_id, styles in self.custom_styles.items():
-            style_declarations = []
-            for prop, value in styles.items():
-                style_declarations.append(f"{prop}: {value} !important")
-            
-            if style_declarations:
-                css_rules.append(f"[data-element-id='{element_id}'] {{ {'; '.join(style_declarations)}; }}")
-        
-        if css_rules:
-            custom_css = f"""
-            <style data-custom-styles="true">
-            /* Custom user styles - Auto generated */
-            {chr(10).join(css_rules)}
-            </style>
-            """
-            
-            # Head'e ekle
-            if '</head>' in self.html_content:
-                return self.html_content.replace('</head>', f'{custom_css}</head>')
-            else:
-                return f"{custom_css}{self.html_content}"
-        
-        return self.html_content
+    prompt = _content_property('prompt')
+    html_content = _content_property('html_content')
 
+    @property
+    def html_digest(self):
+        """HTML'in sha256'sı (kaydedilmemiş değişiklik varsa bellekten hesaplanır)"""
+        if 'html_content' in self.__dict__.get('_dirty_content', ()):
+            return ContentBlob.digest(self.html_content) if self.html_content else ''
+        return self.html_blob_id or ''
+
+    def _store_content(self, name):
+        blob_field, size_field = self.CONTENT_FIELDS[name]
+        text = getattr(self, name)
+        if not text:
+            setattr(self, f'{blob_field}_id', None)
+            setattr(self, size_field, 0)
+            return
+        key = ContentBlob.digest(text)
+        if getattr(self, f'{blob_field}_id') != key:
+            ContentBlob.store(text)
+            setattr(self, f'{blob_field}_id', key)
+        setattr(self, size_field, len(text.encode('utf-8')))
+
+    def content_update_values(self, *names):
+        """
+        Bekleyen içerik alanlarını blob olarak kaydeder ve queryset.update() için alan değerlerini
+        döner (post_save sinyali tetiklemeden yazmak için)
+        """
+        values = {}
+        dirty = self.__dict__.get('_dirty_content', set())
+        for name in names:
+            blob_field, size_field = self.CONTENT_FIELDS[name]
+            self._store_content(name)
+            dirty.discard(name)
+            values[f'{blob_field}_id'] = getattr(self, f'{blob_field}_id')
+            values[size_field] = getattr(self, size_field)
+        return values
+
+    def save(self, *args, **kwargs):
+        # update_fields=['html_content'] -> ['html_blob', 'html_size']
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            for name, content_fields in self.CONTENT_FIELDS.items():
+                if name in update_fields:
+                    update_fields.discard(name)
+                    update_fields.update(content_fields)
+            # Kısmi kayıtlar da updated_at'i ilerletir (render cache anahtarı buna bağlı)
+            update_fields.add('updated_at')
+            # custom_styles kaydediliyorsa ve çağıran derlemeyi kendisi yapmadıysa tam derleme
+            if 'custom_styles' in update_fields and 'custom_css' not in update_fields:
+                self.sync_custom_css()
+                update_fields.update(self.CUSTOM_CSS_FIELDS)
+            kwargs['update_fields'] = update_fields
+        elif 'custom_styles' not in self.get_deferred_fields():
+            self.sync_custom_css()
+
+        dirty = self.__dict__.get('_dirty_content', set())
+        for name in list(dirty):
+            if update_fields is None or self.CONTENT_FIELDS[name][0] in update_fields:
+                self._store_content(name)
+                dirty.discard(name)
+
+        super().save(*args, **kwargs)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get('fields')
+        for name, (blob_field, size_field) in self.CONTENT_FIELDS.items():
+            if fields is None or blob_field in fields:
+                self.__dict__.pop(f'_{name}_text', None)
+                self.__dict__.get('_dirty_content', set()).discard(name)
+
+    def sync_custom_css(self, changed_ids=None):
+        """
+        Derlenmiş CSS'i custom_styles ile eşitler. changed_ids verilirse sadece o
+        elementlerin kuralları yeniden derlenir. Kaydetmez; değişti mi döner.
+        """
+        from spa.services.render_service import compile_custom_css
+        rules, stylesheet, stylesheet_hash = compile_custom_css(
+            self.custom_styles, self.custom_css_rules if changed_ids is not None else None, changed_ids
+        )
+        changed = stylesheet_hash != self.custom_css_hash
+        self.custom_css_rules, self.custom_css, self.custom_css_hash = rules, stylesheet, stylesheet_hash
+        return changed
+
+    def apply_custom_styles_to_html(self):
+        """Custom styles'ı HTML'e CSS olarak ekle (derlenmiş stylesheet ile, tek geçişte)"""
+        from spa.services.render_service import render_html, wrap_custom_css
+        html_content, _ = render_html(self.html_content, custom_css=wrap_custom_css(self.custom_css))
+        return html_content
 
     def apply_all_customizations_safe(self):
         """SAFE version - only for final rendering"""
-        html_content = self.html_content
-        
-        # SADECE preview için CSS/JS ekle, orijinal HTML'i değiştirme
-        if self.custom_styles:
-            css_rules = []
-            for element_id, styles in self.custom_styles.items():
-                style_declarations = []
-                for prop, value in styles.items():
-                    style_declarations.append(f"{prop}: {value} !important")
-                
-                if style_declarations:
-                    css_rules.append(f"[data-element-id='{element_id}'] {{ {'; '.join(style_declarations)}; }}")
-            
-            if css_rules:
-                custom_css = f"""
-                <style data-custom-styles="true">
-                /* Custom user styles */
-                {chr(10).join(css_rules)}
-                </style>
-                """
-                
-                if '</head>' in html_content:
-                    html_content = html_content.replace('</head>', f'{custom_css}</head>')
-                else:
-                    html_content = f"{custom_css}{html_content}"
-        
-        return html_content
+        return self.apply_custom_styles_to_html()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Kullanıcı listesi ve cursor pagination: WHERE user_id ORDER BY created_at DESC, id DESC
+            models.Index(fields=['user', '-created_at', '-id'], name='spa_website_user_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -104,10 +240,53 @@ class UploadedImage(models.Model):
     image = models.ImageField(upload_to='uploads/%Y/%m/%d/')
     title = models.CharField(max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
+    blurhash = models.CharField(max_length=64, blank=True)
+    variants = models.JSONField(default=dict, blank=True)  # {'thumb': {'width', 'height', 'webp': {...}, 'jpeg': {...}}}
 
     def __str__(self):
         return self.title
 
+class WebsiteRevision(models.Model):
+    """
+    Website HTML geçmişi. Her N revizyonda bir tam snapshot (ContentBlob),
+    aradakilerde bir önceki revizyona göre satır bazlı delta tutulur.
+    """
+    SOURCE_CHOICES = [
+        ('initial', 'Initial'),
+        ('generate', 'Generate'),
+        ('ai_edit', 'AI Edit'),
+        ('manual', 'Manual'),
+        ('restore', 'Restore'),
+    ]
+
+    website = models.ForeignKey(Website, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    snapshot_number = models.PositiveIntegerField()  # Zincirin başladığı snapshot revizyonu
+    snapshot_blob = models.ForeignKey(ContentBlob, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
+    delta = models.JSONField(default=list, blank=True)  # [[başlangıç, bitiş, [satırlar]], ...]
+    content_digest = models.CharField(max_length=64)
+    size = models.PositiveIntegerField(default=0)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='manual')
+    summary = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['website', 'number'], name='spa_revision_website_number_uniq'),
+        ]
+
+    @property
+    def is_snapshot(self):
+        return self.number == self.snapshot_number
+
+    def __str__(self):
+        return f"{self.website_id} - r{self.number} ({self.source})"
+
 class WebsiteDesignPlan(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='design_plans')
     original_prompt = models.TextField()
@@ -120,6 +299,9 @@ class WebsiteDesignPlan(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='spa_designplan_user_idx'),
+        ]
     
     def __str__(self):
         return f"Design Plan - {self.user.name} - {self.created_at.strftime('%Y-%m-%d')}"
\ No newline at end of file
@@ -0,0 +1,111 @@
+# spa/services/direct_upload_service.py
+import logging
+import os
+import uuid
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+ALLOWED_IMAGE_CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+}
+PENDING_UPLOAD_PREFIX = "direct_upload"
+
+
+class DirectUploadService:
+    """
+    Görselleri API sunucusu ve Celery broker'ı üzerinden geçirmeden
+    presigned POST ile doğrudan S3'e yükletir
+    """
+
+    def __init__(self):
+        self.expires_in = getattr(settings, 'DIRECT_UPLOAD_EXPIRES_IN', 600)
+
+    @staticmethod
+    def is_available() -> bool:
+        """Presigned POST sadece S3 storage ile kullanılabilir"""
+        return hasattr(default_storage, 'bucket_name') and hasattr(default_storage, 'connection')
+
+    @staticmethod
+    def build_storage_name(filename: str, content_type: str) -> str:
+        """UploadedImage.image upload_to ile aynı yapıda benzersiz dosya adı"""
+        base, ext = os.path.splitext(get_valid_filename(os.path.basename(filename or 'image')))
+        ext = ext.lower() or ALLOWED_IMAGE_CONTENT_TYPES.get(content_type, '')
+        date_path = timezone.now().strftime('%Y/%m/%d')
+        return f"uploads/{date_path}/{uuid.uuid4().hex[:12]}_{base[:80]}{ext}"
+
+    @staticmethod
+    def validate(content_type: str, size: Optional[int]) -> Optional[str]:
+        if content_type not in ALLOWED_IMAGE_CONTENT_TYPES:
+            return f"Unsupported image type: {content_type}"
+        if size is not None and (size <= 0 or size > MAX_UPLOAD_SIZE):
+            return "Image file too large (max 10MB)"
+        return None
+
+    def create_presigned_upload(self, user_id: int, website_id: int, filename: str,
+                                content_type: str, size: int, title: str = None) -> Dict:
+        """Client'ın S3'e doğrudan POST edeceği URL ve form alanlarını üretir"""
+        error = self.validate(content_type, size)
+        if error:
+            return {'success': False, 'error': error}
+
+        storage_name = self.build_storage_name(filename, content_type)
+        object_key = self._object_key(storage_name)
+
+        client = default_storage.connection.meta.client
+        presigned = client.generate_presigned_post(
+            Bucket=default_storage.bucket_name,
+            Key=object_key,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, MAX_UPLOAD_SIZE],
+            ],
+            ExpiresIn=self.expires_in,
+        )
+
+        upload_id = uuid.uuid4().hex
+        cache.set(f"{PENDING_UPLOAD_PREFIX}:{upload_id}", {
+            'user_id': user_id,
+            'website_id': website_id,
+            'storage_name': storage_name,
+            'content_type': content_type,
+            'title': title or filename,
+        }, timeout=self.expires_in + 3600)
+
+        return {
+            'success': True,
+            'upload_id': upload_id,
+            'url': presigned['url'],
+            'fields': presigned['fields'],
+            'max_size': MAX_UPLOAD_SIZE,
+            'expires_in': self.expires_in,
+        }
+
+    def pop_pending_upload(self, upload_id: str, user_id: int, website_id: int) -> Optional[Dict]:
+        """Presign sırasında kaydedilen yükleme bilgisini tek kullanımlık olarak alır"""
+        cache_key = f"{PENDING_UPLOAD_PREFIX}:{upload_id}"
+        pending = cache.get(cache_key)
+        if not pending or pending['user_id'] != user_id or pending['website_id'] != website_id:
+            return None
+        cache.delete(cache_key)
+        return pending
+
+    @staticmethod
+    def _object_key(storage_name: str) -> str:
+        location = getattr(default_storage, 'location', '') or ''
+        return f"{location.strip('/')}/{storage_name}" if location else storage_name
+
+
+def get_direct_upload_service() -> DirectUploadService:
+    return DirectUploadService()
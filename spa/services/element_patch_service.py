@@ -0,0 +1,178 @@
+# spa/services/element_patch_service.py
+import json
+import logging
+from typing import Dict, Optional
+
+from django.db import connection, models, transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from spa.models import Website
+from spa.services.render_service import build_content_splices, render_html, select_splices
+from spa.services.revision_service import get_website_revision_service
+from spa.utils.html_index import get_website_html_index
+
+logger = logging.getLogger(__name__)
+
+# custom_styles için tek seviye derin birleştirme: element bazında özellikler birleştirilir,
+# null değerli özellik/element silinir; tüm özellikleri silinen element de kaldırılır (merge_styles
+# ile aynı). Tek UPDATE içinde, mevcut değer okunmadan çalışır.
+STYLES_MERGE_SQL = """
+    SELECT COALESCE(jsonb_object_agg(merged.key, merged.value), '{}'::jsonb)
+    FROM (
+        SELECT key,
+               CASE
+                   WHEN patch.value IS NULL THEN existing.value
+                   WHEN jsonb_typeof(patch.value) = 'null' THEN NULL
+                   ELSE NULLIF(jsonb_strip_nulls(
+                       CASE WHEN jsonb_typeof(existing.value) = 'object' THEN existing.value ELSE '{}'::jsonb END
+                       || patch.value
+                   ), '{}'::jsonb)
+               END AS value
+        FROM jsonb_each(COALESCE("spa_website"."custom_styles", '{}'::jsonb)) AS existing
+        FULL OUTER JOIN jsonb_each(%s::jsonb) AS patch USING (key)
+    ) AS merged
+    WHERE merged.value IS NOT NULL
+"""
+
+# element_contents düz bir map: yeni değerler || ile eklenir, null olanlar anahtar listesiyle silinir
+CONTENTS_MERGE_SQL = """
+    (COALESCE("spa_website"."element_contents", '{}'::jsonb) || %s::jsonb) - %s::text[]
+"""
+
+
+def merge_styles(current: Optional[Dict], patch: Dict) -> Dict:
+    """STYLES_MERGE_SQL'in Python karşılığı (Postgres olmayan veritabanları için)"""
+    merged = {key: dict(value) for key, value in (current or {}).items() if isinstance(value, dict)}
+    for element_id, properties in patch.items():
+        if properties is None:
+            merged.pop(element_id, None)
+            continue
+        element_styles = merged.setdefault(element_id, {})
+        for property_name, value in properties.items():
+            if value is None:
+                element_styles.pop(property_name, None)
+            else:
+                element_styles[property_name] = value
+        if not element_styles:
+            merged.pop(element_id)
+    return merged
+
+
+def merge_contents(current: Optional[Dict], patch: Dict) -> Dict:
+    merged = dict(current or {})
+    for element_id, content in patch.items():
+        if content is None:
+            merged.pop(element_id, None)
+        else:
+            merged[element_id] = content
+    return merged
+
+
+class ElementPatchService:
+    """
+    custom_styles / element_contents için toplu, atomik patch.
+    Postgres'te birleştirme tek UPDATE ile yapılır (jsonb, JSON okunup yeniden yazılmaz); diğer
+    veritabanlarında satır kilitlenip Python'da birleştirilir. Eşzamanlı düzenlemeler birbirini ezmez.
+    Stil değiştiyse derlenmiş CSS sadece değişen elementler için yeniden üretilir.
+    """
+
+    def apply(self, website_id: int, user_id: int, styles: Optional[Dict] = None, contents: Optional[Dict] = None) -> bool:
+        """Patch'i uygular; website bulunamazsa (veya kullanıcıya ait değilse) False döner"""
+        styles = styles or {}
+        contents = contents or {}
+        websites = Website.objects.filter(pk=website_id, user_id=user_id)
+
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                updates = {'updated_at': timezone.now()}
+                if styles:
+                    updates['custom_styles'] = RawSQL(STYLES_MERGE_SQL, [json.dumps(styles)], output_field=models.JSONField())
+                if contents:
+                    set_contents = {key: value for key, value in contents.items() if value is not None}
+                    removed_keys = [key for key, value in contents.items() if value is None]
+                    updates['element_contents'] = RawSQL(
+                        CONTENTS_MERGE_SQL, [json.dumps(set_contents), removed_keys], output_field=models.JSONField()
+                    )
+                updated = websites.update(**updates)
+                if updated and styles:
+                    # Derlenmiş CSS'te sadece değişen elementlerin kuralları yenilenir (satır UPDATE ile kilitli)
+                    website = websites.only('id', 'custom_styles', *Website.CUSTOM_CSS_FIELDS).get()
+                    if website.sync_custom_css(changed_ids=styles.keys()):
+                        websites.update(**{field: getattr(website, field) for field in Website.CUSTOM_CSS_FIELDS})
+            else:
+                website = websites.select_for_update().only(
+                    'id', 'user', 'custom_styles', 'element_contents', *Website.CUSTOM_CSS_FIELDS
+                ).first()
+                if website is None:
+                    return False
+                update_fields = []
+                if styles:
+                    website.custom_styles = merge_styles(website.custom_styles, styles)
+                    website.sync_custom_css(changed_ids=styles.keys())
+                    update_fields.extend(['custom_styles', *Website.CUSTOM_CSS_FIELDS])
+                if contents:
+                    website.element_contents = merge_contents(website.element_contents, contents)
+                    update_fields.append('element_contents')
+                website.save(update_fields=update_fields)
+                updated = 1
+
+        if updated:
+            logger.info(f"✅ Element patch applied to website {website_id}: {len(styles)} styles, {len(contents)} contents")
+        return bool(updated)
+
+    def compact(self, website: Website, user=None) -> int:
+        """
+        element_contents override'larını html_content'e kalıcı olarak işler (deploy ve AI edit öncesi).
+        HTML ve override'lar kilitli satırdan okunur (çağıranın nesnesi eski olabilir). HTML'e yazılan
+        override'lar ve dıştaki bir override'ın kapsadığı iç içe olanlar (element artık yok) temizlenir;
+        indekste bulunamayanlar saklanır. HTML değiştiyse revizyon açılır. Yazma queryset.update()
+        ile yapılır: post_save (auto deploy) tetiklenmez, deploy içinden güvenle çağrılır.
+        Website nesnesi güncel satırla yenilenir; uygulanan override sayısını döner.
+        """
+        with transaction.atomic():
+            locked = Website.objects.select_for_update().only(
+                'id', 'element_contents', 'html_blob', 'html_size', 'updated_at'
+            ).get(pk=website.pk)
+            element_contents = locked.element_contents or {}
+            if not element_contents:
+                website.element_contents = element_contents
+                return 0
+
+            matched = build_content_splices(get_website_html_index(locked), element_contents)
+            splices = select_splices(matched)
+            if not splices:
+                website.element_contents = element_contents
+                return 0
+
+            previous_html = locked.html_content
+            locked.html_content = render_html(previous_html, splices=list(splices.values()))[0]
+            locked.element_contents = {
+                element_id: text for element_id, text in element_contents.items() if element_id not in matched
+            }
+            locked.updated_at = timezone.now()
+            Website.objects.filter(pk=locked.pk).update(
+                element_contents=locked.element_contents,
+                updated_at=locked.updated_at,
+                **locked.content_update_values('html_content'),
+            )
+
+            if locked.html_content != previous_html:
+                get_website_revision_service().record(
+                    locked, locked.html_content, 'manual', f"Applied {len(splices)} inline text edits", user,
+                    previous_html=previous_html
+                )
+
+        website.refresh_from_db(fields=['element_contents', 'html_blob', 'html_size', 'updated_at'])
+        logger.info(f"✅ Compacted {len(splices)} element content overrides into website {website.pk}")
+        return len(splices)
+
+
+_element_patch_service: Optional[ElementPatchService] = None
+
+
+def get_element_patch_service() -> ElementPatchService:
+    global _element_patch_service
+    if _element_patch_service is None:
+        _element_patch_service = ElementPatchService()
+    return _element_patch_service
@@ -0,0 +1,159 @@
+# spa/services/image_variant_service.py
+import logging
+import os
+from io import BytesIO
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from spa.utils.blurhash import encode_blurhash
+
+logger = logging.getLogger(__name__)
+
+# name -> max kenar uzunluğu (px)
+DEFAULT_VARIANT_SIZES = {
+    'thumb': 320,
+    'medium': 960,
+    'large': 1920,
+}
+
+
+def encode_image_variants(source_bytes: bytes, sizes: Dict[str, int]) -> Dict:
+    """
+    Pillow ile tüm varyantları üretir. Sadece bayt alır ve döner (model/storage erişimi yok).
+    Task içinde inline çalışır; paralellik Celery worker concurrency'sinden gelir.
+    """
+    with Image.open(BytesIO(source_bytes)) as img:
+        img.load()
+        # Telefon fotoğrafları EXIF orientation ile gelir; piksel olarak döndürülür ve EXIF atılır
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+        width, height = img.size
+
+        rgb = img.convert('RGB')
+        tiny = rgb.resize((32, max(1, round(32 * height / width))), Image.BILINEAR)
+        blurhash = encode_blurhash(tiny)
+
+        palette = rgb.resize((64, 64), Image.BILINEAR).quantize(colors=5)
+        count, index = max(palette.getcolors())
+        r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+        dominant_color = f"#{r:02x}{g:02x}{b:02x}"
+
+        fallback_format = 'png' if has_alpha else 'jpeg'
+        variants = []
+        for name, max_size in sizes.items():
+            resized = img.copy()
+            # Orijinalden büyük varyant üretilmez
+            resized.thumbnail((max_size, max_size), Image.LANCZOS)
+
+            webp_buffer = BytesIO()
+            resized.save(webp_buffer, 'WEBP', quality=80, method=4)
+
+            fallback_buffer = BytesIO()
+            if has_alpha:
+                resized.save(fallback_buffer, 'PNG', optimize=True)
+            else:
+                resized.save(fallback_buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+
+            variants.append({
+                'name': name,
+                'width': resized.width,
+                'height': resized.height,
+                'files': {
+                    'webp': webp_buffer.getvalue(),
+                    fallback_format: fallback_buffer.getvalue(),
+                },
+            })
+
+    return {
+        'width': width,
+        'height': height,
+        'dominant_color': dominant_color,
+        'blurhash': blurhash,
+        'variants': variants,
+    }
+
+
+class ImageVariantService:
+    """UploadedImage için thumb/medium/large WebP + JPEG/PNG varyantları ve metadata üretir"""
+
+    def __init__(self):
+        self.sizes = dict(getattr(settings, 'IMAGE_VARIANT_SIZES', DEFAULT_VARIANT_SIZES))
+
+    def generate(self, uploaded_image, source_bytes: bytes = None) -> Dict:
+        """Varyantları üretip storage'a yazar ve modeli günceller"""
+        try:
+            if source_bytes is None:
+                with default_storage.open(uploaded_image.image.name, 'rb') as f:
+                    source_bytes = f.read()
+
+            result = encode_image_variants(source_bytes, self.sizes)
+            base_path, _ = os.path.splitext(uploaded_image.image.name)
+
+            variants = {}
+            for variant in result['variants']:
+                files = {}
+                for image_format, content in variant['files'].items():
+                    extension = 'jpg' if image_format == 'jpeg' else image_format
+                    path = default_storage.save(
+                        f"{base_path}__{variant['name']}.{extension}", ContentFile(content)
+                    )
+                    files[image_format] = {'path': path, 'size': len(content)}
+                variants[variant['name']] = {
+                    'width': variant['width'],
+                    'height': variant['height'],
+                    **files,
+                }
+
+            self.delete_variants(uploaded_image)
+
+            uploaded_image.width = result['width']
+            uploaded_image.height = result['height']
+            uploaded_image.dominant_color = result['dominant_color']
+            uploaded_image.blurhash = result['blurhash']
+            uploaded_image.variants = variants
+            uploaded_image.save(update_fields=['width', 'height', 'dominant_color', 'blurhash', 'variants'])
+
+            logger.info(f"✅ Image variants generated for {uploaded_image.id}: {', '.join(variants)}")
+            return {'success': True, 'variants': variants}
+
+        except Exception as e:
+            logger.error(f"❌ Image variant generation failed for {uploaded_image.id}: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def delete_variants(uploaded_image) -> None:
+        """Mevcut varyant dosyalarını storage'dan siler"""
+        for variant in (uploaded_image.variants or {}).values():
+            for value in variant.values():
+                if isinstance(value, dict) and value.get('path'):
+                    try:
+                        default_storage.delete(value['path'])
+                    except Exception as e:
+                        logger.warning(f"⚠️ Variant delete failed {value['path']}: {str(e)}")
+
+    @staticmethod
+    def variant_urls(uploaded_image) -> Dict[str, Dict]:
+        """Serializer için varyant URL'leri"""
+        urls = {}
+        for name, variant in (uploaded_image.variants or {}).items():
+            entry = {'width': variant['width'], 'height': variant['height']}
+            for image_format, value in variant.items():
+                if isinstance(value, dict) and value.get('path'):
+                    entry[image_format] = default_storage.url(value['path'])
+            urls[name] = entry
+        return urls
+
+
+_image_variant_service: Optional[ImageVariantService] = None
+
+
+def get_image_variant_service() -> ImageVariantService:
+    global _image_variant_service
+    if _image_variant_service is None:
+        _image_variant_service = ImageVariantService()
+    return _image_variant_service
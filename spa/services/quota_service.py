@@ -0,0 +1,168 @@
+# spa/services/quota_service.py
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+PLAN_WEBSITE_LIMITS = {
+    'free': 2,
+    'basic': 5,
+    'premium': 20
+}
+
+WEBSITE_COUNT_PREFIX = "website_count"
+
+
+class WebsiteLimitExceeded(Exception):
+    """Rezervasyon sırasında plan limiti aşıldığında fırlatılır"""
+
+    def __init__(self, quota: Dict):
+        self.quota = quota
+        super().__init__(
+            f"Website limit reached: {quota['current_count']}/{quota['max_websites']} ({quota['subscription_type']})"
+        )
+
+
+class WebsiteQuotaService:
+    """
+    Kullanıcı başına website sayacı. Sayaç cache'de (prod: Redis) tutulur,
+    Website create/delete sinyalleri ile atomik olarak artırılır/azaltılır ve
+    periyodik olarak DB ile uzlaştırılır.
+    """
+
+    def __init__(self):
+        self.timeout = getattr(settings, 'WEBSITE_COUNT_CACHE_TTL', 60 * 60 * 24)
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"{WEBSITE_COUNT_PREFIX}:{user_id}"
+
+    @staticmethod
+    def tier_for(user) -> str:
+        """Süresi dolmuş abonelikler sweep beklemeden 'free' sayılır"""
+        return getattr(user, 'subscription_tier', None) or getattr(user, 'subscription_type', 'free')
+
+    def limit_for(self, user) -> int:
+        return PLAN_WEBSITE_LIMITS.get(self.tier_for(user), PLAN_WEBSITE_LIMITS['free'])
+
+    def _count_from_db(self, user_id: int) -> int:
+        from spa.models import Website
+        return Website.objects.filter(user_id=user_id).count()
+
+    def get_count(self, user_id: int) -> int:
+        """Cache'den okur; yoksa DB'den sayıp cache'e yazar"""
+        key = self._key(user_id)
+        try:
+            count = cache.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Website count cache read failed: {str(e)}")
+            return self._count_from_db(user_id)
+
+        if count is None:
+            count = self._count_from_db(user_id)
+            # add: eşzamanlı bir incr/decr'ı ezmez
+            cache.add(key, count, timeout=self.timeout)
+        return count
+
+    def _adjust(self, user_id: int, delta: int) -> None:
+        key = self._key(user_id)
+        try:
+            if delta > 0:
+                cache.incr(key, delta)
+            else:
+                cache.decr(key, -delta)
+        except ValueError:
+            # Anahtar yok: bir sonraki okuma DB'den hesaplar
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Website count cache update failed, invalidating: {str(e)}")
+            self.invalidate(user_id)
+
+    def increment(self, user_id: int) -> None:
+        self._adjust(user_id, 1)
+
+    def decrement(self, user_id: int) -> None:
+        self._adjust(user_id, -1)
+
+    def invalidate(self, user_id: int) -> None:
+        try:
+            cache.delete(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"⚠️ Website count cache delete failed: {str(e)}")
+
+    def get_quota(self, user, count: Optional[int] = None) -> Dict:
+        """CanCreateWebsite ve plan bilgisi için limit özeti (O(1), cache'den)"""
+        current_count = self.get_count(user.id) if count is None else count
+        max_websites = self.limit_for(user)
+        return {
+            'subscription_type': self.tier_for(user),
+            'current_count': current_count,
+            'max_websites': max_websites,
+            'remaining': max(0, max_websites - current_count)
+        }
+
+    @contextmanager
+    def reserve(self, user):
+        """
+        Website oluşturmayı kullanıcı satırı kilitliyken yapar; eşzamanlı
+        create'ler limiti aşamaz. Limit doluysa WebsiteLimitExceeded fırlatır.
+        """
+        from users.models import User
+
+        with transaction.atomic():
+            User.objects.select_for_update().only('id').get(pk=user.id)
+            # Kilit altında sayım DB'den yapılır (cache yarış durumunda geride olabilir)
+            quota = self.get_quota(user, count=self._count_from_db(user.id))
+            if quota['remaining'] <= 0:
+                raise WebsiteLimitExceeded(quota)
+            yield quota
+
+    def reconcile(self, user_ids: Optional[Iterable[int]] = None) -> Dict:
+        """Cache sayaçlarını tek GROUP BY sorgusu ile DB'ye eşitler"""
+        from spa.models import Website
+        from users.models import User
+
+        users = User.objects.all()
+        if user_ids is not None:
+            users = users.filter(id__in=list(user_ids))
+
+        counts = dict(
+            Website.objects.filter(user__in=users)
+            .values_list('user_id')
+            .annotate(total=Count('id'))
+        )
+
+        fixed = 0
+        checked = 0
+        user_id_list = list(users.values_list('id', flat=True))
+        for start in range(0, len(user_id_list), 500):
+            batch = {self._key(user_id): counts.get(user_id, 0) for user_id in user_id_list[start:start + 500]}
+            cached = cache.get_many(list(batch))
+            updates = {}
+            for key, actual in batch.items():
+                checked += 1
+                if key in cached and cached[key] != actual:
+                    logger.warning(f"⚠️ Website count drift for {key}: cached={cached[key]} actual={actual}")
+                    fixed += 1
+                if cached.get(key) != actual:
+                    updates[key] = actual
+            if updates:
+                cache.set_many(updates, timeout=self.timeout)
+
+        return {'checked': checked, 'fixed': fixed}
+
+
+_website_quota_service: Optional[WebsiteQuotaService] = None
+
+
+def get_website_quota_service() -> WebsiteQuotaService:
+    global _website_quota_service
+    if _website_quota_service is None:
+        _website_quota_service = WebsiteQuotaService()
+    return _website_quota_service
@@ -0,0 +1,257 @@
+# spa/services/render_service.py
+import hashlib
+from html import escape
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from spa.utils.html_index import VOID_TAGS, get_website_html_index
+
+logger = logging.getLogger(__name__)
+
+# HTML'de settings değeriyle değiştirilen EmailJS placeholder'ları ({{KEY}}, {{ KEY }} veya KEY)
+EMAILJS_PLACEHOLDERS = (
+    'YOUR_EMAIL_JS_PUBLIC_KEY',
+    'YOUR_EMAIL_JS_SERVICE_ID',
+    'YOUR_EMAIL_JS_TEMPLATE_ID',
+)
+EMAILJS_PREFIX = 'YOUR_EMAIL_JS_'
+EMAIL_PLACEHOLDER = 'USER_EMAIL_PLACEHOLDER'
+HEAD_CLOSE_TAG = '</head>'
+
+RENDER_CACHE_PREFIX = "website_render"
+
+
+def _find_placeholders(html: str, replacements: Dict[str, str]) -> List[Tuple[int, int, str]]:
+    """
+    Placeholder konumlarını (başlangıç, bitiş, anahtar) bulur. Aramalar str.find ile
+    C hızında yapılır; EmailJS anahtarları {{KEY}} / {{ KEY }} ile sarılıysa parantezler de dahil edilir.
+    """
+    tokens = []
+    if any(key in replacements for key in EMAILJS_PLACEHOLDERS):
+        position = html.find(EMAILJS_PREFIX)
+        while position != -1:
+            next_position = position + 1
+            for key in EMAILJS_PLACEHOLDERS:
+                if html.startswith(key, position):
+                    start, end = position, position + len(key)
+                    if html[start - 3:start] == '{{ ' and html[end:end + 3] == ' }}':
+                        start, end = start - 3, end + 3
+                    elif html[start - 2:start] == '{{' and html[end:end + 2] == '}}':
+                        start, end = start - 2, end + 2
+                    tokens.append((start, end, key))
+                    next_position = end
+                    break
+            position = html.find(EMAILJS_PREFIX, next_position)
+
+    if EMAIL_PLACEHOLDER in replacements:
+        position = html.find(EMAIL_PLACEHOLDER)
+        while position != -1:
+            tokens.append((position, position + len(EMAIL_PLACEHOLDER), EMAIL_PLACEHOLDER))
+            position = html.find(EMAIL_PLACEHOLDER, position + len(EMAIL_PLACEHOLDER))
+
+    tokens.sort()
+    return tokens
+
+
+def compile_css_rule(element_id: str, styles: Optional[Dict]) -> str:
+    """Tek elementin CSS kuralı; deklarasyon yoksa ''"""
+    declarations = [f"{prop}: {value} !important" for prop, value in (styles or {}).items()]
+    if not declarations:
+        return ''
+    return f"[data-element-id='{element_id}'] {{ {'; '.join(declarations)}; }}"
+
+
+def compile_custom_css(custom_styles: Optional[Dict], previous_rules: Optional[Dict[str, str]] = None,
+                       changed_ids: Optional[Iterable[str]] = None) -> Tuple[Dict[str, str], str, str]:
+    """
+    custom_styles'ı derler: (element kuralları, stylesheet, sha256) döner.
+    previous_rules ve changed_ids verilirse sadece değişen elementlerin kuralı yeniden üretilir;
+    diğerleri önceki derlemeden alınır. Stil yoksa stylesheet ve hash ''.
+    """
+    custom_styles = custom_styles or {}
+    if previous_rules is None or changed_ids is None:
+        rules = {}
+        changed_ids = custom_styles.keys()
+    else:
+        rules = dict(previous_rules)
+
+    for element_id in changed_ids:
+        rule = compile_css_rule(element_id, custom_styles.get(element_id))
+        if rule:
+            rules[element_id] = rule
+        else:
+            rules.pop(element_id, None)
+
+    stylesheet = '\n'.join(rules[element_id] for element_id in custom_styles if element_id in rules)
+    stylesheet_hash = hashlib.sha256(stylesheet.encode('utf-8')).hexdigest() if stylesheet else ''
+    return rules, stylesheet, stylesheet_hash
+
+
+def wrap_custom_css(stylesheet: str) -> str:
+    """Derlenmiş stylesheet'i HTML'e eklenecek <style> bloğuna çevirir, boşsa ''"""
+    if not stylesheet:
+        return ''
+    return (
+        '\n<style data-custom-styles="true">\n'
+        '/* Custom user styles */\n'
+        f"{stylesheet}\n"
+        '</style>\n'
+    )
+
+
+def build_custom_styles_css(custom_styles: Optional[Dict]) -> str:
+    """custom_styles ({element_id: {prop: value}}) için <style> bloğu, stil yoksa ''"""
+    _, stylesheet, _ = compile_custom_css(custom_styles)
+    return wrap_custom_css(stylesheet)
+
+
+def build_content_splices(html_index: Dict, element_contents: Optional[Dict]) -> Dict[str, Tuple[int, int, str]]:
+    """
+    element_contents ({data-element-id: metin}) için yapı indeksindeki içerik aralıklarına
+    {element_id: (başlangıç, bitiş, escape edilmiş metin)} splice'ları. HTML yeniden parse edilmez;
+    indekste olmayan, kapanışı bulunamayan veya void elementler atlanır.
+    """
+    splices = {}
+    elements = html_index['elements']
+    for element_id, text in (element_contents or {}).items():
+        element = elements.get(element_id)
+        if element is None or element['content_end'] is None or element['tag'] in VOID_TAGS:
+            continue
+        splices[element_id] = (element['content_start'], element['content_end'], escape(str(text), quote=False))
+    return splices
+
+
+def select_splices(splices: Dict[str, Tuple[int, int, str]]) -> Dict[str, Tuple[int, int, str]]:
+    """
+    render_html'in uygulayacağı splice'lar: iç içe elementlerde dıştaki override içteki elementi
+    de kapsar, içtekiler atlanır (render_html'deki çakışma kuralının aynısı)
+    """
+    selected = {}
+    cursor = 0
+    for element_id, splice in sorted(splices.items(), key=lambda item: item[1][0]):
+        if splice[0] < cursor:
+            continue
+        selected[element_id] = splice
+        cursor = splice[1]
+    return selected
+
+
+def render_html(html_text: str, replacements: Optional[Dict[str, str]] = None, custom_css: str = '',
+                splices: Optional[List[Tuple[int, int, str]]] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    HTML'i tek geçişte oluşturur: placeholder'lar değiştirilir, element içerikleri (splices)
+    yerleştirilir, custom CSS ilk </head>'den önce (yoksa başa) eklenir. Değiştirilen
+    placeholder sayılarını da döner. Değiştirilen bir elementin içindeki placeholder'lar atlanır.
+    """
+    replacements = replacements or {}
+    counts = {}
+    # (başlangıç, öncelik, bitiş, yeni metin, placeholder anahtarı); öncelik: CSS < splice < placeholder
+    tokens = [
+        (start, 2, end, replacements[key], key)
+        for start, end, key in (_find_placeholders(html_text, replacements) if replacements else [])
+    ]
+    if splices:
+        tokens.extend((start, 1, end, text, None) for start, end, text in splices)
+    if not tokens and not custom_css:
+        return html_text, counts
+
+    # CSS, </head> varsa token'larla birlikte sırayla eklenir; yoksa en başa
+    head_position = html_text.find(HEAD_CLOSE_TAG) if custom_css else -1
+    if head_position != -1:
+        tokens.append((head_position, 0, head_position, custom_css, None))
+    tokens.sort(key=lambda token: (token[0], token[1]))
+    parts = [custom_css] if custom_css and head_position == -1 else []
+
+    cursor = 0
+    for start, _, end, text, key in tokens:
+        if start < cursor:
+            continue
+        parts.append(html_text[cursor:start])
+        parts.append(text)
+        if key is not None:
+            counts[key] = counts.get(key, 0) + 1
+        cursor = end
+    parts.append(html_text[cursor:])
+    return ''.join(parts), counts
+
+
+class WebsiteRenderService:
+    """
+    Preview ve deploy için ortak HTML render'ı. Sonuç (website id, updated_at,
+    settings hash) anahtarıyla cache'lenir; tekrarlanan preview'lar cache okumasıdır.
+    """
+
+    def __init__(self):
+        self.timeout = getattr(settings, 'WEBSITE_RENDER_CACHE_TTL', 60 * 60 * 24)
+
+    @staticmethod
+    def get_replacements(email: str) -> Dict[str, str]:
+        # Ayar yoksa placeholder olduğu gibi kalır (deploy'da Vercel env ile doldurulabilir)
+        replacements = {key: getattr(settings, key, key) for key in EMAILJS_PLACEHOLDERS}
+        replacements[EMAIL_PLACEHOLDER] = email
+        return replacements
+
+    @staticmethod
+    def settings_hash(replacements: Dict[str, str]) -> str:
+        return hashlib.sha1(json.dumps(replacements, sort_keys=True).encode()).hexdigest()[:16]
+
+    def cache_key(self, website, replacements: Dict[str, str], with_styles: bool) -> Optional[str]:
+        if not website.pk or not website.updated_at:
+            return None
+        variant = 'styled' if with_styles else 'plain'
+        return f"{RENDER_CACHE_PREFIX}:{website.pk}:{website.updated_at.timestamp()}:{self.settings_hash(replacements)}:{variant}"
+
+    def render_cache_key(self, website, with_styles: bool = False) -> Optional[str]:
+        """HTML yüklemeden hesaplanan render anahtarı (ETag için)"""
+        return self.cache_key(website, self.get_replacements(website.contact_email or website.user.email), with_styles)
+
+    @staticmethod
+    def content_splices(website) -> List[Tuple[int, int, str]]:
+        """Website'in element_contents override'ları için splice'lar (indeks HTML digest'i ile cache'li)"""
+        if not website.element_contents:
+            return []
+        return list(build_content_splices(get_website_html_index(website), website.element_contents).values())
+
+    def render(self, website, with_styles: bool = False) -> str:
+        """Placeholder'ları değiştirilmiş (istenirse custom stilleri eklenmiş) HTML"""
+        replacements = self.get_replacements(website.contact_email or website.user.email)
+        key = self.cache_key(website, replacements, with_styles)
+
+        if key:
+            try:
+                cached = cache.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Render cache read failed: {str(e)}")
+                cached = None
+            if cached is not None:
+                return cached
+
+        # Derlenmiş stylesheet model üzerinde tutulur (Website.sync_custom_css), burada yeniden üretilmez
+        custom_css = wrap_custom_css(website.custom_css) if with_styles else ''
+        splices = self.content_splices(website)
+        html, counts = render_html(website.html_content, replacements, custom_css, splices)
+
+        for placeholder in EMAILJS_PLACEHOLDERS:
+            if counts.get(placeholder) and replacements[placeholder] == placeholder:
+                logger.error(f"❌ {placeholder} is not configured, placeholder left in HTML of website {website.pk}")
+
+        if key:
+            try:
+                cache.set(key, html, timeout=self.timeout)
+            except Exception as e:
+                logger.warning(f"⚠️ Render cache write failed: {str(e)}")
+        return html
+
+
+_website_render_service: Optional[WebsiteRenderService] = None
+
+
+def get_website_render_service() -> WebsiteRenderService:
+    global _website_render_service
+    if _website_render_service is None:
+        _website_render_service = WebsiteRenderService()
+    return _website_render_service
@@ -0,0 +1,149 @@
+# spa/services/revision_service.py
+import logging
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from spa.models import ContentBlob, Website, WebsiteRevision
+from spa.utils.line_delta import apply_line_delta, compute_line_delta, delta_size, unified_diff
+
+logger = logging.getLogger(__name__)
+
+
+class RevisionIntegrityError(Exception):
+    """Yeniden oluşturulan HTML'in hash'i revizyondakiyle eşleşmediğinde fırlatılır"""
+
+
+class WebsiteRevisionService:
+    """
+    Website HTML revizyonları: her N revizyonda bir snapshot, arada delta.
+    Bir revizyonu oluşturmak en fazla N-1 delta uygulamak demektir.
+    """
+
+    def __init__(self):
+        self.snapshot_interval = max(1, getattr(settings, 'WEBSITE_REVISION_SNAPSHOT_INTERVAL', 10))
+        # Delta bu oranı aşarsa (sayfanın çoğu değişmişse) snapshot daha ucuzdur
+        self.max_delta_ratio = getattr(settings, 'WEBSITE_REVISION_MAX_DELTA_RATIO', 0.5)
+
+    def latest(self, website_id: int) -> Optional[WebsiteRevision]:
+        return WebsiteRevision.objects.filter(website_id=website_id).defer('delta').order_by('-number').first()
+
+    def get_revision(self, website_id: int, number: int) -> WebsiteRevision:
+        return WebsiteRevision.objects.get(website_id=website_id, number=number)
+
+    def record(self, website: Website, html: str, source: str = 'manual', summary: str = '',
+               user=None, previous_html: Optional[str] = None) -> WebsiteRevision:
+        """
+        Yeni HTML'i revizyon olarak kaydeder. İçerik son revizyonla aynıysa yeni kayıt açmaz.
+        previous_html verilirse (düzenleme öncesi HTML) delta için son revizyon yeniden oluşturulmaz;
+        website'in ilk izlenen düzenlemesinde bu HTML 'initial' revizyonu olarak saklanır.
+        """
+        digest = ContentBlob.digest(html)
+        previous_digest = ContentBlob.digest(previous_html) if previous_html else None
+
+        with transaction.atomic():
+            # Aynı website için eşzamanlı kayıtlar sıra numarasında çakışmasın
+            Website.objects.select_for_update().only('id').get(pk=website.pk)
+            last = self.latest(website.pk)
+
+            if last is None and previous_html and previous_digest != digest:
+                last = self._create(website, 1, previous_html, previous_digest, None, None,
+                                    'initial', 'Before first tracked edit', user)
+
+            if last is not None and last.content_digest == digest:
+                return last
+
+            base_text = None
+            if last is not None and last.number + 1 - last.snapshot_number < self.snapshot_interval:
+                base_text = previous_html if previous_digest == last.content_digest else self.reconstruct(last)
+
+            number = last.number + 1 if last else 1
+            revision = self._create(website, number, html, digest, last, base_text, source, summary, user)
+
+        logger.info(f"✅ Website {website.pk} revision {revision.number} recorded ({source}, snapshot={revision.is_snapshot})")
+        return revision
+
+    def _create(self, website, number, html, digest, last, base_text, source, summary, user) -> WebsiteRevision:
+        size = len(html.encode('utf-8'))
+        revision = WebsiteRevision(
+            website_id=website.pk,
+            number=number,
+            content_digest=digest,
+            size=size,
+            source=source,
+            summary=(summary or '')[:255],
+            created_by=user,
+        )
+
+        delta = compute_line_delta(base_text, html) if base_text is not None else None
+        if delta is not None and delta_size(delta) <= size * self.max_delta_ratio:
+            revision.snapshot_number = last.snapshot_number
+            revision.delta = delta
+        else:
+            revision.snapshot_number = number
+            revision.snapshot_blob_id = ContentBlob.store(html)
+
+        revision.save()
+        return revision
+
+    def reconstruct(self, revision: WebsiteRevision) -> str:
+        """Snapshot'tan başlayıp revizyona kadar olan delta'ları uygular"""
+        if revision.is_snapshot:
+            text = revision.snapshot_blob.text
+        else:
+            chain = list(
+                WebsiteRevision.objects.filter(
+                    website_id=revision.website_id,
+                    number__gte=revision.snapshot_number,
+                    number__lte=revision.number,
+                ).select_related('snapshot_blob').order_by('number')
+            )
+            text = chain[0].snapshot_blob.text
+            for step in chain[1:]:
+                text = apply_line_delta(text, step.delta)
+
+        if ContentBlob.digest(text) != revision.content_digest:
+            raise RevisionIntegrityError(f"Revision {revision.number} of website {revision.website_id} failed integrity check")
+        return text
+
+    def diff(self, website: Website, from_number: int, to_number: int) -> Dict:
+        old_text = self.reconstruct(self.get_revision(website.pk, from_number))
+        new_text = self.reconstruct(self.get_revision(website.pk, to_number))
+        diff_text = unified_diff(old_text, new_text, f'r{from_number}', f'r{to_number}')
+
+        added = removed = 0
+        for line in diff_text.splitlines():
+            if line.startswith('+') and not line.startswith('+++'):
+                added += 1
+            elif line.startswith('-') and not line.startswith('---'):
+                removed += 1
+
+        return {
+            'from': from_number,
+            'to': to_number,
+            'diff': diff_text,
+            'lines_added': added,
+            'lines_removed': removed
+        }
+
+    def restore(self, website: Website, number: int, user=None) -> WebsiteRevision:
+        """Eski bir revizyonu website'in güncel HTML'i yapar ve 'restore' revizyonu açar"""
+        target = self.get_revision(website.pk, number)
+        html = self.reconstruct(target)
+
+        with transaction.atomic():
+            previous_html = website.html_content
+            website.html_content = html
+            website.save(update_fields=['html_content', 'updated_at'])
+            return self.record(website, html, 'restore', f"Restored revision {number}", user, previous_html=previous_html)
+
+
+_website_revision_service: Optional[WebsiteRevisionService] = None
+
+
+def get_website_revision_service() -> WebsiteRevisionService:
+    global _website_revision_service
+    if _website_revision_service is None:
+        _website_revision_service = WebsiteRevisionService()
+    return _website_revision_service
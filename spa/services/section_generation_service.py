@@ -0,0 +1,293 @@
+# spa/services/section_generation_service.py
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from google import genai
+from google.genai import types
+
+from spa.utils.html_index import build_html_index, iter_tags, parse_attrs
+
+logger = logging.getLogger(__name__)
+
+SECTION_MARKER = "<!-- SECTION:{id} -->"
+# Şablondaki section id'sinin business_context / context_images karşılığı
+SECTION_ALIASES = {'home': 'hero'}
+# Section parçasında bulunmaması gereken doküman etiketleri
+DOCUMENT_TAGS = ('html', 'head', 'body')
+
+
+class SectionGenerationError(Exception):
+    """Bir section (veya iskelet) tekrar denemelere rağmen üretilemedi"""
+
+
+def clean_generated_html(text: str) -> str:
+    """Gemini çıktısındaki ```html çitlerini temizler"""
+    content = (text or '').strip()
+    if content.startswith("```html") and "```" in content[6:]:
+        content = content.replace("```html", "", 1)
+        content = content.rsplit("```", 1)[0].strip()
+    elif content.startswith("```") and content.endswith("```"):
+        content = content[3:-3].strip()
+    return content
+
+
+def split_template_sections(template: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Şablonu iskelet ve section'lara ayırır: en dıştaki her <section id="..."> bloğu
+    SECTION_MARKER ile değiştirilir. (iskelet, [(section id, şablon bloğu), ...]) sırayla döner.
+    """
+    sections = []
+    depth = 0
+    section_start = section_id = None
+    for kind, name, self_closing, attrs, start, end, _, _ in iter_tags(template):
+        if name != 'section' or self_closing:
+            continue
+        if kind == 'open':
+            if depth == 0:
+                section_id = parse_attrs(attrs).get('id')
+                section_start = start
+            depth += 1
+        elif kind == 'close' and depth:
+            depth -= 1
+            if depth == 0 and section_id:
+                sections.append((section_id, section_start, end))
+
+    parts, cursor = [], 0
+    for section_id, start, end in sections:
+        parts.append(template[cursor:start])
+        parts.append(SECTION_MARKER.format(id=section_id))
+        cursor = end
+    parts.append(template[cursor:])
+    return ''.join(parts), [(section_id, template[start:end]) for section_id, start, end in sections]
+
+
+def section_images(context_images: Optional[Dict], section_id: str) -> Dict:
+    """context_images'tan section'a ait olanlar ({section}_image, {section}_1, ...)"""
+    name = SECTION_ALIASES.get(section_id, section_id)
+    return {
+        key: value for key, value in (context_images or {}).items()
+        if key == f"{name}_image" or (key.startswith(f"{name}_") and key[len(name) + 1:].isdigit())
+    }
+
+
+def validate_skeleton(html: str, section_ids: List[str]) -> List[str]:
+    """İskelet kontrolü: tek doküman, dengeli etiketler ve her section için tam bir marker"""
+    errors = []
+    index = build_html_index(html)
+    if not index['has_doctype']:
+        errors.append("Missing <!DOCTYPE html>")
+    for tag in DOCUMENT_TAGS:
+        if index['tag_counts'].get(tag, 0) != 1 or index['closing_counts'].get(tag, 0) != 1:
+            errors.append(f"Expected exactly one <{tag}>...</{tag}>")
+    for section_id in section_ids:
+        count = html.count(SECTION_MARKER.format(id=section_id))
+        if count != 1:
+            errors.append(f"Marker for section '{section_id}' found {count} times")
+    if index['tag_counts'].get('section'):
+        errors.append("Skeleton must not contain <section> elements")
+    if index['unclosed'] or index['stray_closes']:
+        errors.append(f"Unbalanced tags: unclosed {index['unclosed'][:5]}, stray {index['stray_closes'][:5]}")
+    return errors
+
+
+def validate_section(html: str, section_id: str) -> List[str]:
+    """Section parçası kontrolü: tek <section id=...> bloğu, doküman etiketi yok, etiketler dengeli"""
+    errors = []
+    if not html.startswith('<section') or not html.endswith('</section>'):
+        errors.append("Fragment must be a single <section>...</section> block")
+    index = build_html_index(html)
+    for tag in DOCUMENT_TAGS:
+        if index['tag_counts'].get(tag) or index['closing_counts'].get(tag):
+            errors.append(f"Fragment must not contain <{tag}>")
+    if index['doctype_count']:
+        errors.append("Fragment must not contain <!DOCTYPE>")
+    if not index['sections'] or index['sections'][0]['id'] != section_id or index['sections'][0]['tag'] != 'section':
+        errors.append(f"Fragment must start with <section id=\"{section_id}\">")
+    if index['unclosed'] or index['stray_closes']:
+        errors.append(f"Unbalanced tags: unclosed {index['unclosed'][:5]}, stray {index['stray_closes'][:5]}")
+    return errors
+
+
+def stitch_sections(skeleton: str, sections: List[Tuple[str, str]]) -> str:
+    """Section'ları iskeletteki marker'larına, verilen sırayla yerleştirir (deterministik)"""
+    html = skeleton
+    for section_id, fragment in sections:
+        html = html.replace(SECTION_MARKER.format(id=section_id), fragment, 1)
+    return html
+
+
+SKELETON_INSTRUCTIONS = """
+
+🧩 SECTION-PARALLEL GENERATION — STEP 1: PAGE SKELETON
+Sections are generated separately. In THIS response generate ONLY the page skeleton:
+- The complete <head>: meta/SEO tags, fonts, Tailwind config, CSS variables, theme and ALL shared CSS classes the sections will use
+- The navigation, footer, back-to-top button and all closing <script> blocks (EmailJS, AOS, Swiper, Typed.js, ...)
+- In place of every section output EXACTLY its marker comment, once, in this order:
+{markers}
+- Do NOT write any <section> element yourself.
+
+SKELETON TO ENHANCE:
+{shell}
+
+Return ONLY the complete HTML document, starting with <!DOCTYPE html>.
+"""
+
+SECTION_PROMPT = """You are generating ONE section of a website whose page skeleton (head, theme, navigation, footer, scripts) already exists.
+
+APPROVED DESIGN PLAN:
+{plan}
+
+ORIGINAL USER REQUEST:
+{original_prompt}
+
+BUSINESS CONTEXT FOR THIS SECTION:
+{section_context}
+
+COLOR PALETTE:
+{color_palette}
+
+PAGE <head> (use ONLY the CSS variables, classes, fonts and libraries defined here):
+{head}
+
+BASE SECTION TO ENHANCE:
+{template}
+
+🖼️ IMAGES FOR THIS SECTION (use these exact URLs):
+{images}
+
+RULES:
+1. Output exactly one <section id="{section_id}"> ... </section> element and nothing else (no <html>, <head>, <body>, navigation or footer)
+2. Keep id="{section_id}" so navigation links keep working
+3. Every editable text/image element gets a unique data-element-id prefixed with "{section_id}-"
+4. Section-specific CSS/JS may be placed inside the section in <style>/<script> tags
+5. Keep the contact form exactly as in the base section (EmailJS) if present
+6. Fully responsive, accessible and consistent with the design plan
+{previous_errors}
+Return ONLY the HTML of the section.
+"""
+
+
+class SectionParallelGenerator:
+    """
+    Website HTML'ini section bazında paralel üretir: önce ortak iskelet (head/tema/nav/footer),
+    ardından her section kendi prompt'u ve görselleriyle eşzamanlı üretilir ve iskelete sırayla
+    yerleştirilir. Her parça doğrulanır; hatalı parça tek başına yeniden üretilir.
+    Süre ≈ iskelet + en yavaş section.
+    """
+
+    def __init__(self):
+        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        self.model = getattr(settings, 'WEBSITE_SECTION_GENERATION_MODEL', 'gemini-2.5-flash')
+        self.max_workers = getattr(settings, 'WEBSITE_SECTION_GENERATION_WORKERS', 6)
+        self.retries = getattr(settings, 'WEBSITE_SECTION_GENERATION_RETRIES', 2)
+
+    def _generate(self, prompt: str) -> str:
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=[types.Content(role="user", parts=[types.Part.from_text(text=prompt)])],
+            config=types.GenerateContentConfig(response_mime_type="text/plain"),
+        )
+        return clean_generated_html(response.text)
+
+    def _generate_validated(self, label: str, build_prompt: Callable[[str], str],
+                            validate: Callable[[str], List[str]]) -> Tuple[str, int]:
+        """Parçayı üretir ve doğrular; hata varsa hatalarla birlikte sadece bu parça tekrar istenir"""
+        errors = []
+        for attempt in range(1, self.retries + 2):
+            previous_errors = ''
+            if errors:
+                previous_errors = "\n⚠️ YOUR PREVIOUS ATTEMPT WAS REJECTED:\n" + '\n'.join(f"- {error}" for error in errors) + "\n"
+            try:
+                html = self._generate(build_prompt(previous_errors))
+                errors = validate(html)
+            except Exception as e:
+                html, errors = '', [f"Generation failed: {str(e)}"]
+            if not errors:
+                return html, attempt
+            logger.warning(f"⚠️ {label} attempt {attempt} rejected: {'; '.join(errors[:3])}")
+        raise SectionGenerationError(f"{label} could not be generated: {'; '.join(errors[:3])}")
+
+    def generate(self, design_plan, enhanced_prompt: str, context_images: Dict, color_palette: Dict,
+                 business_context: Optional[Dict] = None) -> Dict:
+        """
+        {'html', 'sections': [id, ...], 'timings': {parça: saniye}, 'attempts': {parça: deneme}} döner.
+        Herhangi bir parça üretilemezse SectionGenerationError fırlatılır (çağıran tek parça üretime döner).
+        """
+        from spa.api.template_prompts.base_html_2 import BASE_HTML_TEMPLATE
+
+        shell, template_sections = split_template_sections(BASE_HTML_TEMPLATE)
+        section_ids = [section_id for section_id, _ in template_sections]
+        sections_needed = (business_context or {}).get('sections_needed', {})
+        timings, attempts = {}, {}
+
+        # 1) İskelet: tüm tasarım kuralları + section'sız şablon (kısa çıktı)
+        started = time.time()
+        markers = '\n'.join(SECTION_MARKER.format(id=section_id) for section_id in section_ids)
+        skeleton, attempts['skeleton'] = self._generate_validated(
+            'Skeleton',
+            lambda previous_errors: enhanced_prompt + SKELETON_INSTRUCTIONS.format(markers=markers, shell=shell) + previous_errors,
+            lambda html: validate_skeleton(html, section_ids),
+        )
+        timings['skeleton'] = time.time() - started
+        head_end = skeleton.lower().find('</head>')
+        head = skeleton[:head_end + len('</head>')]
+
+        # 2) Section'lar paralel: her biri sadece kendi şablon bloğu ve görselleriyle
+        def generate_section(section_id: str, template: str) -> Tuple[str, int, float]:
+            section_started = time.time()
+            section_context = sections_needed.get(SECTION_ALIASES.get(section_id, section_id), {})
+            html, section_attempts = self._generate_validated(
+                f"Section '{section_id}'",
+                lambda previous_errors: SECTION_PROMPT.format(
+                    plan=design_plan.current_plan,
+                    original_prompt=design_plan.original_prompt,
+                    section_context=json.dumps(section_context, indent=2),
+                    color_palette=json.dumps(color_palette, indent=2),
+                    head=head,
+                    template=template,
+                    images=json.dumps(section_images(context_images, section_id), indent=2),
+                    section_id=section_id,
+                    previous_errors=previous_errors,
+                ),
+                lambda fragment: validate_section(fragment, section_id),
+            )
+            return html, section_attempts, time.time() - section_started
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(template_sections)))) as executor:
+            futures = [
+                (section_id, executor.submit(generate_section, section_id, template))
+                for section_id, template in template_sections
+            ]
+            fragments = []
+            for section_id, future in futures:
+                html, attempts[section_id], timings[section_id] = future.result()
+                fragments.append((section_id, html))
+
+        # 3) Sırayla birleştir ve son dokümanı doğrula
+        html = stitch_sections(skeleton, fragments)
+        index = build_html_index(html)
+        missing = [section_id for section_id in section_ids if section_id not in {section['id'] for section in index['sections']}]
+        if missing or index['unclosed'] or index['stray_closes']:
+            raise SectionGenerationError(
+                f"Stitched document is invalid: missing {missing}, unclosed {index['unclosed'][:5]}, stray {index['stray_closes'][:5]}"
+            )
+
+        logger.info(
+            f"✅ Section-parallel generation: {len(fragments)} sections, skeleton {timings['skeleton']:.2f}s, "
+            f"slowest section {max((timings[section_id] for section_id in section_ids), default=0):.2f}s"
+        )
+        return {'html': html, 'sections': section_ids, 'timings': timings, 'attempts': attempts}
+
+
+_section_parallel_generator: Optional[SectionParallelGenerator] = None
+
+
+def get_section_parallel_generator() -> SectionParallelGenerator:
+    global _section_parallel_generator
+    if _section_parallel_generator is None:
+        _section_parallel_generator = SectionParallelGenerator()
+    return _section_parallel_generator
@@ -13,6 +13,8 @@ from google import genai
 from google.genai import types
 from spa.models import Website
 from spa.models import WebsiteDesignPlan
+from spa.utils.html_index import get_website_html_index
+from spa.utils.html_validator import validate_html_change
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -180,42 +182,67 @@ def create_website_optimized(self, plan_id, user_id):
         website_serializer.is_valid(raise_exception=True)
         website = website_serializer.save()
         
-        # ✅ EXACTLY SAME Gemini generation (no changes)
-        from google import genai
-        from google.genai import types
-        
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        contents = [
-            types.Content(
-                role="user",
-                parts=[types.Part.from_text(text=enhanced_prompt)],
-            ),
-        ]
-        
-        generate_content_config = types.GenerateContentConfig(
-            response_mime_type="text/plain",
+        # Section-parallel üretim (opsiyonel): iskelet + eşzamanlı section'lar; başarısız olursa tek parça üretime dönülür
+        generation_mode = design_plan.design_preferences.get(
+            'generation_mode',
+            'sections' if getattr(settings, 'WEBSITE_SECTION_PARALLEL_GENERATION', False) else 'single'
         )
-        
-        response = client.models.generate_content(
-            # model="gemini-2.5-flash-preview-05-20",
-            model="gemini-2.5-flash",
-            contents=contents,
-            config=generate_content_config,
-        )
-        
-        # ✅ EXACTLY SAME HTML cleaning (no changes)
-        content = response.text.strip()
-        if content.startswith("```html") and "```" in content[6:]:
-            content = content.replace("```html", "", 1)
-            content = content.rsplit("```", 1)[0].strip()
-        elif content.startswith("```") and content.endswith("```"):
-            content = content[3:-3].strip()
-        
+        content = None
+        section_timings = None
+        if generation_mode == 'sections':
+            from spa.services.section_generation_service import SectionGenerationError, get_section_parallel_generator
+            try:
+                generated = get_section_parallel_generator().generate(
+                    design_plan, enhanced_prompt, context_images, color_palette, business_context
+                )
+                content = generated['html']
+                section_timings = generated['timings']
+            except SectionGenerationError as e:
+                logger.warning(f"⚠️ Section-parallel generation failed, falling back to single response: {str(e)}")
+                generation_mode = 'single'
+
+        if content is None:
+            # ✅ EXACTLY SAME Gemini generation (no changes)
+            from google import genai
+            from google.genai import types
+            from spa.services.section_generation_service import clean_generated_html
+
+            client = genai.Client(api_key=settings.GEMINI_API_KEY)
+            contents = [
+                types.Content(
+                    role="user",
+                    parts=[types.Part.from_text(text=enhanced_prompt)],
+                ),
+            ]
+
+            generate_content_config = types.GenerateContentConfig(
+                response_mime_type="text/plain",
+            )
+
+            response = client.models.generate_content(
+                # model="gemini-2.5-flash-preview-05-20",
+                model="gemini-2.5-flash",
+                contents=contents,
+                config=generate_content_config,
+            )
+
+            # ✅ EXACTLY SAME HTML cleaning (no changes)
+            content = clean_generated_html(response.text)
+
         if not content.startswith("<!DOCTYPE") and not content.startswith("<html"):
             content = f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"UTF-8\">\n<meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n<title>Generated Website</title>\n</head>\n<body>\n{content}\n</body>\n</html>"
         
         website.html_content = content
-        website.save()
+        # İlk kayıt (INSERT) kullanıcı satırı kilitliyken: eşzamanlı approve'lar limiti aşamaz
+        from spa.services.quota_service import get_website_quota_service
+        with get_website_quota_service().reserve(user):
+            website.save()
+        
+        try:
+            from spa.services.revision_service import get_website_revision_service
+            get_website_revision_service().record(website, content, 'generate', 'Initial generation', user)
+        except Exception as e:
+            logger.warning(f"⚠️ Initial revision could not be recorded for website {website.id}: {str(e)}")
         
         design_plan.is_approved = True
         design_plan.save()
@@ -223,18 +250,30 @@ def create_website_optimized(self, plan_id, user_id):
         processing_time = time.time() - start_time
         logger.info(f"🎉 Optimized completion in {processing_time:.2f}s")
         
+        # business_context Website'te, context_images generation cache'inde durur;
+        # task_status bunları sonuç backend'i yerine oradan okur
         return {
             'success': True,
             'website_id': website.id,
-            'business_context': business_context,
-            'context_images': context_images,
+            'generation_cache_key': cache_key,
             'color_palette': color_palette,
             'accessibility_scores': accessibility_check['scores'],
             'image_generation_method': processing_method,
+            'generation_mode': generation_mode,
+            'section_timings': section_timings,
             'processing_time': processing_time
         }
         
     except Exception as e:
+        from spa.services.quota_service import WebsiteLimitExceeded
+        if isinstance(e, WebsiteLimitExceeded):
+            logger.warning(f"⚠️ Website creation rejected: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'limit_exceeded': True,
+                'limit_details': e.quota
+            }
         logger.error(f"❌ Optimized task failed: {str(e)}")
         if self.request.retries < self.max_retries:
             raise self.retry(countdown=60 * (2 ** self.request.retries))
@@ -473,6 +512,14 @@ def ai_line_edit_task(self, website_id, user_request, user_id):
         user = User.objects.get(id=user_id)
         website = Website.objects.get(id=website_id, user=user)
         
+        # Bekleyen inline metin düzenlemeleri önce HTML'e işlenir; AI güncel metni görür
+        if website.element_contents:
+            try:
+                from spa.services.element_patch_service import get_element_patch_service
+                get_element_patch_service().compact(website, user)
+            except Exception as e:
+                logger.warning(f"⚠️ Element content compaction failed for website {website_id}: {str(e)}")
+        
         # Store original HTML for comparison
         original_html = website.html_content
         original_length = len(original_html)
@@ -481,8 +528,8 @@ def ai_line_edit_task(self, website_id, user_request, user_id):
         from spa.api.views import LineBasedAIEditor  # Import here to avoid circular imports
         editor = LineBasedAIEditor()
         
-        # Prepare context
-        ai_prompt = editor.prepare_line_context(website.html_content, user_request)
+        # Prepare context (yapı indeksi HTML digest'i ile cache'lenir)
+        ai_prompt = editor.prepare_line_context(website.html_content, user_request, get_website_html_index(website))
         
         # Initialize Gemini client
         client = genai.Client(api_key=settings.GEMINI_API_KEY)
@@ -560,11 +607,28 @@ Example valid response:
             if website.html_content != modified_html:
                 raise Exception("Database save verification failed")
             
+            # Undo için revizyon (önceki HTML ilk düzenlemede 'initial' olarak saklanır)
+            revision_number = None
+            try:
+                from spa.services.revision_service import get_website_revision_service
+                revision = get_website_revision_service().record(
+                    website, modified_html, 'ai_edit', user_request, user, previous_html=original_html
+                )
+                revision_number = revision.number
+            except Exception as e:
+                logger.warning(f"⚠️ Revision could not be recorded for website {website_id}: {str(e)}")
+            
             logger.info(f"✅ AI line edit completed: {website_id} for user {user_id}")
             
+            # Sonuç backend'ine tüm sayfa değil sadece değişen satırlar yazılır;
+            # tam HTML gerekirse revizyon/website üzerinden DB'den okunur
+            from spa.utils.line_delta import compute_line_delta, delta_to_hunks
+            
             return {
                 'success': True,
-                'modified_html': modified_html,
+                'revision': revision_number,
+                'html_digest': website.html_digest,
+                'hunks': delta_to_hunks(compute_line_delta(original_html, modified_html)),
                 'analysis': ai_response.get('analysis', 'No analysis provided'),
                 'changes_applied': len(ai_response.get('line_changes', [])),
                 'summary': ai_response.get('summary', 'No summary provided'),
@@ -577,7 +641,9 @@ Example valid response:
             logger.info(f"No line changes needed for website {website_id}")
             return {
                 'success': True,
-                'modified_html': website.html_content,
+                'revision': None,
+                'html_digest': website.html_digest,
+                'hunks': [],
                 'analysis': ai_response.get('analysis', 'No changes needed'),
                 'changes_applied': 0,
                 'summary': 'No modifications required',
@@ -609,57 +675,20 @@ Example valid response:
 
 def _perform_html_validation(original_html, modified_html, user_request):
     """
-    ✅ NEW: Comprehensive HTML validation using existing helper functions
+    ✅ Comprehensive HTML validation: her doküman bir kez taranır (spa/utils/html_validator.py)
     """
-    validation_result = {
-        'valid': True,
-        'errors': [],
-        'warnings': []
-    }
-    
     try:
-        # Basic checks
-        if not modified_html or not modified_html.strip():
-            validation_result['valid'] = False
-            validation_result['errors'].append("Modified HTML is empty")
-            return validation_result
-        
-        # Use existing validation functions
-        critical_tags = _check_critical_tags(original_html, modified_html)
-        js_integrity = _check_javascript_integrity(original_html, modified_html)
-        css_integrity = _check_css_integrity(original_html, modified_html)
-        
-        # Check critical tags
-        for tag, info in critical_tags.items():
-            if not info['intact']:
-                validation_result['valid'] = False
-                validation_result['errors'].append(f"Critical tag {tag} is corrupted: {info['original']} → {info['modified']}")
-        
-        # Check JavaScript integrity
-        if not js_integrity['scripts_intact']:
-            validation_result['warnings'].append(f"JavaScript blocks changed: {js_integrity['original_count']} → {js_integrity['modified_count']}")
-        
-        # Check CSS integrity
-        if not css_integrity['styles_intact']:
-            validation_result['warnings'].append(f"CSS blocks changed: {css_integrity['original_count']} → {css_integrity['modified_count']}")
-        
-        # Size sanity check
-        original_length = len(original_html)
-        modified_length = len(modified_html)
-        
-        if modified_length < original_length * 0.3:  # If shrunk by more than 70%
-            validation_result['valid'] = False
-            validation_result['errors'].append(f"HTML dramatically reduced in size: {original_length} → {modified_length}")
-        
+        validation_result = validate_html_change(original_html, modified_html)
         logger.info(f"✅ HTML validation completed: {'VALID' if validation_result['valid'] else 'INVALID'}")
-        
         return validation_result
         
     except Exception as e:
         logger.error(f"❌ HTML validation failed: {str(e)}")
-        validation_result['valid'] = False
-        validation_result['errors'].append(f"Validation error: {str(e)}")
-        return validation_result
+        return {
+            'valid': False,
+            'errors': [f"Validation error: {str(e)}"],
+            'warnings': []
+        }
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def update_plan_task(self, plan_id, feedback, user_id):
@@ -941,6 +970,9 @@ def upload_image_task(self, image_data_serializable, metadata, user_id, website_
         )
         logger.info(f"✅ Image saved to DB: {uploaded_image.id}, Optimized: {optimized}")
 
+        from spa.services.image_variant_service import get_image_variant_service
+        get_image_variant_service().generate(uploaded_image, source_bytes=image_content)
+
         return {
             'success': True,
             'image_id': uploaded_image.id,
@@ -963,6 +995,124 @@ def upload_image_task(self, image_data_serializable, metadata, user_id, website_
             'error': str(e)
         }
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def process_uploaded_image_task(self, storage_name, metadata, user_id, website_id):
+    """Process an image that is already in storage (direct S3 upload) by its key"""
+
+    try:
+        user = User.objects.get(id=user_id)
+        website = Website.objects.get(id=website_id, user=user)
+        title = metadata.get('title', 'Uploaded Image')
+
+        if not default_storage.exists(storage_name):
+            # Client upload'ı tamamlamadan complete çağırmış olabilir
+            raise Exception(f"Uploaded object not found: {storage_name}")
+
+        file_size = default_storage.size(storage_name)
+        if file_size > 10 * 1024 * 1024:  # 10MB
+            default_storage.delete(storage_name)
+            return {'success': False, 'error': 'Image file too large (max 10MB)'}
+
+        # Dosya S3'ten stream edilir; sadece header doğrulanır, büyükse optimize edilir
+        with default_storage.open(storage_name, 'rb') as stored_file:
+            with Image.open(stored_file) as img:
+                if img.format not in ['JPEG', 'PNG', 'GIF', 'WEBP']:
+                    default_storage.delete(storage_name)
+                    return {'success': False, 'error': f"Unsupported image format: {img.format}"}
+
+                optimized_image_content = None
+                if file_size > 2 * 1024 * 1024:  # If larger than 2MB, optimize
+                    logger.info(f"Optimizing large image: {file_size} bytes")
+
+                    max_dimension = 1920
+                    if img.width > max_dimension or img.height > max_dimension:
+                        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+                    optimized_buffer = BytesIO()
+                    save_format = 'PNG' if img.format == 'PNG' else 'JPEG'
+                    if save_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+                        img = img.convert('RGB')
+                    img.save(optimized_buffer, format=save_format, quality=85, optimize=True)
+                    optimized_image_content = optimized_buffer.getvalue()
+
+        uploaded_image = UploadedImage(user=user, website=website, title=title)
+        if optimized_image_content:
+            original_name = os.path.basename(storage_name)
+            uploaded_image.image.save(f"optimized_{original_name}", ContentFile(optimized_image_content), save=False)
+            default_storage.delete(storage_name)
+            optimized = True
+        else:
+            # Obje zaten yerinde: tekrar upload edilmez, sadece key kaydedilir
+            uploaded_image.image.name = storage_name
+            optimized = False
+        uploaded_image.save()
+
+        logger.info(f"✅ Image saved to DB: {uploaded_image.id}, Optimized: {optimized}")
+
+        from spa.services.image_variant_service import get_image_variant_service
+        variant_result = get_image_variant_service().generate(uploaded_image)
+
+        return {
+            'success': True,
+            'image_id': uploaded_image.id,
+            'image_url': uploaded_image.image.url,
+            'title': uploaded_image.title,
+            'file_size': len(optimized_image_content) if optimized_image_content else file_size,
+            'optimized': optimized,
+            'variants': variant_result.get('success', False)
+        }
+
+    except Exception as e:
+        logger.error(f"❌ process_uploaded_image_task failed: {str(e)}", exc_info=True)
+        try:
+            self.retry(exc=e, countdown=int(self.default_retry_delay * (2 ** self.request.retries)))
+        except self.MaxRetriesExceededError:
+            logger.error(f"Max retries exceeded for task {self.request.id}.")
+
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=30, ignore_result=True)
+def generate_image_variants_task(self, image_id):
+    """Generate (or regenerate) size/format variants for an existing UploadedImage"""
+    from spa.services.image_variant_service import get_image_variant_service
+
+    try:
+        uploaded_image = UploadedImage.objects.get(id=image_id)
+    except UploadedImage.DoesNotExist:
+        return {'success': False, 'error': f"Image {image_id} not found"}
+
+    result = get_image_variant_service().generate(uploaded_image)
+    if not result['success']:
+        try:
+            self.retry(countdown=self.default_retry_delay)
+        except self.MaxRetriesExceededError:
+            logger.error(f"Max retries exceeded for task {self.request.id}.")
+    return {'success': result['success'], 'image_id': image_id, 'error': result.get('error')}
+
+@shared_task(bind=True, ignore_result=True)
+def reconcile_website_counts_task(self):
+    """Periodically resync cached per-user website counters with the database"""
+    from spa.services.quota_service import get_website_quota_service
+
+    summary = get_website_quota_service().reconcile()
+    logger.info(f"✅ Website count reconciliation: {summary['checked']} users checked, {summary['fixed']} fixed")
+    return summary
+
+@shared_task(bind=True, ignore_result=True)
+def purge_orphan_content_blobs_task(self):
+    """Delete compressed content blobs no website references anymore (after a grace period)"""
+    from datetime import timedelta
+    from django.utils import timezone
+    from spa.models import ContentBlob
+
+    grace_hours = getattr(settings, 'CONTENT_BLOB_ORPHAN_GRACE_HOURS', 24)
+    deleted = ContentBlob.purge_orphans(timezone.now() - timedelta(hours=grace_hours))
+    logger.info(f"✅ Purged {deleted} orphan content blobs")
+    return deleted
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=90)
 def generate_photos_task(self, business_context, section_queries, user_id, plan_id=None):
     """Background task for generating contextual photos"""
@@ -1260,39 +1410,32 @@ def validate_html_structure_task(self, original_html, modified_html, user_reques
         user = User.objects.get(id=user_id)
         website = Website.objects.get(id=website_id, user=user)
         
-        # Import validation function
-        # Use validation functions from tasks
+        # Tek geçişli yapısal validasyon (indeksler digest ile cache'li)
+        report = validate_html_change(original_html, modified_html)
         validation_result = {
-            'valid': True,
-            'errors': [],
-            'warnings': []
+            'valid': report['valid'],
+            'errors': list(report['errors']),
+            'warnings': list(report['warnings'])
         }
 
-        # Basic validation checks
-        critical_tags = _check_critical_tags(original_html, modified_html)
-        js_integrity = _check_javascript_integrity(original_html, modified_html)
-        css_integrity = _check_css_integrity(original_html, modified_html)
-
-        # Check if all critical tags are intact
-        if not all(tag['intact'] for tag in critical_tags.values()):
-            validation_result['valid'] = False
-            validation_result['errors'].append("Critical HTML tags are missing or unbalanced")
-
-        if not js_integrity['scripts_intact']:
+        # Bu task script/style blok sayısı değişimini de hata sayar
+        if 'scripts' in report and not report['scripts']['scripts_intact']:
             validation_result['valid'] = False
             validation_result['errors'].append("JavaScript blocks are corrupted")
 
-        if not css_integrity['styles_intact']:
+        if 'styles' in report and not report['styles']['styles_intact']:
             validation_result['valid'] = False
             validation_result['errors'].append("CSS blocks are corrupted")
         
         # Enhanced validation with additional checks
         additional_checks = {
-            'html_size_change': len(modified_html) - len(original_html),
-            'line_count_change': len(modified_html.split('\n')) - len(original_html.split('\n')),
-            'critical_tags_intact': _check_critical_tags(original_html, modified_html),
-            'javascript_integrity': _check_javascript_integrity(original_html, modified_html),
-            'css_integrity': _check_css_integrity(original_html, modified_html)
+            'html_size_change': report.get('html_size_change', len(modified_html or '') - len(original_html)),
+            'line_count_change': report.get('line_count_change', 0),
+            'critical_tags_intact': report.get('critical_tags', {}),
+            'javascript_integrity': report.get('scripts', {}),
+            'css_integrity': report.get('styles', {}),
+            'tag_balance': report.get('tag_balance', {}),
+            'structure': report.get('structure', {})
         }
         
         # Combine results
@@ -1339,54 +1482,6 @@ def validate_html_structure_task(self, original_html, modified_html, user_reques
         }
 
 
-def _check_critical_tags(original_html, modified_html):
-    """Check if critical HTML tags are maintained"""
-    
-    critical_tags = ['<!DOCTYPE', '<html', '<head', '<body', '</html>', '</head>', '</body>']
-    results = {}
-    
-    for tag in critical_tags:
-        original_count = original_html.count(tag)
-        modified_count = modified_html.count(tag)
-        results[tag] = {
-            'original': original_count,
-            'modified': modified_count,
-            'intact': original_count == modified_count
-        }
-    
-    return results
-
-
-def _check_javascript_integrity(original_html, modified_html):
-    """Check JavaScript block integrity"""
-    
-    script_pattern = r'<script[^>]*>.*?</script>'
-    
-    original_scripts = re.findall(script_pattern, original_html, re.DOTALL | re.IGNORECASE)
-    modified_scripts = re.findall(script_pattern, modified_html, re.DOTALL | re.IGNORECASE)
-    
-    return {
-        'original_count': len(original_scripts),
-        'modified_count': len(modified_scripts),
-        'scripts_intact': len(original_scripts) == len(modified_scripts)
-    }
-
-
-def _check_css_integrity(original_html, modified_html):
-    """Check CSS block integrity"""
-    
-    style_pattern = r'<style[^>]*>.*?</style>'
-    
-    original_styles = re.findall(style_pattern, original_html, re.DOTALL | re.IGNORECASE)
-    modified_styles = re.findall(style_pattern, modified_html, re.DOTALL | re.IGNORECASE)
-    
-    return {
-        'original_count': len(original_styles),
-        'modified_count': len(modified_styles),
-        'styles_intact': len(original_styles) == len(modified_styles)
-    }
-
-
 @shared_task(bind=True, max_retries=2, default_retry_delay=30)
 def generate_color_palette_task(self, primary_color, theme, user_id, cache_key=None):
     """Background task for generating accessible color palette"""
@@ -0,0 +1,83 @@
+# utils/blurhash.py
+import math
+
+BASE83_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _encode_base83(value, length):
+    """Sayıyı sabit uzunlukta base83 string'e çevir"""
+    result = ""
+    for i in range(1, length + 1):
+        digit = (value // (83 ** (length - i))) % 83
+        result += BASE83_CHARS[digit]
+    return result
+
+
+def _srgb_to_linear(value):
+    v = value / 255.0
+    return v / 12.92 if v <= 0.04045 else math.pow((v + 0.055) / 1.055, 2.4)
+
+
+def _linear_to_srgb(value):
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * math.pow(v, 1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exp):
+    return math.copysign(math.pow(abs(value), exp), value)
+
+
+def encode_blurhash(image, x_components=4, y_components=3):
+    """
+    Küçük bir PIL RGB görselinden blurhash üret (https://blurha.sh algoritması).
+    Görsel önceden ~32px'e küçültülmelidir, maliyet piksel * bileşen sayısıdır.
+    """
+    width, height = image.size
+    pixels = [
+        (_srgb_to_linear(r), _srgb_to_linear(g), _srgb_to_linear(b))
+        for r, g, b in image.convert('RGB').getdata()
+    ]
+
+    factors = []
+    for j in range(y_components):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(x_components):
+            cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                for x in range(width):
+                    basis = cos_x[x] * cos_y[y]
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode_base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(component) for factor in ac for component in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _encode_base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _encode_base83(0, 1)
+
+    dc_value = (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2])
+    result += _encode_base83(dc_value, 4)
+
+    for factor in ac:
+        quant = [
+            max(0, min(18, int(math.floor(_sign_pow(component / max_value, 0.5) * 9 + 9.5))))
+            for component in factor
+        ]
+        result += _encode_base83(quant[0] * 19 * 19 + quant[1] * 19 + quant[2], 2)
+
+    return result
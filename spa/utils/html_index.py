@@ -0,0 +1,291 @@
+# utils/html_index.py
+import hashlib
+import logging
+import re
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# İndeks şekli değişirse artırılır (eski cache kayıtları okunmaz)
+INDEX_VERSION = 2
+INDEX_CACHE_PREFIX = "html_index"
+
+# Kapanmamış / eşleşmeyen etiket listelerinde tutulan en fazla kayıt
+MAX_BALANCE_ISSUES = 50
+
+# Tek bir regex ile sırayla: yorum, doctype/<!...>, açılış/kapanış etiketi.
+# Attribute değerleri tırnak içinde '>' içerebilir; alternatifler ayrık olduğu için geri izleme yok.
+TOKEN_RE = re.compile(
+    r'<!--.*?(?:-->|\Z)'
+    r'|<![^>]*>'
+    r'|<(?P<closing>/)?(?P<name>[a-zA-Z][a-zA-Z0-9:-]*)(?P<attrs>(?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.DOTALL
+)
+ATTR_RE = re.compile(r'([^\s=/>"\']+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>"\']+)))?')
+RAW_TEXT_TAGS = ('script', 'style')
+RAW_TEXT_END_RE = {tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in RAW_TEXT_TAGS}
+VOID_TAGS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr',
+))
+SECTION_TAGS = ('section', 'div')
+
+
+def iter_tags(html: str) -> Iterator[Tuple[str, str, bool, str, int, int, int, int]]:
+    """
+    HTML'i tek geçişte etiketlere ayırır:
+    (tür, etiket adı, self-closing, attribute metni, başlangıç, bitiş, içerik başlangıcı, içerik bitişi)
+    tür: 'open' / 'close' / 'doctype'. Yorumlar atlanır. script/style içeriği taranmaz;
+    bu etiketler için içerik aralığı ve kapanış etiketi tek seferde döner ('raw').
+    """
+    position = 0
+    search = TOKEN_RE.search
+    while True:
+        match = search(html, position)
+        if match is None:
+            return
+        start, end = match.span()
+        position = end
+        closing, name, attrs = match.group('closing', 'name', 'attrs')
+        if name is None:
+            if html.startswith('<!--', start):
+                continue
+            yield 'doctype', '', False, match.group(0), start, end, end, end
+            continue
+
+        name = name.lower()
+        if closing:
+            yield 'close', name, False, '', start, end, start, start
+            continue
+
+        self_closing = attrs.endswith('/')
+        if name in RAW_TEXT_TAGS and not self_closing:
+            end_match = RAW_TEXT_END_RE[name].search(html, end)
+            content_end = end_match.start() if end_match else len(html)
+            position = end_match.end() if end_match else len(html)
+            yield 'raw', name, False, attrs, start, position, end, content_end
+            continue
+
+        yield 'open', name, self_closing, attrs, start, end, end, end
+
+
+def parse_attrs(attrs: str) -> Dict[str, str]:
+    """Attribute metnini dict'e çevirir (isimler küçük harf, ilk değer geçerli)"""
+    parsed = {}
+    for match in ATTR_RE.finditer(attrs):
+        name = match.group(1).lower()
+        if name not in parsed:
+            value = match.group(2)
+            if value is None:
+                value = match.group(3)
+            if value is None:
+                value = match.group(4) or ''
+            parsed[name] = value
+    return parsed
+
+
+def _quick_attr(attrs: str, name: str) -> Optional[str]:
+    """Sadece attribute metninde geçiyorsa tam parse yapar (çoğu etiket için ucuz kontrol)"""
+    if name not in attrs.lower():
+        return None
+    return parse_attrs(attrs).get(name)
+
+
+def build_html_index(html: str) -> Dict:
+    """
+    HTML yapı indeksi (JSON uyumlu dict). Konumlar Python str karakter ofsetleri,
+    satırlar 1 tabanlıdır. İçerik aralıkları (content_start/content_end) açılış etiketinin
+    bitişi ile eşleşen kapanış etiketinin başlangıcıdır; kapanış yoksa None.
+    """
+    index = {
+        'version': INDEX_VERSION,
+        'length': len(html),
+        'total_lines': html.count('\n') + 1,
+        'has_doctype': False,
+        'doctype_count': 0,
+        'title': None,
+        'title_start': None,
+        'meta': {},
+        'tag_counts': {},
+        'closing_counts': {},
+        'sections': [],
+        'forms': [],
+        'scripts': [],
+        'styles': [],
+        'elements': {},
+        'unclosed': [],  # [[etiket, satır], ...] kapanışı olmayan açılışlar
+        'stray_closes': [],  # [[etiket, satır], ...] açılışı olmayan kapanışlar
+    }
+    tag_counts = index['tag_counts']
+    closing_counts = index['closing_counts']
+
+    line = 1
+    line_position = 0
+    # Açık elementler: (etiket adı, kapanışta tamamlanacak kayıtlar, satır)
+    stack = []
+
+    for kind, name, self_closing, attrs, start, end, content_start, content_end in iter_tags(html):
+        line += html.count('\n', line_position, start)
+        line_position = start
+
+        if kind == 'doctype':
+            if attrs[2:9].lower() == 'doctype':
+                index['has_doctype'] = True
+                index['doctype_count'] += 1
+            continue
+
+        if kind == 'close':
+            closing_counts[name] = closing_counts.get(name, 0) + 1
+            # Hatalı iç içe geçmede eşleşen en yakın açılışa kadar kapatılır (tarayıcı davranışına yakın);
+            # arada kapanmamış kalanların content_end'i None kalır
+            for depth in range(len(stack) - 1, -1, -1):
+                if stack[depth][0] == name:
+                    for record in stack[depth][1]:
+                        record['content_end'] = start
+                        record['end'] = end
+                        record['end_line'] = line
+                    for unclosed_name, _, unclosed_line in stack[depth + 1:]:
+                        _add_balance_issue(index['unclosed'], unclosed_name, unclosed_line)
+                    del stack[depth:]
+                    break
+            else:
+                if name not in VOID_TAGS:
+                    _add_balance_issue(index['stray_closes'], name, line)
+            continue
+
+        tag_counts[name] = tag_counts.get(name, 0) + 1
+
+        if kind == 'raw':
+            closing_counts[name] = closing_counts.get(name, 0) + (1 if content_end < len(html) else 0)
+            body = html[content_start:content_end]
+            end_line = line + html.count('\n', start, end)
+            block = {
+                'start': start,
+                'end': end,
+                'start_line': line,
+                'end_line': end_line,
+                'digest': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+            }
+            if name == 'script':
+                block['src'] = _quick_attr(attrs, 'src')
+            index['scripts' if name == 'script' else 'styles'].append(block)
+            line = end_line
+            line_position = end
+            continue
+
+        records = []
+        # id ve data-element-id için tek parse; attribute'ta 'id' geçmiyorsa hiç parse edilmez
+        parsed = parse_attrs(attrs) if attrs and 'id' in attrs.lower() else {}
+        element_id = parsed.get('data-element-id')
+        html_id = parsed.get('id')
+
+        if element_id is not None and element_id not in index['elements']:
+            element = {
+                'tag': name,
+                'start': start,
+                'start_line': line,
+                'content_start': content_start,
+                'content_end': None,
+            }
+            index['elements'][element_id] = element
+            records.append(element)
+
+        if name in SECTION_TAGS and html_id:
+            index['sections'].append({'id': html_id, 'tag': name, 'start': start, 'start_line': line})
+        elif name == 'form':
+            form = {'id': html_id or f'form_line_{line}', 'start': start, 'start_line': line, 'content_end': None}
+            index['forms'].append(form)
+            records.append(form)
+        elif name == 'title' and index['title'] is None:
+            title_end = html.find('</', end)
+            index['title'] = html[end:title_end].strip() if title_end != -1 else ''
+            index['title_start'] = start
+        elif name == 'meta':
+            meta = parse_attrs(attrs)
+            if 'charset' in meta:
+                index['meta']['charset'] = meta['charset']
+            meta_name = (meta.get('name') or meta.get('property') or meta.get('http-equiv') or '').lower()
+            if meta_name and meta_name not in index['meta']:
+                index['meta'][meta_name] = meta.get('content', '')
+
+        if not self_closing and name not in VOID_TAGS:
+            stack.append((name, records, line))
+        else:
+            for record in records:
+                record['content_end'] = content_start
+                record['end'] = end
+                record['end_line'] = line
+
+    for name, _, open_line in stack:
+        _add_balance_issue(index['unclosed'], name, open_line)
+    return index
+
+
+def _add_balance_issue(issues, name, line):
+    if len(issues) < MAX_BALANCE_ISSUES:
+        issues.append([name, line])
+
+
+def get_html_index(html: str, digest: Optional[str] = None) -> Dict:
+    """
+    İçerik hash'i (ContentBlob / WebsiteRevision digest'i) ile cache'lenmiş yapı indeksi.
+    Aynı HTML için indeks bir kez oluşturulur; editör, validasyon ve debug aynı indeksi kullanır.
+    """
+    if not html:
+        return build_html_index('')
+    digest = digest or hashlib.sha256(html.encode('utf-8')).hexdigest()
+    key = f"{INDEX_CACHE_PREFIX}:{INDEX_VERSION}:{digest}"
+
+    try:
+        index = cache.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ HTML index cache read failed: {str(e)}")
+        index = None
+    if index is not None:
+        return index
+
+    index = build_html_index(html)
+    try:
+        cache.set(key, index, timeout=getattr(settings, 'HTML_INDEX_CACHE_TTL', 60 * 60 * 24 * 7))
+    except Exception as e:
+        logger.warning(f"⚠️ HTML index cache write failed: {str(e)}")
+    return index
+
+
+def get_website_html_index(website) -> Dict:
+    """Website'in güncel HTML'i için indeks; cache'te varsa HTML yüklenmez"""
+    digest = website.html_digest
+    if digest:
+        try:
+            index = cache.get(f"{INDEX_CACHE_PREFIX}:{INDEX_VERSION}:{digest}")
+        except Exception:
+            index = None
+        if index is not None:
+            return index
+    return get_html_index(website.html_content, digest or None)
+
+
+def format_structure_summary(index: Dict) -> str:
+    """AI editörü için yapı özeti (LineBasedAIEditor prompt'undaki STRUCTURAL OVERVIEW)"""
+    lines = [
+        f"Total Lines: {index['total_lines']}",
+        f"Sections Found: {len(index['sections'])}",
+    ]
+    for section in index['sections']:
+        lines.append(f"  - {section['id']}: starts at line {section['start_line']}")
+
+    lines.append(f"Forms Found: {len(index['forms'])}")
+    for form in index['forms']:
+        end_info = f" to {form['end_line']}" if 'end_line' in form else ""
+        lines.append(f"  - {form['id']}: lines {form['start_line']}{end_info}")
+
+    lines.append(f"Script Blocks: {len(index['scripts'])}")
+    for script in index['scripts']:
+        lines.append(f"  - Script: lines {script['start_line']} to {script['end_line']}")
+
+    if index['elements']:
+        lines.append(f"Editable Elements (data-element-id): {len(index['elements'])}")
+    return '\n'.join(lines) + '\n'
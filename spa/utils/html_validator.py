@@ -0,0 +1,156 @@
+# utils/html_validator.py
+from collections import Counter
+from typing import Dict, Optional
+
+from spa.utils.html_index import VOID_TAGS, get_html_index
+
+# Sayısı değişmemesi gereken etiketler: (rapor anahtarı, indeks alanı, etiket)
+CRITICAL_TAGS = (
+    ('<!DOCTYPE', 'doctype_count', None),
+    ('<html', 'tag_counts', 'html'),
+    ('<head', 'tag_counts', 'head'),
+    ('<body', 'tag_counts', 'body'),
+    ('</html>', 'closing_counts', 'html'),
+    ('</head>', 'closing_counts', 'head'),
+    ('</body>', 'closing_counts', 'body'),
+)
+# HTML'i %70'ten fazla küçülten düzenleme hata sayılır
+MIN_SIZE_RATIO = 0.3
+
+
+def _critical_count(index: Dict, field: str, tag: Optional[str]) -> int:
+    return index[field] if tag is None else index[field].get(tag, 0)
+
+
+def _tag_balance(index: Dict) -> Dict[str, int]:
+    """Açılış - kapanış farkı sıfır olmayan etiketler (void etiketler hariç)"""
+    balance = {}
+    for tag, count in index['tag_counts'].items():
+        if tag in VOID_TAGS:
+            continue
+        difference = count - index['closing_counts'].get(tag, 0)
+        if difference:
+            balance[tag] = difference
+    for tag, count in index['closing_counts'].items():
+        if tag not in index['tag_counts'] and tag not in VOID_TAGS:
+            balance[tag] = -count
+    return balance
+
+
+def _compare_blocks(original_blocks, modified_blocks) -> Dict:
+    """script/style bloklarını içerik hash'leriyle karşılaştırır (sıra bağımsız)"""
+    original_digests = Counter(block['digest'] for block in original_blocks)
+    modified_digests = Counter(block['digest'] for block in modified_blocks)
+    removed = original_digests - modified_digests
+    added = modified_digests - original_digests
+
+    removed_lines, added_lines = [], []
+    for block in original_blocks:
+        if removed.get(block['digest']):
+            removed[block['digest']] -= 1
+            removed_lines.append(block['start_line'])
+    for block in modified_blocks:
+        if added.get(block['digest']):
+            added[block['digest']] -= 1
+            added_lines.append(block['start_line'])
+
+    return {
+        'original_count': len(original_blocks),
+        'modified_count': len(modified_blocks),
+        'unchanged': not removed_lines and not added_lines,
+        'removed_at_lines': removed_lines,  # orijinal HTML satırları
+        'added_at_lines': added_lines,  # değiştirilmiş HTML satırları
+    }
+
+
+def validate_html_change(original_html: str, modified_html: str,
+                         original_index: Optional[Dict] = None, modified_index: Optional[Dict] = None) -> Dict:
+    """
+    Bir düzenlemenin HTML yapısını bozup bozmadığını kontrol eder. Her doküman
+    yapı indeksi ile bir kez (doğrusal) taranır; indeksler digest ile cache'lendiği için
+    aynı HTML tekrar taranmaz. Sonuç: valid / errors / warnings ve ayrıntılı rapor.
+    """
+    result = {'valid': True, 'errors': [], 'warnings': []}
+
+    if not modified_html or not modified_html.strip():
+        result['valid'] = False
+        result['errors'].append("Modified HTML is empty")
+        return result
+
+    original = original_index or get_html_index(original_html)
+    modified = modified_index or get_html_index(modified_html)
+
+    # Kritik etiketler (sayıları aynı kalmalı)
+    critical_tags = {}
+    for label, field, tag in CRITICAL_TAGS:
+        original_count = _critical_count(original, field, tag)
+        modified_count = _critical_count(modified, field, tag)
+        critical_tags[label] = {
+            'original': original_count,
+            'modified': modified_count,
+            'intact': original_count == modified_count
+        }
+        if original_count != modified_count:
+            result['valid'] = False
+            result['errors'].append(f"Critical tag {label} is corrupted: {original_count} → {modified_count}")
+
+    # Etiket dengesi: sadece düzenlemeyle değişen dengesizlikler raporlanır
+    original_balance = _tag_balance(original)
+    modified_balance = _tag_balance(modified)
+    balance_changes = {
+        tag: {'original': original_balance.get(tag, 0), 'modified': modified_balance.get(tag, 0)}
+        for tag in set(original_balance) | set(modified_balance)
+        if original_balance.get(tag, 0) != modified_balance.get(tag, 0)
+    }
+    if balance_changes:
+        details = ', '.join(
+            f"<{tag}> {change['original']:+d} → {change['modified']:+d}" for tag, change in sorted(balance_changes.items())
+        )
+        # Değişen etiketlerin değiştirilmiş HTML'deki konumları
+        locations = [f"unclosed <{tag}> at line {line}" for tag, line in modified['unclosed'] if tag in balance_changes][:5]
+        locations += [f"stray </{tag}> at line {line}" for tag, line in modified['stray_closes'] if tag in balance_changes][:5]
+        result['warnings'].append(
+            f"Tag balance changed: {details}" + (f" ({'; '.join(locations)})" if locations else "")
+        )
+
+    # script / style blokları
+    scripts = _compare_blocks(original['scripts'], modified['scripts'])
+    scripts['scripts_intact'] = scripts['original_count'] == scripts['modified_count']
+    if not scripts['scripts_intact']:
+        result['warnings'].append(f"JavaScript blocks changed: {scripts['original_count']} → {scripts['modified_count']}")
+    elif not scripts['unchanged']:
+        result['warnings'].append(f"JavaScript block content changed at lines {scripts['added_at_lines'][:5]}")
+
+    styles = _compare_blocks(original['styles'], modified['styles'])
+    styles['styles_intact'] = styles['original_count'] == styles['modified_count']
+    if not styles['styles_intact']:
+        result['warnings'].append(f"CSS blocks changed: {styles['original_count']} → {styles['modified_count']}")
+
+    # Yapısal fark: section id'leri, formlar, düzenlenebilir elementler
+    original_sections = [section['id'] for section in original['sections']]
+    modified_sections = [section['id'] for section in modified['sections']]
+    original_section_ids, modified_section_ids = set(original_sections), set(modified_sections)
+    structure = {
+        'sections_removed': [section for section in original_sections if section not in modified_section_ids],
+        'sections_added': [section for section in modified_sections if section not in original_section_ids],
+        'forms': {'original': len(original['forms']), 'modified': len(modified['forms'])},
+        'elements_removed': [element for element in original['elements'] if element not in modified['elements']][:50],
+    }
+    if structure['sections_removed']:
+        result['warnings'].append(f"Sections removed: {', '.join(structure['sections_removed'][:10])}")
+
+    # Boyut kontrolü
+    if modified['length'] < original['length'] * MIN_SIZE_RATIO:
+        result['valid'] = False
+        result['errors'].append(f"HTML dramatically reduced in size: {original['length']} → {modified['length']}")
+
+    result.update({
+        'critical_tags': critical_tags,
+        'tag_balance': balance_changes,
+        'scripts': scripts,
+        'styles': styles,
+        'structure': structure,
+        'html_size_change': modified['length'] - original['length'],
+        'line_count_change': modified['total_lines'] - original['total_lines'],
+    })
+    return result
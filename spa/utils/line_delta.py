@@ -0,0 +1,75 @@
+# utils/line_delta.py
+import difflib
+from typing import List
+
+
+def split_lines(text):
+    """Satır sonlarını koruyarak böl (birleştirince aynı metni verir)"""
+    return text.splitlines(keepends=True)
+
+
+def compute_line_delta(old_text, new_text) -> List[list]:
+    """
+    İki metin arasındaki satır bazlı delta: [[başlangıç, bitiş, [yeni satırlar]], ...]
+    Pozisyonlar eski metnin satırlarına göredir. Ortak baş/son kısım önce kırpılır,
+    SequenceMatcher sadece değişen ortadaki bölgede çalışır.
+    """
+    old_lines = split_lines(old_text)
+    new_lines = split_lines(new_text)
+
+    prefix = 0
+    max_prefix = min(len(old_lines), len(new_lines))
+    while prefix < max_prefix and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+
+    suffix = 0
+    max_suffix = max_prefix - prefix
+    while suffix < max_suffix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    old_middle = old_lines[prefix:len(old_lines) - suffix]
+    new_middle = new_lines[prefix:len(new_lines) - suffix]
+
+    delta = []
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            delta.append([prefix + i1, prefix + i2, new_middle[j1:j2]])
+    return delta
+
+
+def apply_line_delta(old_text, delta) -> str:
+    """compute_line_delta çıktısını eski metne uygular"""
+    old_lines = split_lines(old_text)
+    result = []
+    position = 0
+    for start, end, new_lines in delta:
+        result.extend(old_lines[position:start])
+        result.extend(new_lines)
+        position = end
+    result.extend(old_lines[position:])
+    return ''.join(result)
+
+
+def delta_to_hunks(delta) -> List[dict]:
+    """
+    Delta'yı istemci için hunk listesine çevirir (AI line_changes ile aynı şekil):
+    start_line/end_line orijinal HTML'de 1 tabanlı ve kapsayıcıdır;
+    end_line < start_line ise start_line'dan önceye ekleme demektir.
+    """
+    return [
+        {'start_line': start + 1, 'end_line': end, 'new_content': ''.join(lines)}
+        for start, end, lines in delta
+    ]
+
+
+def delta_size(delta) -> int:
+    """Delta'nın yaklaşık byte boyutu (snapshot'a geçiş kararı için)"""
+    return sum(len(line.encode('utf-8')) for _, _, lines in delta for line in lines) + 16 * len(delta)
+
+
+def unified_diff(old_text, new_text, from_label='a', to_label='b', context=3) -> str:
+    return ''.join(difflib.unified_diff(
+        split_lines(old_text), split_lines(new_text),
+        fromfile=from_label, tofile=to_label, n=context
+    ))
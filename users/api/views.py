@@ -11,6 +11,7 @@ from django.utils import timezone
 from rest_framework.permissions import AllowAny
 import requests
 import json
+from spa.api.http_cache import conditional_response, make_etag
 from .serializers import (
     UserSerializer,
     RegisterSerializer,
@@ -344,8 +345,14 @@ class UserInfoView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        user = request.user
+        # request.user zaten DB'den yüklü: serializer'ın okuduğu alanlardan ETag, değişmediyse 304
+        etag = make_etag(
+            'user_info', user.id, user.email, user.name, user.surname, user.phone_number,
+            user.date_joined.isoformat(), user.email_verified, user.social_provider, user.has_usable_password(),
+            user.subscription_type, user.subscription_expiry
+        )
+        return conditional_response(request, etag, lambda: Response(UserSerializer(user).data))
 
 class CustomTokenRefreshView(APIView):
     """
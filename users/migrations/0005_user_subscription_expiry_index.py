@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_subscription_expiry_user_subscription_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='subscription_expiry',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_subscription_expiry_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='email_verification_token',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='password_reset_token',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+    ]
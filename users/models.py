@@ -2,6 +2,7 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
 from django.utils import timezone
+from django.utils.functional import cached_property
 from .managers import CustomUserManager
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -24,16 +25,16 @@ class User(AbstractBaseUser, PermissionsMixin):
         choices=SUBSCRIPTION_CHOICES,
         default='free'
     )
-    subscription_expiry = models.DateTimeField(blank=True, null=True)
+    subscription_expiry = models.DateTimeField(blank=True, null=True, db_index=True)
 
     # Fields for email verification
     email_verified = models.BooleanField(default=False)
-    email_verification_token = models.CharField(max_length=255, blank=True, null=True)
+    email_verification_token = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     email_verification_token_created = models.DateTimeField(blank=True, null=True)
     social_provider = models.CharField(max_length=30, blank=True, null=True)
     
     # Fields for password reset
-    password_reset_token = models.CharField(max_length=255, blank=True, null=True)
+    password_reset_token = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     password_reset_token_created = models.DateTimeField(blank=True, null=True)
     
     objects = CustomUserManager()
@@ -62,35 +63,29 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.has_usable_password() or self.has_social_login()
     
 
+    PAID_SUBSCRIPTION_TYPES = ('basic', 'premium')
+
+    @cached_property
+    def subscription_tier(self):
+        """
+        Kullanıcının aktif abonelik seviyesini döndürür (sadece okuma, DB'ye yazmaz).
+        Süresi dolmuş abonelikler 'free' sayılır; kalıcı düşürme expire_subscriptions_task ile yapılır.
+        Instance başına hesaplanır (request.user için request süresince), save()'de temizlenir.
+        """
+        if self.subscription_type in self.PAID_SUBSCRIPTION_TYPES:
+            if self.subscription_expiry and self.subscription_expiry > timezone.now():
+                return self.subscription_type
+        return 'free'
+
     @property
     def is_basic(self):
         """Kullanıcının Basic plan olup olmadığını kontrol eder"""
-        if self.subscription_type == 'basic':
-            # Eğer abonelik süresi dolmamışsa Basic kullanıcı
-            if self.subscription_expiry and self.subscription_expiry > timezone.now():
-                return True
-            # Abonelik süresi dolmuşsa Free'ye düşür
-            else:
-                self.subscription_type = 'free'
-                self.subscription_expiry = None
-                self.save(update_fields=['subscription_type', 'subscription_expiry'])
-                return False
-        return False
+        return self.subscription_tier == 'basic'
 
     @property
     def is_premium(self):
         """Kullanıcının Premium plan olup olmadığını kontrol eder"""
-        if self.subscription_type == 'premium':
-            # Eğer abonelik süresi dolmamışsa Premium kullanıcı
-            if self.subscription_expiry and self.subscription_expiry > timezone.now():
-                return True
-            # Abonelik süresi dolmuşsa Free'ye düşür
-            else:
-                self.subscription_type = 'free'
-                self.subscription_expiry = None
-                self.save(update_fields=['subscription_type', 'subscription_expiry'])
-                return False
-        return False
+        return self.subscription_tier == 'premium'
 
     @property
     def is_pro(self):
@@ -100,17 +95,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     @property
     def is_free(self):
         """Kullanıcının Free plan olup olmadığını kontrol eder"""
-        return self.subscription_type == 'free'
+        return self.subscription_tier == 'free'
 
-    @property
-    def subscription_tier(self):
-        """Kullanıcının aktif abonelik seviyesini döndürür"""
-        if self.is_premium:
-            return 'premium'
-        elif self.is_basic:
-            return 'basic'
-        else:
-            return 'free'
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.__dict__.pop('subscription_tier', None)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop('subscription_tier', None)
 
     @property
     def website_limit(self):
@@ -125,7 +118,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     @property
     def websites_remaining(self):
         """Kullanıcının kalan website hakkını döndürür"""
-        current_count = self.websites.count()
+        from spa.services.quota_service import get_website_quota_service
+        current_count = get_website_quota_service().get_count(self.id)
         return max(0, self.website_limit - current_count)
 
     @property
@@ -0,0 +1,25 @@
+# users/tasks.py
+import logging
+from celery import shared_task
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, ignore_result=True)
+def expire_subscriptions_task(self):
+    """Downgrade users whose paid subscription has expired with a single bulk UPDATE"""
+    now = timezone.now()
+    expired = User.objects.filter(
+        subscription_type__in=User.PAID_SUBSCRIPTION_TYPES
+    ).filter(
+        Q(subscription_expiry__lte=now) | Q(subscription_expiry__isnull=True)
+    )
+
+    downgraded = expired.update(subscription_type='free', subscription_expiry=None)
+    if downgraded:
+        logger.info(f"✅ Subscription expiry sweep: {downgraded} users downgraded to free")
+    return downgraded